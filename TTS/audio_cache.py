@@ -0,0 +1,208 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from translator.cache import normalize_text
+
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1") == "1"
+
+# Replies that are spoken over and over; pre-rendered by warmup() when TTS_CACHE_WARMUP=1
+DEFAULT_WARMUP_PHRASES = [
+    "Sorry, there was an error processing your message.",
+    "I'm sorry, I'm having trouble connecting to my knowledge service right now. This could be due to network issues or service unavailability. Please try again later or check your internet connection.",
+    "I'm sorry, the request timed out. This could be due to network issues or high server load. Please try again later.",
+]
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def load_warmup_phrases(path=None):
+    """Phrases to pre-render: one per line from TTS_CACHE_WARMUP_FILE, else the defaults"""
+    path = path or os.getenv("TTS_CACHE_WARMUP_FILE")
+    if not path:
+        return list(DEFAULT_WARMUP_PHRASES)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError as e:
+        logging.error(f"Could not read TTS warmup phrases from {path}: {e}")
+        return list(DEFAULT_WARMUP_PHRASES)
+
+
+class AudioCache:
+    """Content-addressed cache of synthesized audio: memory LRU in front of a directory of files
+
+    Keys hash the normalized text together with everything that changes the
+    rendered audio (engine, voice model, description), so a hit is always the
+    same text spoken in the same voice.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=None, max_disk_bytes=None):
+        """
+        Args:
+            directory: Folder for the disk tier; empty string disables it
+            max_memory_bytes: Size cap of the in-memory tier
+            max_disk_bytes: Size cap of the disk tier (least recently used files go first)
+        """
+        self.directory = os.getenv("TTS_CACHE_DIR", "tts_cache") if directory is None else directory
+        self.max_memory_bytes = max_memory_bytes or int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+        self.max_disk_bytes = max_disk_bytes or int(os.getenv("TTS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory)
+                                       if entry.name.endswith(".audio"))
+            except OSError as e:
+                logging.error(f"TTS cache disk tier disabled: {e}")
+                self.directory = ""
+
+    @staticmethod
+    def make_key(text, *voice):
+        """Key for text rendered by a given engine/voice, e.g. make_key(text, "piper", model_path)"""
+        material = "|".join(str(part) for part in voice) + "|" + normalize_text(text)
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".audio")
+
+    def get(self, key):
+        """Return the cached audio bytes, or None on a miss"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                # mtime doubles as the disk tier's last-access time
+                os.utime(path)
+            except OSError:
+                audio = None
+            if audio is not None:
+                with self._lock:
+                    self._remember(key, audio)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, audio):
+        """Store rendered audio bytes in both tiers"""
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        if not self.directory:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            existed = os.path.exists(path)
+            with open(temp_path, "wb") as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+            if not existed:
+                with self._lock:
+                    self._disk_bytes += len(audio)
+                    over = self._disk_bytes > self.max_disk_bytes
+                if over:
+                    self._prune_disk()
+        except OSError as e:
+            logging.error(f"TTS cache write error: {e}")
+
+    def _remember(self, key, audio):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _prune_disk(self):
+        """Delete least recently used files until the disk tier is back under 90% of its cap"""
+        try:
+            entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith(".audio")),
+                             key=lambda entry: entry.stat().st_mtime)
+        except OSError as e:
+            logging.error(f"TTS cache prune error: {e}")
+            return
+        total = sum(entry.stat().st_size for entry in entries)
+        target = self.max_disk_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def warmup(self, phrases, render):
+        """Render and store any phrase not cached yet
+
+        Args:
+            phrases: Texts to pre-render
+            render: Callable(text) that synthesizes through the cached path
+        """
+        start = time.perf_counter()
+        rendered = 0
+        for phrase in phrases:
+            try:
+                if render(phrase) is not None:
+                    rendered += 1
+            except Exception as e:
+                logging.error(f"TTS cache warmup failed for '{phrase[:50]}': {e}")
+        logging.info(f"TTS cache warmup: {rendered}/{len(phrases)} phrases ready in {time.perf_counter() - start:.1f}s")
+        return rendered
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+def get_default_cache():
+    """Return the process-wide cache shared by the Piper and Meitei TTS paths (None if TTS_CACHE=0)"""
+    global _default_cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = AudioCache()
+    return _default_cache
@@ -0,0 +1,73 @@
+import struct
+import logging
+import threading
+import subprocess
+from audio_decode import ffmpeg_path
+
+# RIFF and data sizes are unknown while streaming; 0xFFFFFFFF tells decoders to read to EOF
+STREAMING_SIZE = 0xFFFFFFFF
+
+
+def wav_stream_header(sample_rate, channels=1, sample_width=2):
+    """44-byte PCM WAV header with streaming-length markers instead of real sizes"""
+    byte_rate = sample_rate * channels * sample_width
+    return (b"RIFF" + struct.pack("<I", STREAMING_SIZE) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate,
+                                    channels * sample_width, sample_width * 8)
+            + b"data" + struct.pack("<I", STREAMING_SIZE))
+
+
+def iter_wav_stream(chunks, sample_rate):
+    """Yield a WAV header followed by each int16 chunk's bytes as it is produced"""
+    yield wav_stream_header(sample_rate)
+    for chunk in chunks:
+        yield chunk.tobytes()
+
+
+def iter_pcm_stream(chunks):
+    """Yield raw little-endian int16 PCM"""
+    for chunk in chunks:
+        yield chunk.tobytes()
+
+
+def ogg_available():
+    return ffmpeg_path() is not None
+
+
+def iter_ogg_opus_stream(chunks, sample_rate, bitrate="32k", read_size=4096):
+    """Encode int16 chunks to Ogg/Opus through ffmpeg, yielding pages as they are flushed"""
+    process = subprocess.Popen(
+        [ffmpeg_path(), "-hide_banner", "-loglevel", "error", "-fflags", "nobuffer", "-probesize", "32",
+         "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+         "-flush_packets", "1", "-page_duration", "100000", "-f", "ogg", "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk.tobytes())
+                process.stdin.flush()
+        except Exception as e:
+            logging.error(f"Error feeding audio to the Opus encoder: {e}")
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        while True:
+            data = process.stdout.read1(read_size)
+            if not data:
+                break
+            yield data
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        writer.join(timeout=1)
@@ -1,13 +1,52 @@
 import requests
-import re
+import http_client
+from circuit_breaker import get_breaker, guarded_request, CircuitOpenError
+from TTS.audio_cache import get_default_cache
+from TTS.text_normalizer import normalize_for_meitei_tts
+from singleflight import get_group
 import numpy as np
 import logging
 
 TTS_API_URL = "https://enabling-golden-muskox.ngrok-free.app/tts"
 SAMPLE_RATE = 44000
 DATA_TYPE = np.int16
+DEFAULT_DESCRIPTION = "male voice, clear tone, professional hollywood action movie hero voice"
 
-def synthesize_meitei_speech(text: str, description: str = "male voice, clear tone, professional hollywood action movie hero voice"):
+def clean_tts_text(text):
+    """Remove symbols and markdown, keeping only English, Meitei Mayek, and basic punctuation"""
+    return normalize_for_meitei_tts(text)
+
+def extract_tts_audio(response_data):
+    """Return the base64 audio from a TTS API response, or None if it is missing"""
+    # Handle different possible response formats
+    if isinstance(response_data, dict):
+        if "audio" in response_data:
+            audio_base64 = response_data["audio"]
+            logging.info(f"TTS Success: Got audio data, length: {len(audio_base64)}")
+            return audio_base64
+        elif "data" in response_data and "audio" in response_data["data"]:
+            # Handle response in format {"data": {"audio": "..."}}
+            audio_base64 = response_data["data"]["audio"]
+            logging.info(f"TTS Success: Got audio data from nested 'data' field, length: {len(audio_base64)}")
+            return audio_base64
+        elif "result" in response_data and "audio" in response_data["result"]:
+            # Handle response in format {"result": {"audio": "..."}}
+            audio_base64 = response_data["result"]["audio"]
+            logging.info(f"TTS Success: Got audio data from nested 'result' field, length: {len(audio_base64)}")
+            return audio_base64
+        else:
+            logging.error(f"TTS Error: Expected 'audio' key not found in response: {response_data.keys() if isinstance(response_data, dict) else 'Not a dict'}")
+            return None
+    else:
+        logging.error(f"TTS Error: Unexpected response format, expected dict but got {type(response_data)}")
+        return None
+
+def _probe_tts_host():
+    """Health check for the TTS tunnel: any non-5xx answer that isn't an ngrok error page"""
+    response = http_client.get(TTS_API_URL.rsplit("/", 1)[0] + "/", timeout=5)
+    return response.status_code < 500 and "ngrok-error-code" not in response.headers
+
+def synthesize_meitei_speech(text: str, description: str = DEFAULT_DESCRIPTION):
     """
     Fetches Meitei TTS audio from external API and returns base64 audio data
     """
@@ -15,22 +54,28 @@ def synthesize_meitei_speech(text: str, description: str = "male voice, clear to
         logging.warning("TTS Error: No text to speak")
         return None
 
-    # Remove symbols and markdown, keeping only English, Meitei Mayek, and basic punctuation
-    cleaned_text = re.sub(r'[^a-zA-Z0-9\s\uABC0-\uABFF.,?!]', '', text)
+    cleaned_text = clean_tts_text(text)
     logging.info(f"TTS Request - Original: '{text}' -> Cleaned: '{cleaned_text}'")
 
+    cache = get_default_cache()
+    key = cache.make_key(cleaned_text, "meitei_tts", TTS_API_URL, description) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logging.info("TTS cache hit")
+            return cached.decode("ascii")
+
+    # Concurrent requests for the same sentence share one call to the TTS host
+    return get_group("meitei_tts").do((cleaned_text, description), _fetch_speech, cleaned_text, description, key)
+
+def _fetch_speech(cleaned_text, description, key):
+    """POST one synthesis request to the TTS host; stores the audio in the cache under key"""
+    cache = get_default_cache()
     try:
         data = {"prompt": cleaned_text, "description": description}
         
-        response = requests.post(TTS_API_URL, json=data)
-        
-        # Check if response is ok before trying to parse JSON
-        if response.status_code != 200:
-            logging.error(f"TTS API returned status code: {response.status_code}")
-            logging.error(f"TTS API response text: {response.text}")
-            return None
-            
-        response.raise_for_status()
+        breaker = get_breaker("meitei_tts", probe=_probe_tts_host)
+        response = guarded_request(breaker, http_client.post, TTS_API_URL, json=data)
         
         # Try to parse response JSON
         try:
@@ -39,29 +84,19 @@ def synthesize_meitei_speech(text: str, description: str = "male voice, clear to
             logging.error(f"TTS Error: Invalid JSON response from API: {response.text}")
             return None
             
-        # Handle different possible response formats
-        if isinstance(response_data, dict):
-            if "audio" in response_data:
-                audio_base64 = response_data["audio"]
-                logging.info(f"TTS Success: Got audio data, length: {len(audio_base64)}")
-                return audio_base64
-            elif "data" in response_data and "audio" in response_data["data"]:
-                # Handle response in format {"data": {"audio": "..."}}
-                audio_base64 = response_data["data"]["audio"]
-                logging.info(f"TTS Success: Got audio data from nested 'data' field, length: {len(audio_base64)}")
-                return audio_base64
-            elif "result" in response_data and "audio" in response_data["result"]:
-                # Handle response in format {"result": {"audio": "..."}}
-                audio_base64 = response_data["result"]["audio"]
-                logging.info(f"TTS Success: Got audio data from nested 'result' field, length: {len(audio_base64)}")
-                return audio_base64
-            else:
-                logging.error(f"TTS Error: Expected 'audio' key not found in response: {response_data.keys() if isinstance(response_data, dict) else 'Not a dict'}")
-                return None
-        else:
-            logging.error(f"TTS Error: Unexpected response format, expected dict but got {type(response_data)}")
-            return None
+        audio_base64 = extract_tts_audio(response_data)
+        if audio_base64 and key is not None and cache is not None:
+            cache.put(key, audio_base64.encode("ascii"))
+        return audio_base64
             
+    except CircuitOpenError:
+        logging.warning("Meitei TTS Error: TTS host is unavailable (circuit open), skipping synthesis")
+        return None
+    except requests.exceptions.HTTPError as e:
+        # Check if response is ok before trying to parse JSON
+        logging.error(f"TTS API returned status code: {e.response.status_code}")
+        logging.error(f"TTS API response text: {e.response.text}")
+        return None
     except requests.exceptions.RequestException as e:
         logging.error(f"Meitei TTS Error: Could not connect to API. {e}")
         return None
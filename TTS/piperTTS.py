@@ -1,19 +1,69 @@
-import re
+import os
 from piper.voice import PiperVoice
 import wave
 import io
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import sounddevice as sd
-import time
+from voice_pipeline import SentenceSegmenter
+from TTS.audio_cache import get_default_cache
+from translator.cache import normalize_text
+from singleflight import get_group
+from TTS.text_normalizer import normalize_for_piper
+
+PIPER_TTS_WORKERS = int(os.getenv("PIPER_TTS_WORKERS", str(min(os.cpu_count() or 2, 4))))
+PIPER_TTS_PARALLEL = os.getenv("PIPER_TTS_PARALLEL", "0") == "1"
+CROSSFADE_MS = int(os.getenv("PIPER_TTS_CROSSFADE_MS", "10"))
+
+
+def split_sentences(text, min_chars=12):
+    """Split text into sentences for independent synthesis"""
+    segmenter = SentenceSegmenter(min_chars)
+    sentences = segmenter.feed(text + "\n")
+    rest = segmenter.flush()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+def crossfade_concat(chunks, overlap):
+    """Join int16 chunks, blending `overlap` samples at each seam to avoid clicks"""
+    chunks = [chunk for chunk in chunks if len(chunk)]
+    if not chunks:
+        return np.zeros(0, dtype=np.int16)
+    out = chunks[0].astype(np.float32)
+    for chunk in chunks[1:]:
+        chunk = chunk.astype(np.float32)
+        n = min(overlap, len(out), len(chunk))
+        if n:
+            fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            blended = out[-n:] * (1.0 - fade_in) + chunk[:n] * fade_in
+            out = np.concatenate((out[:-n], blended, chunk[n:]))
+        else:
+            out = np.concatenate((out, chunk))
+    return np.clip(out, -32768, 32767).astype(np.int16)
 
 class PiperTTS:
     """Piper Text-to-Speech with direct audio playback"""
     
-    def __init__(self, model_path=None, config_path=None):
-        """Initialize the Piper TTS engine"""
+    def __init__(self, model_path=None, config_path=None, workers=None, cache=None):
+        """Initialize the Piper TTS engine
+
+        Args:
+            model_path: Piper .onnx voice model
+            config_path: Matching voice config JSON
+            workers: Threads (each with its own PiperVoice) used by synthesize_many
+            cache: AudioCache for rendered WAVs (defaults to the shared one)
+        """
         self.model_path = model_path or "./models/en_US-amy-medium.onnx"
         self.config_path = config_path or "./models/config_ammy.onnx.json"
+        self.workers = workers or PIPER_TTS_WORKERS
+        self.cache = cache if cache is not None else get_default_cache()
         self.voice = None
+        self._local = threading.local()
+        self._pool = None
+        self._pool_lock = threading.Lock()
         self._load_voice()
     
     def _load_voice(self):
@@ -27,27 +77,44 @@ class PiperTTS:
             return False
     
     def _clean_text(self, text):
-        "\"\"\"Clean the text by removing markdown, HTML, and other special characters.\"\"\""
-        # Remove HTML tags
-        text = re.sub(r'<.*?>', '', text)
-        # Remove markdown links
-        text = re.sub(r'\\\[(.*?)\\]\\(.*?\\)', r'\\1', text)
-        # Remove markdown formatting characters
-        text = re.sub(r'([*_~`#])', '', text)
-        # Remove emojis and other pictographs
-        emoji_pattern = re.compile("["
-                               u"\U0001F600-\U0001F64F"  # emoticons
-                               u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                               u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                               u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                               u"\U00002702-\U000027B0"
-                               u"\U000024C2-\U0001F251"
-                               "]+", flags=re.UNICODE)
-        text = emoji_pattern.sub(r'', text)
-        return text
-
-    def text_to_speech(self, text):
-        """Convert text to speech and return the audio buffer"""
+        """Clean the text by removing markdown, HTML, emoji and spelling out numbers"""
+        return normalize_for_piper(text)
+
+    def text_to_speech(self, text, parallel=None):
+        """Convert text to speech and return the audio buffer
+
+        Repeated texts are served from the audio cache, and concurrent calls for
+        the same text share one rendering (each caller gets its own buffer).
+        With parallel=True (or PIPER_TTS_PARALLEL=1) the text is rendered
+        sentence by sentence across the worker pool via synthesize_many().
+        """
+        cleaned = self._clean_text(text)
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(cleaned, "piper", self.model_path, self.config_path)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return io.BytesIO(cached)
+
+        flight_key = (self.model_path, self.config_path, normalize_text(cleaned))
+        audio = get_group("piper_tts").do(flight_key, self._render_audio, cleaned, parallel, key)
+        return io.BytesIO(audio) if audio is not None else None
+
+    def _render_audio(self, cleaned, parallel, key):
+        """Render already-cleaned text to WAV bytes and store them in the audio cache"""
+        if parallel if parallel is not None else PIPER_TTS_PARALLEL:
+            buffer = self._stitch(self._iter_render(split_sentences(cleaned)))
+        else:
+            buffer = self._synthesize(cleaned)
+        if buffer is None:
+            return None
+        audio = buffer.getvalue()
+        if key is not None:
+            self.cache.put(key, audio)
+        return audio
+
+    def _synthesize(self, cleaned_text):
+        """Render the whole (already cleaned) text in one call on the calling thread"""
         if not self.voice:
             if not self._load_voice():
                 return None
@@ -56,9 +123,6 @@ class PiperTTS:
         buffer = io.BytesIO()
         
         try:
-            # Clean the text before synthesis
-            cleaned_text = self._clean_text(text)
-            
             # Generate speech to the buffer
             with wave.open(buffer, "wb") as wav_file:
                 self.voice.synthesize(cleaned_text, wav_file)
@@ -71,6 +135,90 @@ class PiperTTS:
             print(f"Error generating speech: {e}")
             return None
 
+    def _worker_voice(self):
+        """One PiperVoice per pool thread; ONNX sessions are not shared across threads"""
+        voice = getattr(self._local, "voice", None)
+        if voice is None:
+            voice = PiperVoice.load(self.model_path, config_path=self.config_path)
+            self._local.voice = voice
+        return voice
+
+    def _render(self, sentence):
+        """Synthesize one sentence on the calling pool thread; returns (int16 samples, sample_rate)"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            self._worker_voice().synthesize(sentence, wav_file)
+        buffer.seek(0)
+        with wave.open(buffer, "rb") as wav_file:
+            sample_rate = wav_file.getframerate()
+            frames = wav_file.readframes(wav_file.getnframes())
+        return np.frombuffer(frames, dtype=np.int16), sample_rate
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="piper")
+        return self._pool
+
+    def iter_synthesize(self, text):
+        """Yield (int16 samples, sample_rate) per sentence, in order, rendered in parallel"""
+        if isinstance(text, str):
+            sentences = split_sentences(self._clean_text(text))
+        else:
+            sentences = [self._clean_text(sentence) for sentence in text]
+        return self._iter_render(sentences)
+
+    def _iter_render(self, sentences):
+        """Render cleaned sentences across the pool, yielding (samples, sample_rate) in order"""
+        pool = self._get_pool()
+        pending = deque()
+        sentences = iter(sentence for sentence in sentences if sentence.strip())
+        try:
+            # Keep a bounded window in flight so memory stays flat for long texts
+            for sentence in sentences:
+                pending.append(pool.submit(self._render, sentence))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def synthesize_many(self, text, crossfade_ms=None):
+        """Render sentences in parallel and stitch them into one WAV buffer (or None on failure)
+
+        Args:
+            text: A string (split into sentences) or a list of sentences
+            crossfade_ms: Blend length at each seam
+        """
+        return self._stitch(self.iter_synthesize(text), crossfade_ms)
+
+    def _stitch(self, rendered, crossfade_ms=None):
+        """Crossfade (samples, sample_rate) chunks into one WAV buffer (or None on failure)"""
+        try:
+            chunks = []
+            sample_rate = None
+            for samples, sample_rate in rendered:
+                chunks.append(samples)
+            if sample_rate is None:
+                return None
+            overlap = sample_rate * (CROSSFADE_MS if crossfade_ms is None else crossfade_ms) // 1000
+            audio = crossfade_concat(chunks, overlap)
+
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(audio.tobytes())
+            buffer.seek(0)
+            return buffer
+        except Exception as e:
+            print(f"Error generating speech: {e}")
+            return None
+
 # Example usage in a loop
 def interactive_tts_demo():
     """Interactive TTS demo with a loop"""
@@ -1,7 +1,9 @@
 import requests
+import http_client
 import base64
 import numpy as np
 import sounddevice as sd
+from TTS.text_normalizer import normalize_for_meitei_tts
 
 # --- Configuration ---
 API_URL = "https://enabling-golden-muskox.ngrok-free.app/tts"
@@ -20,12 +22,13 @@ def play_tts_from_text(prompt: str, description: str):
         prompt: The text to be converted to speech.
         description: A description to guide the voice generation.
     """
+    prompt = normalize_for_meitei_tts(prompt)
     print(f"Requesting TTS for: '{prompt}'")
     
     try:
         # 1. Call the TTS API
         data = {"prompt": prompt, "description": description}
-        response = requests.post(API_URL, json=data)
+        response = http_client.post(API_URL, json=data)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
 
         # 2. Decode the base64 audio data
@@ -0,0 +1,151 @@
+import re
+
+# Markup that is dropped whole. A link's text is kept: only its "[" and "](target)" match,
+# so the text between them goes through the same pass as the rest of the reply.
+_MARKUP = (
+    r"```.*?(?:```|$)"            # fenced code blocks
+    r"|<[^<>\n]+>"                # HTML tags
+    r"|!\[[^\]]*\]\([^)]*\)"     # markdown images
+    r"|\[(?=[^\]]*\]\()"          # markdown link opener
+    r"|\]\([^)]*\)"               # markdown link target
+    r"|https?://\S+"              # bare URLs
+)
+_EMOJI = (
+    "\U0001F000-\U0001FAFF\u2600-\u27BF\u2300-\u23FF\u2B00-\u2BFF"
+    "\u24C2\u200D\uFE0F\u20E3"
+)
+_MEITEI = "[\uABC0-\uABFF\uAAE0-\uAAFF]"
+# Piper: one alternation for markup, formatting characters and emoji (removed), Meitei
+# runs (segment boundaries; spaces, digits and punctuation inside a run stay with it) and
+# numbers (spelled out). A backtick that opens no code block is dropped on its own, so a
+# formatting run can't swallow the start of a fence.
+_PIPER_TOKENS = re.compile(
+    _MARKUP
+    + "|[*_~#>|" + _EMOJI + "]+|`"
+    + f"|(?P<meitei>{_MEITEI}+(?:[\\s\\d.,:;?!%'\"()\\-]+{_MEITEI}+)*)"
+    + r"|(?P<number>\d+(?:[.,]\d+)*%?)",
+    re.DOTALL,
+)
+# Meitei TTS: markup, then everything but English letters/digits, whitespace, Meitei Mayek
+# and .,?! (the old clean_tts_text set). Markup openers are dropped one at a time when they
+# open no markup, for the same reason as the backtick above.
+_MEITEI_TOKENS = re.compile(
+    _MARKUP + "|[^a-zA-Z0-9\\s\uABC0-\uABFF.,?!<`\\[\\]]+|[<`\\[\\]]",
+    re.DOTALL,
+)
+# Commas only count as thousands separators in this shape; "1,2,3" is a list
+_GROUPED = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+_HAS_WORD = re.compile(r"[^\W_]")
+
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+         "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_SCALES = [(10 ** 12, "trillion"), (10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")]
+
+
+def number_to_words(n):
+    """Spell out a non-negative integer in English, e.g. 1205 -> "one thousand two hundred five" """
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        return _TENS[n // 10] + ("-" + _ONES[n % 10] if n % 10 else "")
+    if n < 1000:
+        return _ONES[n // 100] + " hundred" + (" " + number_to_words(n % 100) if n % 100 else "")
+    for value, name in _SCALES:
+        if n >= value:
+            head, rest = divmod(n, value)
+            return number_to_words(head) + " " + name + (" " + number_to_words(rest) if rest else "")
+    return str(n)
+
+
+def _spell_number(digits, percent):
+    whole, _, fraction = digits.replace(",", "").partition(".")
+    if len(whole) > 15:
+        return digits
+    words = number_to_words(int(whole))
+    if fraction:
+        words += " point " + " ".join(_ONES[int(d)] for d in fraction)
+    return words + (" percent" if percent else "")
+
+
+def _spell_match(match):
+    number = match.group(0)
+    start = match.start()
+    if number.count(".") > 1 or (start and match.string[start - 1] in "vV"):
+        return number  # a version or an address, e.g. v2, 2.0.1 or 192.168.0.1
+    percent = number.endswith("%")
+    number = number.rstrip("%")
+    if "," in number and not _GROUPED.fullmatch(number):
+        *items, last = number.split(",")
+        return ",".join([_spell_number(item, False) for item in items] + [_spell_number(last, percent)])
+    return _spell_number(number, percent)
+
+
+def _append(segments, script, piece):
+    """Add a piece to the segment list, merging it into its neighbour where the script doesn't change"""
+    if not piece:
+        return
+    if segments:
+        last_script, last = segments[-1]
+        if last_script == script or not _HAS_WORD.search(piece):
+            segments[-1] = (last_script, last + piece)
+            return
+        if not _HAS_WORD.search(last):
+            segments[-1] = (script, last + piece)
+            return
+    segments.append((script, piece))
+
+
+def segment_scripts(text):
+    """Normalize text for Piper in one pass and split it into Meitei and English runs
+
+    Markup, formatting and emoji are removed everywhere. Numbers are spelled out in
+    English runs only; digits inside a Meitei run are left for the Meitei voice.
+    Whitespace or punctuation alone between two runs stays with the run before it.
+
+    Returns:
+        List of (script, text) pairs, script being "meitei" or "latin"
+    """
+    segments = []
+    pieces = []
+    position = 0
+    for match in _PIPER_TOKENS.finditer(text or ""):
+        pieces.append(text[position:match.start()])
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "number":
+            pieces.append(_spell_match(match))
+        elif kind == "meitei":
+            _append(segments, "latin", "".join(pieces))
+            _append(segments, "meitei", match.group())
+            pieces = []
+    if text:
+        pieces.append(text[position:])
+    _append(segments, "latin", "".join(pieces))
+    return segments
+
+
+def _piper_token(match):
+    kind = match.lastgroup
+    if kind is None:
+        return ""  # markup, formatting or emoji
+    if kind == "number":
+        return _spell_match(match)
+    return match.group()  # a Meitei run, kept as is
+
+
+def normalize_for_piper(text):
+    """Prepare LLM output for Piper: strip markup and emoji, spell out numbers in English runs
+
+    Same result as joining segment_scripts(text), without building the segments.
+    """
+    if not text:
+        return ""
+    return _PIPER_TOKENS.sub(_piper_token, text).strip()
+
+
+def normalize_for_meitei_tts(text):
+    """Prepare text for the Meitei TTS API: strip markup, keep English, Meitei Mayek and .,?!"""
+    if not text:
+        return ""
+    return _MEITEI_TOKENS.sub("", text).strip()
@@ -1,14 +1,27 @@
+import io
 import os
+import wave
+import base64
 import logging
+import threading
+from contextlib import closing
 from flask import Flask, request, jsonify, Response, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from meitei_chat_system import MeiteiChatSystem
-import base64
+from session_store import SessionStore, cookie_session_id, http_session_key
 import sounddevice as sd
 from queue import Queue
 from TTS.piperTTS import PiperTTS
 from TTS.meitei_TTS import synthesize_meitei_speech, SAMPLE_RATE
+from TTS.audio_cache import get_default_cache as get_audio_cache, load_warmup_phrases
+from TTS.audio_stream import iter_wav_stream, iter_pcm_stream, iter_ogg_opus_stream, ogg_available
+from translator.enToMni import translate as en_to_mni
+from voice_pipeline import StreamingVoicePipeline
+from audio_transport import audio_payload_bytes, tts_audio_fields
+from streaming_asr import StreamingTranscriber, decode_pcm_frame
+from script_analysis import analyze_scripts
+from turn_executor import Turn
 
 # Configure logging
 logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,9 +34,38 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 chat_system = MeiteiChatSystem()
 chat_system.streaming = False  # Disable streaming for web interface
 
+# Per-user conversation histories (keyed by cookie for HTTP, socket sid for voice)
+session_store = SessionStore(chat_system.new_history)
+SESSION_COOKIE = 'session_id'
+
 # Initialize PiperTTS
 piper_tts = PiperTTS()
 
+def warm_tts_cache():
+    """Pre-render the configured phrases with both TTS engines so they are served from cache"""
+    cache = get_audio_cache()
+    if cache is None:
+        return
+    phrases = load_warmup_phrases()
+    cache.warmup(phrases, piper_tts.text_to_speech)
+    cache.warmup(phrases, synthesize_meitei_speech)
+
+if os.getenv("TTS_CACHE_WARMUP", "0") == "1":
+    threading.Thread(target=warm_tts_cache, name="tts-warmup", daemon=True).start()
+
+# Sentence-level voice pipeline (opt-in per request with `pipelined: true`)
+VOICE_PIPELINE_DEFAULT = os.getenv("VOICE_PIPELINE", "0") == "1"
+VOICE_PIPELINE_WORKERS = int(os.getenv("VOICE_PIPELINE_WORKERS", "2"))
+
+# Render English voice replies with Piper alongside Meitei TTS, used if the latter fails
+VOICE_PIPER_FALLBACK = os.getenv("VOICE_PIPER_FALLBACK", "0") == "1"
+
+# Chunked /tts/speak responses (opt-in per request with `stream: true` or ?stream=1)
+TTS_STREAM_DEFAULT = os.getenv("TTS_STREAM", "0") == "1"
+
+# Streaming ASR sessions (`audio_stream_start` / `audio_frame` / `audio_stream_end`), keyed by socket sid
+audio_streams = {}
+
 # Queue for transcribed text
 transcription_queue = Queue()
 
@@ -32,6 +74,138 @@ def web_transcription_callback(transcript):
     if transcript and transcript.strip():
         transcription_queue.put({'transcript': transcript.strip()})
 
+def session_chat(session_id, user_message):
+    """Run one chat turn against the caller's own history"""
+    session = session_store.get(session_id)
+    with session.lock:
+        response = chat_system.chat(user_message, session.messages)
+    session_store.touch(session)
+    return response
+
+def stream_voice_reply(session_id, transcript, audio_format=None):
+    """Stream the reply sentence by sentence, emitting each synthesized chunk as soon as it is ready"""
+    translate_back = chat_system.is_meitei_mayek(transcript)
+
+    def process_sentence(sentence):
+        text = en_to_mni(sentence) if translate_back else sentence
+        # Binary/Opus packing runs here too, so it overlaps with the LLM stream
+        return text or sentence, tts_audio_fields(synthesize_meitei_speech(text or sentence), audio_format)
+
+    pipeline = StreamingVoicePipeline(process_sentence, max_workers=VOICE_PIPELINE_WORKERS)
+    session = session_store.get(session_id)
+    spoken = []
+    errors = []
+    seq = 0
+    with session.lock:
+        # closing(): if an emit raises, the LLM stream is stopped and its history
+        # update is done here, before the session lock is released. With errors
+        # passed, an upstream apology is spoken but not kept as the assistant turn.
+        with closing(pipeline.run(chat_system.stream_chat(transcript, session.messages, errors))) as chunks:
+            for seq, sentence, (text, audio) in chunks:
+                spoken.append(text)
+                chunk = {
+                    'seq': seq,
+                    'text': text,
+                    **audio,
+                    'sample_rate': SAMPLE_RATE,
+                    'final': False
+                }
+                if not audio['audio_data']:
+                    chunk['error'] = 'Failed to generate TTS audio'
+                socketio.emit('tts_audio_chunk', chunk, to=session_id)
+                seq += 1
+    session_store.touch(session)
+    if errors:
+        logging.error(f"Pipelined reply failed upstream: {errors[0]}")
+    socketio.emit('tts_audio_chunk', {'seq': seq, 'audio_data': None, 'sample_rate': SAMPLE_RATE, 'final': True},
+                  to=session_id)
+    return " ".join(spoken)
+
+def piper_fallback_speech(text):
+    """Render text with Piper; returns (base64 WAV, sample rate) or None"""
+    buffer = piper_tts.text_to_speech(text)
+    if buffer is None:
+        return None
+    with wave.open(io.BytesIO(buffer.getvalue()), 'rb') as wav_file:
+        sample_rate = wav_file.getframerate()
+    return base64.b64encode(buffer.getvalue()).decode('ascii'), sample_rate
+
+def emit_tts_audio(turn, session_id, piper_fallback, audio_format=None):
+    """Send the Meitei TTS audio of a voice reply, or Piper's if Meitei TTS failed"""
+    try:
+        tts_audio = turn.result("meitei_tts")
+    except Exception as e:
+        logging.error(f"Meitei TTS failed: {e}")
+        tts_audio = None
+    sample_rate = SAMPLE_RATE
+    if not tts_audio and piper_fallback:
+        try:
+            fallback = turn.result("piper_tts")
+        except Exception as e:
+            logging.error(f"Piper fallback synthesis failed: {e}")
+            fallback = None
+        if fallback:
+            logging.warning("Meitei TTS failed; sending Piper audio instead")
+            tts_audio, sample_rate = fallback
+    if tts_audio:
+        logging.info("Sending TTS audio to client")
+        socketio.emit('tts_audio', {
+            **tts_audio_fields(tts_audio, audio_format),
+            'sample_rate': sample_rate
+        }, to=session_id)
+    else:
+        logging.error("Failed to generate TTS audio")
+        # Still emit an event so the frontend knows processing is complete
+        socketio.emit('tts_audio', {
+            'audio_data': None,
+            'sample_rate': SAMPLE_RATE,
+            'error': 'Failed to generate TTS audio'
+        }, to=session_id)
+
+def reply_to_transcript(session_id, transcript, pipelined, audio_format=None):
+    """Run the chat turn for a transcript and send the reply text and speech to the socket
+
+    audio_format picks how TTS audio is sent: "base64" (JSON string), "wav" or "opus" (binary frames).
+    """
+    if transcript and transcript.strip() and pipelined:
+        # Pipelined mode: audio chunks are emitted per sentence while the LLM is still streaming
+        ai_response = stream_voice_reply(session_id, transcript, audio_format)
+        logging.info(f"AI Response (pipelined): {ai_response}")
+        socketio.emit('transcript', {
+            'transcript': transcript,
+            'response': ai_response
+        }, to=session_id)
+    elif transcript and transcript.strip():
+        # Get AI response using existing chat system
+        ai_response = session_chat(session_id, transcript)
+
+        # Showing the text, logging and synthesis are independent, so they run side by side
+        turn = Turn("voice_reply")
+        turn.stage("log", logging.info, f"AI Response: {ai_response}")
+        turn.stage("emit_transcript", socketio.emit, 'transcript', {
+            'transcript': transcript,
+            'response': ai_response
+        }, to=session_id)
+        turn.stage("meitei_tts", synthesize_meitei_speech, ai_response)
+        piper_fallback = VOICE_PIPER_FALLBACK and not analyze_scripts(ai_response).meitei_chars
+        if piper_fallback:
+            # Piper only speaks English, so it can stand in for English replies only
+            turn.stage("piper_tts", piper_fallback_speech, ai_response)
+        # After the transcript, so the client sees the text first; always runs, so the
+        # client gets the audio or an error event even if a synthesis stage raised
+        audio_deps = ("emit_transcript", "meitei_tts") + (("piper_tts",) if piper_fallback else ())
+        turn.stage("emit_audio", emit_tts_audio, turn, session_id, piper_fallback, audio_format,
+                   after=audio_deps, always=True)
+        turn.run()
+        for stage, error in turn.errors().items():
+            logging.error(f"Voice reply stage {stage} failed: {error}")
+        logging.info(f"Voice reply timeline: {turn.summary()}")
+    else:
+        logging.info("No transcript generated")
+        socketio.emit('transcript', {
+            'transcript': '',
+            'response': ''
+        }, to=session_id)
 
 
 @app.route('/')
@@ -51,10 +225,11 @@ def chat():
     try:
         data = request.json
         user_message = data.get('message', '')
+        session_id, new_session = cookie_session_id(request.cookies.get(SESSION_COOKIE))
         logging.info(f"Received message: {user_message}")
         
         # Get response from chat system
-        response = chat_system.chat(user_message)
+        response = session_chat(http_session_key(session_id), user_message)
         logging.info(f"Sending response: {response}")
         
         # Clean up any translation markers or system messages
@@ -62,10 +237,13 @@ def chat():
         if '[Translation failed]' in response:
             cleaned_response = response.replace('[Translation failed]', '').strip()
         
-        return jsonify({
+        result = jsonify({
             'response': cleaned_response,
             'status': 'success'
         })
+        if new_session:
+            result.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        return result
     except Exception as e:
         logging.error(f"Error in /chat endpoint: {e}")
         return jsonify({
@@ -88,6 +266,35 @@ def transcribe():
         logging.error(f"Error in /transcribe endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+def stream_tts_response(text, audio_format):
+    """Chunked /tts/speak: audio is sent sentence by sentence while Piper is still rendering"""
+    if audio_format == 'ogg' and not ogg_available():
+        logging.warning("ffmpeg not found; streaming WAV instead of Ogg/Opus")
+        audio_format = 'wav'
+    chunks = piper_tts.iter_synthesize(text)
+    # Render the first sentence up front: it gives the sample rate and surfaces load errors as a 500
+    try:
+        first, sample_rate = next(chunks)
+    except StopIteration:
+        return jsonify({'error': 'Failed to generate speech'}), 500
+
+    def samples():
+        yield first
+        try:
+            for chunk, _ in chunks:
+                yield chunk
+        except Exception as e:
+            logging.error(f"Error while streaming TTS audio: {e}")
+
+    if audio_format == 'ogg':
+        body, mimetype = iter_ogg_opus_stream(samples(), sample_rate), 'audio/ogg'
+    elif audio_format == 'pcm':
+        body, mimetype = iter_pcm_stream(samples()), f'audio/L16; rate={sample_rate}; channels=1'
+    else:
+        body, mimetype = iter_wav_stream(samples(), sample_rate), 'audio/wav'
+    logging.info(f"Streaming TTS audio as {audio_format}")
+    return Response(body, mimetype=mimetype, headers={'X-Sample-Rate': str(sample_rate)})
+
 @app.route('/tts/speak', methods=['POST'])
 def tts_speak():
     try:
@@ -98,6 +305,9 @@ def tts_speak():
             logging.warning("No text provided in /tts/speak")
             return jsonify({'error': 'No text provided'}), 400
 
+        if data.get('stream', request.args.get('stream') == '1' or TTS_STREAM_DEFAULT):
+            return stream_tts_response(text, data.get('format', request.args.get('format', 'wav')))
+
         audio_buffer = piper_tts.text_to_speech(text)
         if audio_buffer:
             logging.info("Successfully generated audio buffer.")
@@ -118,6 +328,8 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     logging.info("Client disconnected from voice chat")
+    audio_streams.pop(request.sid, None)
+    session_store.discard(request.sid)
 
 @socketio.on('voice_data')
 def handle_voice_data(data):
@@ -131,51 +343,75 @@ def handle_voice_data(data):
             emit('error', {'message': 'No audio data received'})
             return
         
-        # Convert base64 audio data to bytes
-        audio_bytes = base64.b64decode(audio_data)
+        # Binary frames arrive as bytes; older clients send a base64 string
+        audio_bytes = audio_payload_bytes(audio_data)
         
         # Transcribe using existing ASR
         transcript = chat_system.transcribe_audio_data(audio_bytes)
         logging.info(f"Transcription result: '{transcript}'")
         
-        if transcript and transcript.strip():
-            # Get AI response using existing chat system
-            ai_response = chat_system.chat(transcript)
-            logging.info(f"AI Response: {ai_response}")
-            
-            # Send transcript and response back to client
-            emit('transcript', {
-                'transcript': transcript,
-                'response': ai_response
-            })
-            
-            # Generate TTS audio using Meitei TTS
-            tts_audio = synthesize_meitei_speech(ai_response)
-            if tts_audio:
-                logging.info("Sending TTS audio to client")
-                emit('tts_audio', {
-                    'audio_data': tts_audio,
-                    'sample_rate': SAMPLE_RATE
-                })
-            else:
-                logging.error("Failed to generate TTS audio")
-                # Still emit an event so the frontend knows processing is complete
-                emit('tts_audio', {
-                    'audio_data': None,
-                    'sample_rate': SAMPLE_RATE,
-                    'error': 'Failed to generate TTS audio'
-                })
-        else:
-            logging.info("No transcript generated")
-            emit('transcript', {
-                'transcript': '',
-                'response': ''
-            })
+        reply_to_transcript(request.sid, transcript, data.get('pipelined', VOICE_PIPELINE_DEFAULT),
+                            data.get('audio_format'))
             
     except Exception as e:
         logging.error(f"Error processing voice data: {e}")
         emit('error', {'message': f'Error processing voice: {str(e)}'})
 
+@socketio.on('audio_stream_start')
+def handle_audio_stream_start(data=None):
+    """Begin streaming ASR: the client will send small PCM frames as `audio_frame` events"""
+    data = data or {}
+    if not chat_system.asr_sample_rate:
+        emit('error', {'message': 'ASR model not loaded. Cannot transcribe audio.'})
+        return
+    sid = request.sid
+    pipelined = data.get('pipelined', VOICE_PIPELINE_DEFAULT)
+    audio_format = data.get('audio_format')
+
+    def on_partial(text):
+        socketio.emit('partial_transcript', {'transcript': text, 'final': False}, to=sid)
+
+    def on_final(text):
+        logging.info(f"Streaming transcription result: '{text}'")
+        socketio.emit('partial_transcript', {'transcript': text, 'final': True}, to=sid)
+        socketio.start_background_task(reply_in_background, text)
+
+    def reply_in_background(text):
+        try:
+            reply_to_transcript(sid, text, pipelined, audio_format)
+        except Exception as e:
+            logging.error(f"Error replying to streamed transcript: {e}")
+            socketio.emit('error', {'message': f'Error processing voice: {str(e)}'}, to=sid)
+
+    audio_streams[sid] = {
+        'transcriber': StreamingTranscriber(chat_system.transcribe_samples, chat_system.asr_sample_rate,
+                                            on_partial, on_final, input_rate=data.get('sample_rate', 48000)),
+        'encoding': data.get('encoding', 's16le'),
+    }
+    emit('audio_stream_started', {'status': 'Streaming ASR started'})
+
+@socketio.on('audio_frame')
+def handle_audio_frame(data):
+    """Feed one PCM frame (raw bytes or base64, s16le by default) to the caller's stream"""
+    stream = audio_streams.get(request.sid)
+    if stream is None:
+        emit('error', {'message': 'No audio stream started'})
+        return
+    try:
+        payload = data.get('pcm') if isinstance(data, dict) else data
+        stream['transcriber'].feed(decode_pcm_frame(payload, stream['encoding']))
+    except Exception as e:
+        logging.error(f"Error processing audio frame: {e}")
+        emit('error', {'message': f'Error processing audio frame: {str(e)}'})
+
+@socketio.on('audio_stream_end')
+def handle_audio_stream_end():
+    """Client stopped sending audio: finalize any utterance still in progress"""
+    stream = audio_streams.pop(request.sid, None)
+    if stream is not None:
+        stream['transcriber'].finish()
+    emit('audio_stream_stopped', {'status': 'Streaming ASR stopped'})
+
 @socketio.on('start_voice_chat')
 def handle_start_voice_chat():
     """Handle start of voice chat session"""
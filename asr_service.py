@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import queue
+import logging
+import importlib
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "0"))
+ASR_MAX_BATCH = int(os.getenv("ASR_MAX_BATCH", "8"))
+ASR_MAX_WAIT_MS = float(os.getenv("ASR_MAX_WAIT_MS", "30"))
+DEFAULT_MODEL = "N7Speech.manipur_asr.realtime_speech:RealTimeSpeech"
+# Forking a process that already runs threads can deadlock the child, so workers come
+# from a clean forkserver; see _without_main_script for why app.py is not re-run in them
+ASR_START_METHOD = os.getenv("ASR_START_METHOD",
+                             "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+# Set in each worker process by _init_worker
+_recognizer = None
+
+
+def _init_worker(model_path, model_kwargs):
+    """Load one recognizer per worker process"""
+    global _recognizer
+    module_name, class_name = model_path.split(":")
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    _recognizer = model_class(**model_kwargs)
+
+
+def _worker_info():
+    """(sample_rate, whether the model has a batched forward pass)"""
+    return _recognizer.sample_rate, hasattr(_recognizer.recognizer, "transcribe_batch")
+
+
+@contextmanager
+def _without_main_script():
+    """Hide the launching script while worker processes start
+
+    spawn and forkserver children re-run the parent's main script before doing
+    anything else, and app.py builds the whole app (models, chat system, this
+    service) at import time. With __file__ and __spec__ hidden, workers only
+    import this module and the recognizer.
+    """
+    main = sys.modules["__main__"]
+    saved = {name: main.__dict__[name] for name in ("__file__", "__spec__") if name in main.__dict__}
+    main.__spec__ = None
+    main.__dict__.pop("__file__", None)
+    try:
+        yield
+    finally:
+        main.__dict__.pop("__spec__", None)
+        main.__dict__.update(saved)
+
+
+def _transcribe_batch(padded, lengths):
+    """Transcribe a zero-padded (batch, max_len) block; returns one text per row"""
+    model = _recognizer.recognizer
+    if hasattr(model, "transcribe_batch"):
+        return list(model.transcribe_batch(padded, lengths))
+    # Models without a batched forward pass still get one IPC round trip per batch
+    return [model.transcribe(padded[i, :length]) for i, length in enumerate(lengths)]
+
+
+class _Request:
+    __slots__ = ("samples", "future", "enqueued")
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class ASRService:
+    """Pool of ASR worker processes fed by a micro-batching dispatcher
+
+    Requests that arrive within max_wait_ms of each other (up to max_batch_size)
+    are padded into one array and sent to whichever worker is free. While every
+    worker is busy, new requests keep queueing and form the next, larger batch.
+    Batching only pays off with a batched forward pass; for models without one
+    each request goes to its own worker (max_batch_size 1).
+    """
+
+    def __init__(self, num_workers=None, max_batch_size=None, max_wait_ms=None,
+                 model_path=DEFAULT_MODEL, model_kwargs=None):
+        """
+        Args:
+            num_workers: Worker processes, each holding one loaded model
+            max_batch_size: Most requests sent to a worker at once (1 if the model cannot batch)
+            max_wait_ms: How long the first request of a batch waits for company
+            model_path: "module:Class" of the recognizer wrapper to load in each worker
+            model_kwargs: Keyword arguments for the recognizer wrapper
+        """
+        self.num_workers = num_workers or max(ASR_WORKERS, 1)
+        self.max_batch_size = max_batch_size or ASR_MAX_BATCH
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else ASR_MAX_WAIT_MS) / 1000.0
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context(ASR_START_METHOD),
+            initializer=_init_worker,
+            initargs=(model_path, model_kwargs if model_kwargs is not None else {"lang": "mni"}),
+        )
+        # Start every worker now, from this thread, rather than on demand later
+        with _without_main_script():
+            infos = [self._executor.submit(_worker_info) for _ in range(self.num_workers)]
+            self.sample_rate, self.batched = infos[0].result()
+            for info in infos[1:]:
+                info.result()
+        if not self.batched:
+            # One clip per worker: a sequential "batch" would leave the other workers idle
+            self.max_batch_size = 1
+        self._queue = queue.Queue()
+        self._free_workers = threading.Semaphore(self.num_workers)
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self._batch_sizes = deque(maxlen=500)
+        self.requests = 0
+        self.batches = 0
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, name="asr-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, samples):
+        """Queue mono float32 samples at sample_rate; returns a Future for the text"""
+        if self._closed:
+            raise RuntimeError("ASR service is shut down")
+        request = _Request(np.asarray(samples, dtype=np.float32))
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, samples, timeout=None):
+        """Blocking wrapper around submit()"""
+        return self.submit(samples).result(timeout=timeout)
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Anything already queued joins immediately, even past the deadline
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _dispatch(self):
+        while True:
+            # Only form a batch once a worker can take it, so backlog turns into bigger batches
+            self._free_workers.acquire()
+            batch = self._collect_batch()
+            if batch is None:
+                self._free_workers.release()
+                return
+            lengths = [len(request.samples) for request in batch]
+            padded = np.zeros((len(batch), max(lengths)), dtype=np.float32)
+            for i, request in enumerate(batch):
+                padded[i, :lengths[i]] = request.samples
+            with self._stats_lock:
+                self.batches += 1
+                self._batch_sizes.append(len(batch))
+            try:
+                future = self._executor.submit(_transcribe_batch, padded, lengths)
+            except Exception as e:
+                self._free_workers.release()
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            future.add_done_callback(lambda done, batch=batch: self._complete(batch, done))
+
+    def _complete(self, batch, done):
+        self._free_workers.release()
+        now = time.perf_counter()
+        error = done.exception()
+        if error is not None:
+            logging.error(f"ASR batch of {len(batch)} failed: {error}")
+        texts = None if error is not None else done.result()
+        with self._stats_lock:
+            for request in batch:
+                self.requests += 1
+                self._latencies.append(now - request.enqueued)
+        for i, request in enumerate(batch):
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(texts[i])
+
+    def stats(self):
+        """Queue depth, batch sizes and per-request latency (seconds, enqueue to result)"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            sizes = list(self._batch_sizes)
+            requests = self.requests
+            batches = self.batches
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)] if latencies else None
+
+        return {
+            "workers": self.num_workers,
+            "queue_depth": self._queue.qsize(),
+            "requests": requests,
+            "batches": batches,
+            "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_batch_size": max(sizes) if sizes else 0,
+            "latency_p50": percentile(50),
+            "latency_p95": percentile(95),
+        }
+
+    def shutdown(self):
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join(timeout=5)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,409 @@
+"""Asyncio serving mode: the routes and socket events of app.py on aiohttp + python-socketio
+
+Outbound calls to Groq, Google Translate and the Meitei TTS host go through one
+shared aiohttp pool; ASR and Piper run on a bounded thread pool, and translation
+and audio cache I/O on the loop's default executor.
+
+Differences from app.py: `pipelined` is ignored (the reply is sent as one
+`transcript` event followed by one `tts_audio` event, not sentence by sentence),
+and VOICE_PIPER_FALLBACK is not used.
+
+Run with: python async_app.py
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import socketio
+from aiohttp import web
+from meitei_chat_system import MeiteiChatSystem
+from session_store import SessionStore, cookie_session_id, http_session_key
+from script_analysis import analyze_scripts
+from audio_transport import audio_payload_bytes, tts_audio_fields
+from streaming_asr import StreamingTranscriber, decode_pcm_frame
+from async_upstreams import AsyncUpstreams, CONNECTION_ERROR_MESSAGE, TIMEOUT_MESSAGE
+from TTS.piperTTS import PiperTTS
+from TTS.meitei_TTS import SAMPLE_RATE
+from TTS.audio_stream import iter_wav_stream, iter_pcm_stream, iter_ogg_opus_stream, ogg_available
+
+# Configure logging
+logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend', 'dist')
+SESSION_COOKIE = 'session_id'
+
+# Concurrency limits for CPU-bound work (ASR, Piper) and in-flight conversations
+CPU_WORKERS = int(os.getenv("ASYNC_CPU_WORKERS", str(os.cpu_count() or 4)))
+MAX_INFLIGHT_TURNS = int(os.getenv("ASYNC_MAX_INFLIGHT_TURNS", "500"))
+# chat_completion answers with these instead of raising; they must not be cached as replies
+UPSTREAM_ERROR_REPLIES = (CONNECTION_ERROR_MESSAGE, TIMEOUT_MESSAGE)
+# Chunked /tts/speak responses (opt-in per request with `stream: true` or ?stream=1)
+TTS_STREAM_DEFAULT = os.getenv("TTS_STREAM", "0") == "1"
+
+sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+app = web.Application()
+sio.attach(app)
+
+# Chat system provides the ASR model, prompt and history windowing; HTTP goes through upstreams
+chat_system = MeiteiChatSystem()
+chat_system.streaming = False
+session_store = SessionStore(chat_system.new_history)
+upstreams = AsyncUpstreams(model=chat_system.model)
+piper_tts = PiperTTS()
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+turn_slots = asyncio.Semaphore(MAX_INFLIGHT_TURNS)
+# Streaming ASR sessions (`audio_stream_start` / `audio_frame` / `audio_stream_end`), keyed by socket sid
+audio_streams = {}
+
+
+async def run_cpu(func, *args):
+    """Run blocking CPU-bound work on the shared worker pool"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, func, *args)
+
+
+async def translate_input(analysis):
+    """Async equivalent of MeiteiChatSystem.translate_input: Meitei spans only for mixed input"""
+    if not analysis.is_mixed:
+        return await upstreams.mni_to_en(analysis.text)
+    pieces = analysis.meitei_texts()
+    return analysis.replace_meitei(await asyncio.gather(*(upstreams.mni_to_en(piece) for piece in pieces)))
+
+
+async def chat_turn(session_id, user_input):
+    """Async equivalent of MeiteiChatSystem.chat against the caller's own history"""
+    session = session_store.get(session_id)
+    if session.async_lock is None:
+        session.async_lock = asyncio.Lock()
+
+    async with turn_slots, session.async_lock:
+        cached = chat_system.cached_reply(user_input, session.messages)
+        if cached is not None:
+            session_store.touch(session)
+            return cached
+
+        turn_start = len(session.messages)
+        analysis = analyze_scripts(user_input)
+        is_meitei_input = analysis.is_meitei
+        if analysis.meitei_chars:
+            translated_input = await translate_input(analysis)
+            if is_meitei_input:
+                chat_system.add_message("user", chat_system.format_user_turn(user_input, translated_input), session.messages)
+            else:
+                chat_system.add_message("user", translated_input or user_input, session.messages)
+        else:
+            chat_system.add_message("user", user_input, session.messages)
+
+        response = await upstreams.chat_completion(chat_system.history.build(session.messages))
+        # Like the sync path, an upstream apology or error is returned but not kept as the assistant turn
+        answered = response not in UPSTREAM_ERROR_REPLIES and not response.startswith("Error:")
+        if answered:
+            chat_system.add_message("assistant", response, session.messages)
+
+        if is_meitei_input:
+            response = chat_system.format_meitei_reply(response, await upstreams.en_to_mni(response))
+        if answered:
+            chat_system.remember_reply(user_input, session.messages, turn_start, response)
+    session_store.touch(session)
+    return response
+
+
+async def index(request):
+    return web.FileResponse(os.path.join(STATIC_FOLDER, 'index.html'))
+
+
+async def serve_static_assets(request):
+    path = request.match_info['path']
+    full_path = os.path.normpath(os.path.join(STATIC_FOLDER, path))
+    if path != "" and full_path.startswith(STATIC_FOLDER) and os.path.isfile(full_path):
+        return web.FileResponse(full_path)
+    return web.FileResponse(os.path.join(STATIC_FOLDER, 'index.html'))
+
+
+async def chat(request):
+    try:
+        data = await request.json()
+        user_message = data.get('message', '')
+        session_id, new_session = cookie_session_id(request.cookies.get(SESSION_COOKIE))
+        logging.info(f"Received message: {user_message}")
+
+        response = await chat_turn(http_session_key(session_id), user_message)
+        logging.info(f"Sending response: {response}")
+
+        # Clean up any translation markers or system messages
+        cleaned_response = response
+        if '[Translation failed]' in response:
+            cleaned_response = response.replace('[Translation failed]', '').strip()
+
+        result = web.json_response({
+            'response': cleaned_response,
+            'status': 'success'
+        })
+        if new_session:
+            result.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        return result
+    except Exception as e:
+        logging.error(f"Error in /chat endpoint: {e}")
+        return web.json_response({
+            'error': str(e),
+            'response': 'Sorry, there was an error processing your message.'
+        }, status=500)
+
+
+async def transcribe(request):
+    try:
+        audio_data = await request.read()
+        if not audio_data:
+            logging.warning("No audio data received in /transcribe")
+            return web.json_response({'error': 'No audio data received'}, status=400)
+
+        transcript = await run_cpu(chat_system.transcribe_audio_data, audio_data)
+        logging.info(f"Transcription result: {transcript}")
+        return web.json_response({'transcript': transcript})
+    except Exception as e:
+        logging.error(f"Error in /transcribe endpoint: {e}")
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def stream_tts_response(request, text, audio_format):
+    """Chunked /tts/speak: audio is sent sentence by sentence while Piper is still rendering"""
+    if audio_format == 'ogg' and not ogg_available():
+        logging.warning("ffmpeg not found; streaming WAV instead of Ogg/Opus")
+        audio_format = 'wav'
+    chunks = piper_tts.iter_synthesize(text)
+    # Render the first sentence up front: it gives the sample rate and surfaces load errors as a 500
+    first = await run_cpu(next, chunks, None)
+    if first is None:
+        return web.json_response({'error': 'Failed to generate speech'}, status=500)
+    first, sample_rate = first
+
+    def samples():
+        yield first
+        try:
+            for chunk, _ in chunks:
+                yield chunk
+        except Exception as e:
+            logging.error(f"Error while streaming TTS audio: {e}")
+
+    if audio_format == 'ogg':
+        body, content_type = iter_ogg_opus_stream(samples(), sample_rate), 'audio/ogg'
+    elif audio_format == 'pcm':
+        body, content_type = iter_pcm_stream(samples()), f'audio/L16; rate={sample_rate}; channels=1'
+    else:
+        body, content_type = iter_wav_stream(samples(), sample_rate), 'audio/wav'
+    logging.info(f"Streaming TTS audio as {audio_format}")
+
+    response = web.StreamResponse(headers={'Content-Type': content_type, 'X-Sample-Rate': str(sample_rate)})
+    await response.prepare(request)
+    try:
+        # Piper rendering and the ffmpeg encoder block, so each chunk is pulled on the worker pool
+        while True:
+            chunk = await run_cpu(next, body, None)
+            if chunk is None:
+                break
+            await response.write(chunk)
+    finally:
+        await run_cpu(body.close)
+    await response.write_eof()
+    return response
+
+
+async def tts_speak(request):
+    try:
+        data = await request.json()
+        text = data.get('text', '')
+        logging.info(f"TTS request for text: {text[:50]}...")
+        if not text:
+            logging.warning("No text provided in /tts/speak")
+            return web.json_response({'error': 'No text provided'}, status=400)
+
+        if data.get('stream', request.query.get('stream') == '1' or TTS_STREAM_DEFAULT):
+            return await stream_tts_response(request, text, data.get('format', request.query.get('format', 'wav')))
+
+        audio_buffer = await run_cpu(piper_tts.text_to_speech, text)
+        if audio_buffer:
+            logging.info("Successfully generated audio buffer.")
+            return web.Response(body=audio_buffer.getbuffer(), content_type='audio/wav')
+        logging.error("Failed to generate audio buffer.")
+        return web.json_response({'error': 'Failed to generate speech'}, status=500)
+    except Exception as e:
+        logging.error(f"Error in /tts/speak endpoint: {e}")
+        return web.json_response({'error': str(e)}, status=500)
+
+
+# --- WebSocket Events for Real-time Voice Chat ---
+@sio.event
+async def connect(sid, environ):
+    logging.info("Client connected to voice chat")
+    await sio.emit('connected', {'status': 'Connected to voice chat'}, to=sid)
+
+
+@sio.event
+async def disconnect(sid):
+    logging.info("Client disconnected from voice chat")
+    audio_streams.pop(sid, None)
+    session_store.discard(sid)
+
+
+async def reply_to_transcript(sid, transcript, audio_format=None):
+    """Answer a transcript: emit the text reply, then the Meitei TTS audio"""
+    if not transcript or not transcript.strip():
+        logging.info("No transcript generated")
+        await sio.emit('transcript', {'transcript': '', 'response': ''}, to=sid)
+        return
+
+    ai_response = await chat_turn(sid, transcript)
+    logging.info(f"AI Response: {ai_response}")
+
+    await sio.emit('transcript', {
+        'transcript': transcript,
+        'response': ai_response
+    }, to=sid)
+
+    tts_audio = await upstreams.meitei_tts(ai_response)
+    if tts_audio:
+        logging.info("Sending TTS audio to client")
+        # Opus encoding shells out to ffmpeg, so it runs off the event loop
+        audio = await run_cpu(tts_audio_fields, tts_audio, audio_format)
+        await sio.emit('tts_audio', {
+            **audio,
+            'sample_rate': SAMPLE_RATE
+        }, to=sid)
+    else:
+        logging.error("Failed to generate TTS audio")
+        await sio.emit('tts_audio', {
+            'audio_data': None,
+            'sample_rate': SAMPLE_RATE,
+            'error': 'Failed to generate TTS audio'
+        }, to=sid)
+
+
+@sio.on('voice_data')
+async def handle_voice_data(sid, data):
+    """Handle real-time voice data from client"""
+    try:
+        logging.info("Received voice data from client")
+        audio_data = data.get('audio_data')
+        if not audio_data:
+            logging.warning("No audio data received in voice_data")
+            await sio.emit('error', {'message': 'No audio data received'}, to=sid)
+            return
+
+        # Binary frames arrive as bytes; older clients send a base64 string
+        audio_bytes = audio_payload_bytes(audio_data)
+        transcript = await run_cpu(chat_system.transcribe_audio_data, audio_bytes)
+        logging.info(f"Transcription result: '{transcript}'")
+
+        await reply_to_transcript(sid, transcript, data.get('audio_format'))
+
+    except Exception as e:
+        logging.error(f"Error processing voice data: {e}")
+        await sio.emit('error', {'message': f'Error processing voice: {str(e)}'}, to=sid)
+
+
+@sio.on('audio_stream_start')
+async def handle_audio_stream_start(sid, data=None):
+    """Begin streaming ASR: the client will send small PCM frames as `audio_frame` events"""
+    data = data or {}
+    if not chat_system.asr_sample_rate:
+        await sio.emit('error', {'message': 'ASR model not loaded. Cannot transcribe audio.'}, to=sid)
+        return
+    loop = asyncio.get_running_loop()
+    audio_format = data.get('audio_format')
+
+    # The transcriber calls back from its worker threads; events are handed to the loop
+    def on_partial(text):
+        asyncio.run_coroutine_threadsafe(
+            sio.emit('partial_transcript', {'transcript': text, 'final': False}, to=sid), loop)
+
+    def on_final(text):
+        logging.info(f"Streaming transcription result: '{text}'")
+        asyncio.run_coroutine_threadsafe(reply_to_final(text), loop)
+
+    async def reply_to_final(text):
+        await sio.emit('partial_transcript', {'transcript': text, 'final': True}, to=sid)
+        try:
+            await reply_to_transcript(sid, text, audio_format)
+        except Exception as e:
+            logging.error(f"Error replying to streamed transcript: {e}")
+            await sio.emit('error', {'message': f'Error processing voice: {str(e)}'}, to=sid)
+
+    audio_streams[sid] = {
+        'transcriber': StreamingTranscriber(chat_system.transcribe_samples, chat_system.asr_sample_rate,
+                                            on_partial, on_final, input_rate=data.get('sample_rate', 48000)),
+        'encoding': data.get('encoding', 's16le'),
+    }
+    await sio.emit('audio_stream_started', {'status': 'Streaming ASR started'}, to=sid)
+
+
+@sio.on('audio_frame')
+async def handle_audio_frame(sid, data):
+    """Feed one PCM frame (raw bytes or base64, s16le by default) to the caller's stream"""
+    stream = audio_streams.get(sid)
+    if stream is None:
+        await sio.emit('error', {'message': 'No audio stream started'}, to=sid)
+        return
+    try:
+        payload = data.get('pcm') if isinstance(data, dict) else data
+        # Fed inline, not on the pool: one frame is cheap to resample, and frames stay in order
+        stream['transcriber'].feed(decode_pcm_frame(payload, stream['encoding']))
+    except Exception as e:
+        logging.error(f"Error processing audio frame: {e}")
+        await sio.emit('error', {'message': f'Error processing audio frame: {str(e)}'}, to=sid)
+
+
+@sio.on('audio_stream_end')
+async def handle_audio_stream_end(sid):
+    """Client stopped sending audio: finalize any utterance still in progress"""
+    stream = audio_streams.pop(sid, None)
+    if stream is not None:
+        stream['transcriber'].finish()
+    await sio.emit('audio_stream_stopped', {'status': 'Streaming ASR stopped'}, to=sid)
+
+
+@sio.on('start_voice_chat')
+async def handle_start_voice_chat(sid):
+    """Handle start of voice chat session"""
+    logging.info("Voice chat session started")
+    await sio.emit('voice_chat_started', {'status': 'Voice chat session started'}, to=sid)
+
+
+@sio.on('stop_voice_chat')
+async def handle_stop_voice_chat(sid):
+    """Handle stop of voice chat session"""
+    logging.info("Voice chat session stopped")
+    await sio.emit('voice_chat_stopped', {'status': 'Voice chat session stopped'}, to=sid)
+
+
+async def on_startup(app):
+    await upstreams.start()
+
+
+async def on_cleanup(app):
+    await upstreams.close()
+    cpu_pool.shutdown(wait=False)
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.path.startswith('/socket.io'):
+        return await handler(request)
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+app.middlewares.append(cors_middleware)
+app.on_startup.append(on_startup)
+app.on_cleanup.append(on_cleanup)
+app.router.add_post('/chat', chat)
+app.router.add_post('/transcribe', transcribe)
+app.router.add_post('/tts/speak', tts_speak)
+app.router.add_get('/', index)
+app.router.add_get('/{path:.*}', serve_static_assets)
+
+if __name__ == '__main__':
+    web.run_app(app, port=int(os.getenv("PORT", "8000")))
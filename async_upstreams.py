@@ -0,0 +1,187 @@
+import os
+import time
+import asyncio
+import logging
+import aiohttp
+from translator import enToMni, mniToEn
+from translator.cache import get_default_cache
+from TTS.audio_cache import get_default_cache as get_audio_cache
+from translator.backends import ARGOS_TRANSLATE_URL, USER_AGENT
+from circuit_breaker import get_breaker, CircuitOpenError
+from generative.backends import get_backend
+from TTS.meitei_TTS import TTS_API_URL, DEFAULT_DESCRIPTION, clean_tts_text, extract_tts_audio
+
+CONNECTION_ERROR_MESSAGE = "I'm sorry, I'm having trouble connecting to my knowledge service right now. This could be due to network issues or service unavailability. Please try again later or check your internet connection."
+TIMEOUT_MESSAGE = "I'm sorry, the request timed out. This could be due to network issues or high server load. Please try again later."
+
+
+class AsyncUpstreams:
+    """Shared aiohttp connection pool with per-upstream concurrency limits"""
+
+    def __init__(self, api_key=None, model=None, max_connections=None, max_per_host=None, limits=None):
+        """
+        Initialize the upstream clients
+
+        Args:
+            api_key: The API key for the LLM service (Groq)
+            model: The model to use for chat
+            max_connections: Total pooled connections across all hosts
+            max_per_host: Pooled connections per host
+            limits: Dict of in-flight request limits for "groq", "translate" and "tts"
+        """
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        # URL, headers and breaker name of the LLM_BACKEND endpoint (requests go through this pool)
+        self.backend = get_backend(api_key=api_key)
+        self.model = model or "openai/gpt-oss-120b"
+        self.max_connections = max_connections or int(os.getenv("ASYNC_MAX_CONNECTIONS", "200"))
+        self.max_per_host = max_per_host or int(os.getenv("ASYNC_MAX_PER_HOST", "64"))
+
+        limits = limits or {}
+        self.semaphores = {
+            name: asyncio.Semaphore(limits.get(name) or int(os.getenv(f"ASYNC_LIMIT_{name.upper()}", default)))
+            for name, default in (("groq", "64"), ("translate", "64"), ("tts", "8"))
+        }
+        self.session = None
+
+    async def start(self):
+        """Create the shared client session (must run inside the event loop)"""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+
+    async def close(self):
+        """Close the shared client session"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _guarded(self, name, request):
+        """Await request() through the upstream's circuit breaker (5xx/429/network errors are failures)"""
+        breaker = get_breaker(name)
+        ticket = breaker.allow()
+        if not ticket:
+            raise CircuitOpenError(f"{name} circuit is open")
+        start = time.monotonic()
+        success = False
+        try:
+            result = await request()
+            success = True
+            return result
+        except aiohttp.ClientResponseError as e:
+            success = e.status < 500 and e.status != 429
+            raise
+        finally:
+            # Also on cancellation (a BaseException), so a half-open trial is always released
+            breaker.record(success, time.monotonic() - start, ticket)
+
+    @staticmethod
+    async def _blocking(func, *args):
+        """Run blocking cache I/O (SQLite, audio files) on the loop's default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _post_json(self, url, timeout, **kwargs):
+        async with self.session.post(url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def _get_json(self, url, timeout, **kwargs):
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def chat_completion(self, messages, timeout=30):
+        """Get a (non-streaming) chat completion from the API"""
+        backend = self.backend
+        payload = backend.payload(messages, self.model)
+        try:
+            async with self.semaphores["groq"]:
+                data = await self._guarded(backend.name, lambda: self._post_json(
+                    backend.api_url, timeout, headers=backend.headers, json=payload))
+            return data["choices"][0]["message"]["content"]
+        except (aiohttp.ClientConnectionError, CircuitOpenError) as e:
+            logging.error(f"Error getting chat completion: Connection error: {e}")
+            return CONNECTION_ERROR_MESSAGE
+        except asyncio.TimeoutError as e:
+            logging.error(f"Error getting chat completion: Request timed out: {e}")
+            return TIMEOUT_MESSAGE
+        except Exception as e:
+            logging.error(f"Error getting chat completion: {e}")
+            return f"Error: {str(e)}"
+
+    async def translate(self, text, module=enToMni, timeout=10):
+        """Translate text with the language pair of a translator module (enToMni or mniToEn)"""
+        if not text or not text.strip():
+            return ""
+        cache = await self._blocking(get_default_cache)
+        cached = await self._blocking(cache.get, text, module.SOURCE_LANG, module.TARGET_LANG)
+        if cached is not None:
+            return cached
+        result = await self._translate_upstream(text, module, timeout)
+        if result and len(result.strip()) >= 3:
+            await self._blocking(cache.put, text, module.SOURCE_LANG, module.TARGET_LANG, result)
+        return result
+
+    async def _translate_upstream(self, text, module, timeout):
+        params = {"sl": module.SOURCE_LANG, "tl": module.TARGET_LANG, "q": text}
+        async with self.semaphores["translate"]:
+            try:
+                data = await self._guarded("google_translate", lambda: self._get_json(
+                    module.GOOGLE_TRANSLATE_URL, timeout, params=params))
+                result = module.parse_google_response(data)
+                if result and len(result.strip()) >= 3:
+                    return result
+            except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError, ValueError) as e:
+                logging.warning(f"Google Translate ({module.SOURCE_LANG}->{module.TARGET_LANG}) error: {e}")
+
+            # Fall back to the LibreTranslate-compatible endpoint
+            params = {"source": module.SOURCE_LANG.split("-")[0], "target": module.TARGET_LANG.split("-")[0], "q": text}
+            try:
+                data = await self._guarded("argos", lambda: self._post_json(ARGOS_TRANSLATE_URL, 15, json=params))
+                return data.get("translatedText", "")
+            except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError, ValueError) as e:
+                logging.warning(f"Fallback translation error: {e}")
+        return ""
+
+    async def en_to_mni(self, text):
+        return await self.translate(text, enToMni)
+
+    async def mni_to_en(self, text):
+        return await self.translate(text, mniToEn)
+
+    async def meitei_tts(self, text, description=DEFAULT_DESCRIPTION, timeout=60):
+        """Fetch Meitei TTS audio and return base64 audio data"""
+        if not text or not text.strip():
+            logging.warning("TTS Error: No text to speak")
+            return None
+        cleaned_text = clean_tts_text(text)
+        cache = await self._blocking(get_audio_cache)
+        key = cache.make_key(cleaned_text, "meitei_tts", TTS_API_URL, description) if cache is not None else None
+        if key is not None:
+            cached = await self._blocking(cache.get, key)
+            if cached is not None:
+                return cached.decode("ascii")
+        data = {"prompt": cleaned_text, "description": description}
+        try:
+            async with self.semaphores["tts"]:
+                response_data = await self._guarded("meitei_tts", lambda: self._post_json(
+                    TTS_API_URL, timeout, json=data))
+            audio_base64 = extract_tts_audio(response_data)
+            if audio_base64 and key is not None:
+                await self._blocking(cache.put, key, audio_base64.encode("ascii"))
+            return audio_base64
+        except CircuitOpenError:
+            logging.warning("Meitei TTS Error: TTS host is unavailable (circuit open), skipping synthesis")
+            return None
+        except aiohttp.ClientResponseError as e:
+            logging.error(f"TTS API returned status code: {e.status}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Meitei TTS Error: Could not connect to API. {e}")
+            return None
+        except ValueError:
+            logging.error("TTS Error: Invalid JSON response from API")
+            return None
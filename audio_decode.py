@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import subprocess
+import numpy as np
+import soundfile as sf
+from resampling import resample
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+_ffmpeg_path = shutil.which(FFMPEG_BINARY)
+
+# Sun AU: big-endian header (magic, data offset, data size, encoding, rate, channels), then samples
+AU_MAGIC = 0x2E736E64
+AU_HEADER_SIZE = 24
+
+
+def ffmpeg_path():
+    """Path of the ffmpeg binary used for piping, or None if it is not installed"""
+    return _ffmpeg_path
+
+
+def to_mono(samples):
+    """Average channels of a (frames, channels) buffer"""
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1, dtype=np.float32)
+    return samples
+
+
+def _decode_wav(audio_data, target_rate):
+    samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32")
+    return resample(to_mono(samples), sample_rate, target_rate)
+
+
+def _read_au(data):
+    """Parse float32 Sun AU bytes into (samples, sample_rate)"""
+    if len(data) < AU_HEADER_SIZE:
+        raise RuntimeError("ffmpeg returned no audio")
+    magic, offset, _, _, sample_rate, _ = np.frombuffer(data, dtype=">u4", count=6)
+    if magic != AU_MAGIC:
+        raise RuntimeError("ffmpeg returned an unexpected stream (not AU)")
+    # The data size field is left unset when writing to a pipe, so read up to the end
+    payload = data[int(offset):]
+    samples = np.frombuffer(payload, dtype=">f4", count=len(payload) // 4)
+    return samples.astype(np.float32), int(sample_rate)
+
+
+def _decode_ffmpeg(audio_data, target_rate):
+    """Pipe the container through ffmpeg and read back mono float32 PCM at target_rate
+
+    ffmpeg only decodes and downmixes, at the stream's own rate (AU output carries it);
+    resampling goes through the same polyphase filter as WAV.
+    """
+    result = subprocess.run(
+        [_ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "au", "-acodec", "pcm_f32be", "-ac", "1", "pipe:1"],
+        input=audio_data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    samples, sample_rate = _read_au(result.stdout)
+    return resample(samples, sample_rate, target_rate)
+
+
+def _decode_pydub(audio_data, target_rate):
+    """Fallback when no ffmpeg binary is on PATH for piping (pydub may still find one)"""
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(audio_data))
+    scale = float(1 << (8 * segment.sample_width - 1))
+    samples = np.frombuffer(segment.raw_data, dtype=f"<i{segment.sample_width}") \
+        if segment.sample_width in (2, 4) else np.array(segment.get_array_of_samples())
+    samples = samples.astype(np.float32) / scale
+    if segment.channels > 1:
+        samples = samples.reshape(-1, segment.channels)
+    return resample(to_mono(samples), segment.frame_rate, target_rate)
+
+
+def decode_audio(audio_data, target_rate):
+    """Decode WebM/Opus (or WAV) bytes to a mono float32 buffer at target_rate, in memory
+
+    WAV is parsed directly; other containers are streamed through ffmpeg's stdin/stdout,
+    so no temp files or intermediate WAV copies are made. Every path is resampled with
+    resampling.resample.
+    """
+    if audio_data[:4] == b"RIFF":
+        return _decode_wav(audio_data, target_rate)
+    if _ffmpeg_path:
+        return _decode_ffmpeg(audio_data, target_rate)
+    return _decode_pydub(audio_data, target_rate)
@@ -0,0 +1,107 @@
+import os
+import time
+import base64
+import logging
+import threading
+import subprocess
+from audio_decode import ffmpeg_path
+
+# How TTS audio goes out over Socket.IO unless the client asks otherwise:
+# "base64" (legacy JSON string), "wav" (binary frame) or "opus" (binary Ogg/Opus frame)
+DEFAULT_AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "base64")
+OPUS_BITRATE = os.getenv("TTS_OPUS_BITRATE", "32k")
+AUDIO_FORMATS = ("base64", "wav", "opus")
+
+
+class TransportStats:
+    """Bytes on the wire versus the base64 JSON equivalent, and Opus encode time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.base64_equivalent = 0  # what the same payloads would have cost as base64
+        self.encodes = 0
+        self.encode_seconds = 0.0
+
+    def record_in(self, raw_size, base64_size):
+        with self._lock:
+            self.bytes_in += raw_size
+            self.base64_equivalent += base64_size
+
+    def record_out(self, sent_size, base64_size, encode_seconds=None):
+        with self._lock:
+            self.bytes_out += sent_size
+            self.base64_equivalent += base64_size
+            if encode_seconds is not None:
+                self.encodes += 1
+                self.encode_seconds += encode_seconds
+
+    def stats(self):
+        with self._lock:
+            sent = self.bytes_in + self.bytes_out
+            return {
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "base64_equivalent": self.base64_equivalent,
+                "saved_ratio": 1 - sent / self.base64_equivalent if self.base64_equivalent else 0.0,
+                "opus_encodes": self.encodes,
+                "avg_encode_ms": self.encode_seconds / self.encodes * 1000 if self.encodes else 0.0,
+            }
+
+
+transport_stats = TransportStats()
+
+
+def _base64_size(raw_size):
+    return 4 * ((raw_size + 2) // 3)
+
+
+def audio_payload_bytes(value):
+    """Bytes of an incoming audio field: a binary Socket.IO attachment or a legacy base64 string"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        transport_stats.record_in(len(data), _base64_size(len(data)))
+        return data
+    data = base64.b64decode(value)
+    transport_stats.record_in(len(value), len(value))
+    return data
+
+
+def encode_opus(audio_bytes, bitrate=OPUS_BITRATE):
+    """Encode a WAV (or any ffmpeg-readable) clip to Ogg/Opus; returns None if ffmpeg is unavailable or fails"""
+    if ffmpeg_path() is None:
+        return None
+    result = subprocess.run(
+        [ffmpeg_path(), "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"],
+        input=audio_bytes, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+    )
+    if result.returncode != 0:
+        logging.error(f"Opus encoding failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+        return None
+    return result.stdout
+
+
+def tts_audio_fields(audio_base64, audio_format=None):
+    """Build the audio part of a tts_audio / tts_audio_chunk event for the requested format
+
+    Returns {'audio_data': ..., 'format': ...}, format being "base64" (a base64 WAV
+    string), "wav" or "opus". Binary formats send bytes, which Socket.IO carries as
+    a binary attachment instead of a JSON string.
+    """
+    audio_format = audio_format or DEFAULT_AUDIO_FORMAT
+    if not audio_base64 or audio_format not in AUDIO_FORMATS or audio_format == "base64":
+        if audio_base64:
+            transport_stats.record_out(len(audio_base64), len(audio_base64))
+        return {'audio_data': audio_base64, 'format': 'base64'}
+
+    audio_bytes = base64.b64decode(audio_base64)
+    if audio_format == "opus":
+        start = time.perf_counter()
+        encoded = encode_opus(audio_bytes)
+        if encoded is not None:
+            transport_stats.record_out(len(encoded), len(audio_base64), time.perf_counter() - start)
+            return {'audio_data': encoded, 'format': 'opus'}
+    transport_stats.record_out(len(audio_bytes), len(audio_base64))
+    return {'audio_data': audio_bytes, 'format': 'wav'}
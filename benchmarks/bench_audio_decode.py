@@ -0,0 +1,110 @@
+"""Compare the legacy temp-file WebM decode with audio_decode.decode_audio
+
+Usage:
+    python benchmarks/bench_audio_decode.py [clip.webm ...]
+
+Without arguments, synthetic 5/10/15s 48 kHz clips are encoded to WebM/Opus
+(needs ffmpeg on PATH) and a WAV clip is always included.
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_decode import decode_audio, _ffmpeg_path  # noqa: E402
+
+TARGET_RATE = 16000
+RUNS = 5
+
+
+def legacy_decode(audio_data, target_rate, fmt="webm"):
+    """The pre-change path: pydub -> temp WAV -> soundfile -> mono -> signal.resample"""
+    from pydub import AudioSegment
+    audio_segment_webm = AudioSegment.from_file(io.BytesIO(audio_data), format=fmt)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_wav_file:
+        audio_segment_webm.export(temp_wav_file.name, format="wav")
+        temp_wav_file.seek(0)
+        wav_data = temp_wav_file.read()
+    audio_segment, sample_rate = sf.read(io.BytesIO(wav_data))
+    if audio_segment.ndim > 1:
+        audio_segment = audio_segment.mean(axis=1)
+    if sample_rate != target_rate:
+        num_samples = int(len(audio_segment) * target_rate / sample_rate)
+        audio_segment = signal.resample(audio_segment, num_samples)
+    return audio_segment
+
+
+def synthetic_speech(seconds, rate=48000):
+    """Voiced-ish test signal: harmonics with a syllable-rate envelope plus noise"""
+    t = np.arange(int(seconds * rate)) / rate
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    rng = np.random.default_rng(0)
+    return (0.2 * voice * envelope + 0.01 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def encode_webm(samples, rate):
+    wav = io.BytesIO()
+    sf.write(wav, samples, rate, format="WAV", subtype="PCM_16")
+    result = subprocess.run(
+        [_ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", "48k", "-f", "webm", "pipe:1"],
+        input=wav.getvalue(), stdout=subprocess.PIPE, check=True,
+    )
+    return result.stdout
+
+
+def encode_wav(samples, rate):
+    wav = io.BytesIO()
+    sf.write(wav, samples, rate, format="WAV", subtype="PCM_16")
+    return wav.getvalue()
+
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def compare(label, audio_data, fmt):
+    legacy_time, legacy = best_of(legacy_decode, audio_data, TARGET_RATE, fmt)
+    new_time, new = best_of(decode_audio, audio_data, TARGET_RATE)
+    n = min(len(legacy), len(new))
+    # Skip the edges, where FFT (periodic) and FIR resampling legitimately differ
+    edge = TARGET_RATE // 20
+    diff = np.max(np.abs(legacy[edge:n - edge] - new[edge:n - edge])) if n > 2 * edge else float("nan")
+    print(f"{label:<14} {len(audio_data) / 1024:8.1f} KiB  legacy {legacy_time * 1000:8.1f} ms  "
+          f"in-memory {new_time * 1000:8.1f} ms  speedup {legacy_time / new_time:5.1f}x  "
+          f"len {len(legacy)}/{len(new)}  max|diff| {diff:.4f}")
+
+
+def main():
+    clips = []
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            clips.append((os.path.basename(path), f.read(), os.path.splitext(path)[1].lstrip(".") or "webm"))
+    if not clips:
+        clips.append(("10s wav", encode_wav(synthetic_speech(10), 48000), "wav"))
+        if _ffmpeg_path:
+            for seconds in (5, 10, 15):
+                clips.append((f"{seconds}s webm", encode_webm(synthetic_speech(seconds), 48000), "webm"))
+        else:
+            print("ffmpeg not found; only benchmarking the WAV clip")
+
+    for label, audio_data, fmt in clips:
+        compare(label, audio_data, fmt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark and accuracy check: cached polyphase resampling vs scipy.signal.resample
+
+Usage:
+    python benchmarks/bench_resample.py
+
+Clips of 5/10/15s (plus odd lengths, which are slow FFT sizes) at 48 kHz and
+44.1 kHz are resampled to 16 kHz. Accuracy is reported against the previous
+FFT output and as SNR against an analytic band-limited reference.
+"""
+import os
+import sys
+import time
+import numpy as np
+from scipy import signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resampling import resample, StreamingResampler  # noqa: E402
+
+TARGET_RATE = 16000
+RUNS = 5
+TONES = (220.0, 1250.0, 3400.0, 6100.0)  # all below the 8 kHz output Nyquist
+
+
+def tones(num_samples, rate):
+    t = np.arange(num_samples) / rate
+    return sum(np.sin(2 * np.pi * f * t + i) for i, f in enumerate(TONES)).astype(np.float32) / len(TONES)
+
+
+def fft_resample(samples, src_rate, dst_rate):
+    """The previous transcribe_audio_data path"""
+    return signal.resample(samples, int(len(samples) * dst_rate / src_rate))
+
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def streamed(samples, src_rate, dst_rate, chunk=960):
+    resampler = StreamingResampler(src_rate, dst_rate)
+    parts = [resampler.process(samples[i:i + chunk]) for i in range(0, len(samples), chunk)]
+    parts.append(resampler.flush())
+    return np.concatenate(parts)
+
+
+def snr_db(estimate, reference):
+    noise = estimate - reference
+    return 10 * np.log10(np.sum(reference ** 2) / max(np.sum(noise ** 2), 1e-20))
+
+
+def main():
+    print(f"{'clip':<18} {'fft ms':>8} {'poly ms':>8} {'stream ms':>9} {'speedup':>8} "
+          f"{'max|poly-fft|':>14} {'SNR fft':>8} {'SNR poly':>9}")
+    for src_rate in (48000, 44100):
+        for seconds in (5, 10, 15):
+            for extra in (0, 7919):  # a prime offset makes the FFT length awkward
+                num_samples = seconds * src_rate + extra
+                x = tones(num_samples, src_rate)
+                fft_time, fft_out = best_of(fft_resample, x, src_rate, TARGET_RATE)
+                poly_time, poly_out = best_of(resample, x, src_rate, TARGET_RATE)
+                stream_time, stream_out = best_of(streamed, x, src_rate, TARGET_RATE)
+                assert len(poly_out) == len(fft_out) == len(stream_out)
+                assert np.allclose(poly_out, stream_out, atol=1e-5)
+
+                # Compare away from the edges, where FFT resampling wraps around the clip
+                edge = TARGET_RATE // 20
+                inner = slice(edge, len(poly_out) - edge)
+                reference = tones(len(poly_out), TARGET_RATE)[inner]
+                label = f"{src_rate // 1000}k {seconds}s" + (f" +{extra}" if extra else "")
+                print(f"{label:<18} {fft_time * 1000:8.1f} {poly_time * 1000:8.1f} {stream_time * 1000:9.1f} "
+                      f"{fft_time / poly_time:7.1f}x {np.max(np.abs(poly_out[inner] - fft_out[inner])):14.5f} "
+                      f"{snr_db(fft_out[inner], reference):8.1f} {snr_db(poly_out[inner], reference):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
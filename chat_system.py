@@ -1,8 +1,10 @@
 import sys
-import json
 import requests
+from circuit_breaker import CircuitOpenError
 import signal
 from TTS.piperTTS import PiperTTS
+from history_manager import HistoryManager
+from generative.backends import get_backend
 
 tts_engine = PiperTTS()
 
@@ -30,10 +32,11 @@ class RealtimeChatSystem:
         # API settings
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model = model or "meta-llama/llama-4-scout-17b-16e-instruct"
-        self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.backend = get_backend(api_key=api_key)
         
         # Chat history
         self.messages = []
+        self.history = HistoryManager()
         
         # Add system prompt if provided
         if system_prompt:
@@ -41,6 +44,7 @@ class RealtimeChatSystem:
         
         # Stream settings
         self.streaming = True
+        self.last_stream_metrics = None
         
         # TTS settings
         self.use_tts = use_tts
@@ -58,28 +62,12 @@ class RealtimeChatSystem:
         
     def get_chat_completion(self):
         """Get a chat completion from the API"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        payload = {
-            "model": self.model,
-            "messages": self.messages,
-            "temperature": 0.7,
-            "max_tokens": 1024,
-            "stream": self.streaming
-        }
-        
         try:
             if self.streaming:
-                return self._stream_response(headers, payload)
+                return self._stream_response()
             else:
-                # Add timeout to prevent hanging
-                response = requests.post(self.api_url, headers=headers, json=payload, timeout=10)
-                response.raise_for_status()
-                return response.json()["choices"][0]["message"]["content"]
-        except requests.ConnectionError as e:
+                return self.backend.complete(self.history.build(self.messages), self.model)
+        except (requests.ConnectionError, CircuitOpenError) as e:
             error_msg = f"Connection error: {str(e)}"
             print(f"Error getting chat completion: {error_msg}")
             return "I'm sorry, I'm having trouble connecting to my knowledge service right now. This could be due to network issues or service unavailability. Please try again later or check your internet connection."
@@ -96,56 +84,23 @@ class RealtimeChatSystem:
         print("\n\nExiting chat session...")
         sys.exit(0)
         
-    def _stream_response(self, headers, payload):
+    def _stream_response(self):
         """Stream the response from the API"""
         try:
             # Show a spinner while connecting
             print("Connecting to API...", end="", flush=True)
             
-            # Add timeout to prevent hanging
-            response = requests.post(
-                self.api_url, 
-                headers=headers, 
-                json=payload, 
-                stream=True,
-                timeout=10  # 10 second timeout
-            )
-            response.raise_for_status()
+            stream = self.backend.stream(self.history.build(self.messages), self.model)
             
             # Clear the connecting message
             print("\r" + " " * 20 + "\r", end="", flush=True)
             
-            # Initialize variables for streaming
-            full_response = ""
-            
-            # Process the response
-            full_response = ""
-            for line in response.iter_lines():
-                if line:
-                    # Skip the data: prefix
-                    line_text = line.decode('utf-8')
-                    if line_text.startswith("data: "):
-                        line_text = line_text[6:]
-                        
-                    # Skip [DONE] message
-                    if line_text.strip() == "[DONE]":
-                        continue
-                        
-                    try:
-                        # Parse the JSON
-                        json_data = json.loads(line_text)
-                        
-                        # Extract the content
-                        if "choices" in json_data and len(json_data["choices"]) > 0:
-                            delta = json_data["choices"][0]["delta"]
-                            if "content" in delta and delta["content"]:
-                                content = delta["content"]
-                                print(content, end="", flush=True)
-                                full_response += content
-                    except json.JSONDecodeError:
-                        print(f"\nError parsing JSON: {line_text}")
-                    except Exception as e:
-                        print(f"\nError processing response: {e}")
+            # One write and flush per network read rather than per token
+            for tokens in stream.batches():
+                sys.stdout.write("".join(tokens))
+                sys.stdout.flush()
+            full_response = stream.text()
+            self.last_stream_metrics = stream.metrics()
             
             # Add the assistant message to history
             self.add_message("assistant", full_response)
@@ -163,7 +118,7 @@ class RealtimeChatSystem:
             print("\n")
             
             return full_response
-        except requests.ConnectionError as e:
+        except (requests.ConnectionError, CircuitOpenError) as e:
             error_msg = f"Connection error: {str(e)}"
             print(f"\nError streaming response: {error_msg}")
             return "I'm sorry, I'm having trouble connecting to my knowledge service right now. This could be due to network issues or service unavailability. Please try again later or check your internet connection."
@@ -0,0 +1,224 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class CallTicket:
+    """What allow() hands out for a permitted call; pass it back to record()
+
+    Args:
+        generation: The breaker's state generation when the call started
+        trial: Whether this call is the half-open trial (or probe)
+    """
+
+    __slots__ = ("generation", "trial")
+
+    def __init__(self, generation, trial=False):
+        self.generation = generation
+        self.trial = trial
+
+
+class CircuitBreaker:
+    """Per-upstream breaker that trips on error rate or slow calls
+
+    While open, calls fail immediately. After a cool-down the breaker goes
+    half-open: a background probe (if given) or the next real call is let
+    through, and its outcome closes or re-opens the circuit. Every state change
+    starts a new generation; a call's outcome only counts in the generation it
+    started in, so a slow call from before a trip cannot close the breaker.
+    """
+
+    def __init__(self, name, window=None, min_calls=None, error_threshold=None,
+                 slow_call_seconds=None, slow_threshold=None, open_seconds=None, probe=None):
+        """
+        Args:
+            name: Upstream name, e.g. "groq", "google_translate", "argos", "meitei_tts"
+            window: Number of recent calls considered
+            min_calls: Calls needed in the window before the breaker can trip
+            error_threshold: Fraction of failed calls that trips the breaker
+            slow_call_seconds: Calls slower than this count as slow
+            slow_threshold: Fraction of slow calls that trips the breaker
+            open_seconds: Cool-down before going half-open
+            probe: Optional callable() -> bool run in the background when half-open
+        """
+        prefix = f"BREAKER_{name.upper()}_"
+        self.name = name
+        self.window = window or int(os.getenv(prefix + "WINDOW", "20"))
+        self.min_calls = min_calls or int(os.getenv(prefix + "MIN_CALLS", "5"))
+        self.error_threshold = error_threshold or float(os.getenv(prefix + "ERROR_RATE", "0.5"))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv(prefix + "SLOW_SECONDS", "20"))
+        self.slow_threshold = slow_threshold or float(os.getenv(prefix + "SLOW_RATE", "0.8"))
+        self.open_seconds = open_seconds or float(os.getenv(prefix + "OPEN_SECONDS", "30"))
+        self.probe = probe
+
+        self.state = CLOSED
+        self._calls = deque(maxlen=self.window)  # (failed, slow) per call
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def allow(self):
+        """Return a CallTicket if a call may go through now, else None"""
+        with self._lock:
+            if self.state == CLOSED:
+                return CallTicket(self._generation)
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._generation += 1
+                self._trial_in_flight = False
+                if self.probe is not None:
+                    self._trial_in_flight = True
+                    threading.Thread(target=self._run_probe, args=(CallTicket(self._generation, trial=True),),
+                                     daemon=True).start()
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                # Let exactly one real call through as the trial
+                self._trial_in_flight = True
+                return CallTicket(self._generation, trial=True)
+            self.rejected += 1
+            return None
+
+    def record(self, success, seconds, ticket=None):
+        """Record the outcome of a call that allow() let through
+
+        Args:
+            success: Whether the call succeeded
+            seconds: How long it took
+            ticket: The CallTicket allow() returned for it; without one the call
+                is taken to be an ordinary call of the current generation
+        """
+        with self._lock:
+            if ticket is not None and ticket.generation != self._generation:
+                return  # started before the last state change
+            if ticket is not None and ticket.trial:
+                self._trial_in_flight = False
+                if success and seconds < self.slow_call_seconds:
+                    self._close_locked()
+                else:
+                    self._open_locked("trial call failed")
+                return
+            if self.state != CLOSED:
+                return  # only the trial decides while half-open
+
+            self._calls.append((not success, seconds >= self.slow_call_seconds))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for failed, _ in self._calls if failed)
+                slow = sum(1 for _, is_slow in self._calls if is_slow)
+                if failures / len(self._calls) >= self.error_threshold:
+                    self._open_locked(f"error rate {failures}/{len(self._calls)}")
+                elif slow / len(self._calls) >= self.slow_threshold:
+                    self._open_locked(f"slow calls {slow}/{len(self._calls)}")
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker; exceptions count as failures and are re-raised
+
+        The outcome is recorded in a finally block, so a BaseException (KeyboardInterrupt,
+        GeneratorExit, a green-thread Timeout) still releases a half-open trial.
+        """
+        ticket = self.allow()
+        if not ticket:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.monotonic()
+        success = False
+        try:
+            result = func(*args, **kwargs)
+            success = True
+            return result
+        finally:
+            self.record(success, time.monotonic() - start, ticket)
+
+    def _run_probe(self, ticket):
+        start = time.monotonic()
+        healthy = False
+        try:
+            healthy = bool(self.probe())
+        except Exception:
+            pass
+        finally:
+            self.record(healthy, time.monotonic() - start, ticket)
+
+    def _open_locked(self, reason):
+        self.state = OPEN
+        self._generation += 1
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        logging.warning(f"Circuit '{self.name}' opened: {reason}")
+
+    def _close_locked(self):
+        self.state = CLOSED
+        self._generation += 1
+        self._calls.clear()
+        logging.info(f"Circuit '{self.name}' closed")
+
+    def is_available(self):
+        """Non-mutating check used for routing decisions"""
+        with self._lock:
+            return self.state == CLOSED or (
+                self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds
+            ) or (self.state == HALF_OPEN and not self._trial_in_flight)
+
+    def stats(self):
+        with self._lock:
+            failures = sum(1 for failed, _ in self._calls if failed)
+            return {
+                "state": self.state,
+                "calls": len(self._calls),
+                "failures": failures,
+                "rejected": self.rejected,
+            }
+
+
+def guarded_request(breaker, send, *args, **kwargs):
+    """Send a requests call through a breaker and raise_for_status
+
+    Network errors, 5xx and 429 count as failures; other 4xx are the caller's
+    fault and count as successful round trips.
+    """
+    ticket = breaker.allow()
+    if not ticket:
+        raise CircuitOpenError(f"{breaker.name} circuit is open")
+    start = time.monotonic()
+    success = False
+    try:
+        response = send(*args, **kwargs)
+        response.raise_for_status()
+        success = True
+        return response
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        success = status is not None and status < 500 and status != 429
+        raise
+    finally:
+        # Also on BaseException, so an interrupted half-open trial does not wedge the breaker
+        breaker.record(success, time.monotonic() - start, ticket)
+
+
+def get_breaker(name, **kwargs):
+    """Return the process-wide breaker for an upstream, creating it on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, **kwargs)
+                _breakers[name] = breaker
+    return breaker
+
+
+def breaker_stats():
+    """Return the state of every registered breaker"""
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
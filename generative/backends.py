@@ -0,0 +1,163 @@
+import os
+import json
+import threading
+import requests
+from http_client import get_http_client
+from circuit_breaker import get_breaker, guarded_request
+from generative.streaming import CompletionStream
+from singleflight import SingleFlight
+
+# Which chat-completions endpoint the chat systems talk to: "groq" or "local"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Where the local stand-in listens; unset starts one in-process on a free port
+LOCAL_LLM_URL = os.getenv("LLM_LOCAL_URL")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+_backends = {}
+_registry_lock = threading.Lock()
+
+
+class ChatBackend:
+    """An OpenAI-compatible chat-completions endpoint
+
+    One instance per upstream holds its pooled keep-alive session, prebuilt
+    headers, circuit breaker and an in-flight limit. Identical non-streaming
+    requests that overlap are coalesced into one upstream call.
+    """
+
+    def __init__(self, name, api_url, api_key=None, timeout=None, max_concurrency=None):
+        """
+        Args:
+            name: Backend name, also the name of its circuit breaker
+            api_url: The chat/completions URL
+            api_key: Bearer token
+            timeout: Read timeout in seconds (also how long to wait for a free slot)
+            max_concurrency: Requests allowed in flight at once
+        """
+        self.name = name
+        self.api_url = api_url
+        self.timeout = timeout or LLM_TIMEOUT
+        self.max_concurrency = max_concurrency or int(os.getenv(f"LLM_MAX_CONCURRENCY_{name.upper()}",
+                                                                  str(LLM_MAX_CONCURRENCY)))
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        }
+        self.session = get_http_client().session_for(api_url)
+        self.breaker = get_breaker(name, probe=self.probe)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        # Per instance, so backends with different API keys never share a result
+        self._flights = SingleFlight(name)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def payload(self, messages, model, stream=False, temperature=0.7, max_tokens=1024):
+        return {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise requests.Timeout(f"{self.name}: all {self.max_concurrency} request slots busy")
+        with self._lock:
+            self.requests += 1
+
+    def _post(self, payload, stream=False):
+        return guarded_request(self.breaker, self.session.post, self.api_url, headers=self.headers,
+                               json=payload, stream=stream, timeout=(3.05, self.timeout))
+
+    def complete(self, messages, model, **options):
+        """Return the reply text of a non-streaming completion"""
+        payload = self.payload(messages, model, **options)
+        key = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return self._flights.do(key, self._complete, payload)
+
+    def _complete(self, payload):
+        self._acquire()
+        try:
+            return self._post(payload).json()["choices"][0]["message"]["content"]
+        finally:
+            self._slots.release()
+
+    def stream(self, messages, model, on_first_token=None, on_complete=None, **options):
+        """Start a streaming completion; returns a CompletionStream of content deltas
+
+        Nothing is sent until the stream is first read. The request slot is held
+        from then until the stream has been read to the end or closed, so a
+        stream that is dropped unread never holds one. Timing starts when the
+        request is posted, after any wait for a slot.
+        """
+        payload = self.payload(messages, model, stream=True, **options)
+        stream = CompletionStream(self._body(payload, lambda: stream.mark_sent()),
+                                  on_first_token=on_first_token, on_complete=on_complete)
+        return stream
+
+    def _body(self, payload, on_sent=None):
+        self._acquire()
+        try:
+            if on_sent:
+                on_sent()
+            response = self._post(payload, stream=True)
+            try:
+                yield from response.iter_content(chunk_size=None)
+            finally:
+                response.close()
+        finally:
+            self._slots.release()
+
+    def probe(self):
+        """Cheap health check used by the circuit breaker while half-open"""
+        response = self.session.get(self.api_url.rsplit("/chat/", 1)[0] + "/models",
+                                    headers=self.headers, timeout=5)
+        return response.status_code < 500
+
+    def stats(self):
+        flights = self._flights.stats()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": flights["shared"],
+                "coalescing_ratio": flights["coalescing_ratio"],
+                "max_concurrency": self.max_concurrency,
+            }
+
+
+def _local_url():
+    if LOCAL_LLM_URL:
+        return LOCAL_LLM_URL
+    from generative.local_server import LocalLLMServer
+    return LocalLLMServer().start().url
+
+
+def make_backend(name=None, api_key=None):
+    """Build a backend by name ("groq" or "local"); see get_backend for the shared one"""
+    name = name or LLM_BACKEND
+    if name == "groq":
+        return ChatBackend("groq", GROQ_API_URL, api_key or os.getenv("GROQ_API_KEY"))
+    if name == "local":
+        return ChatBackend("local", _local_url(), api_key or "local")
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+def get_backend(name=None, api_key=None):
+    """Return the process-wide backend (LLM_BACKEND by default)
+
+    A caller with its own api_key gets a separate backend so keys never mix.
+    """
+    name = name or LLM_BACKEND
+    if api_key and name == "groq" and api_key != os.getenv("GROQ_API_KEY"):
+        return make_backend(name, api_key)
+    backend = _backends.get(name)
+    if backend is None:
+        with _registry_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = make_backend(name)
+                _backends[name] = backend
+    return backend
@@ -0,0 +1,218 @@
+"""OpenAI-compatible stand-in for the chat-completions API
+
+Replays recorded replies with a fixed time to first token and per-token delay,
+so the chat and voice stack can be load-tested offline and deterministically.
+
+Run standalone:
+    python -m generative.local_server --port 8001 --recordings app.log
+then start the app with LLM_BACKEND=local LLM_LOCAL_URL=http://127.0.0.1:8001/v1/chat/completions
+(with LLM_BACKEND=local and no LLM_LOCAL_URL, the backend starts one in-process).
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LOCAL_LLM_TTFT_MS = float(os.getenv("LOCAL_LLM_TTFT_MS", "300"))
+LOCAL_LLM_TOKEN_MS = float(os.getenv("LOCAL_LLM_TOKEN_MS", "20"))
+LOCAL_LLM_RECORDINGS = os.getenv("LOCAL_LLM_RECORDINGS")
+
+DEFAULT_REPLIES = [
+    "Hello! I'm Cosmic, an assistant from N7 Lab in Manipur. How can I help you today?",
+    "Imphal is the capital of Manipur, known for Loktak Lake and the Ima Keithel women's market.",
+    "Sure. Photosynthesis is how plants turn sunlight, water and carbon dioxide into sugar and oxygen.",
+    "I'm not sure about that one. Could you tell me a bit more about what you need?",
+]
+
+# Word-sized deltas, roughly what a real model streams
+_TOKEN = re.compile(r"\s*\S+")
+
+
+def load_recordings(path):
+    """Load prompt -> reply pairs
+
+    Accepts a JSON list or JSONL of {"prompt": ..., "response": ...} objects, or
+    an app.log whose "Received message:" lines are followed by "Sending response:".
+    """
+    recordings = {}
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".log"):
+        prompt = None
+        for line in text.splitlines():
+            if "Received message: " in line:
+                prompt = line.split("Received message: ", 1)[1]
+            elif "Sending response: " in line and prompt is not None:
+                recordings[prompt] = line.split("Sending response: ", 1)[1]
+                prompt = None
+        return recordings
+    stripped = text.lstrip()
+    items = json.loads(stripped) if stripped.startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    for item in items:
+        recordings[item["prompt"]] = item["response"]
+    return recordings
+
+
+class ReplayModel:
+    """Picks the reply for a conversation: the recorded one for a known prompt, else a stable choice"""
+
+    def __init__(self, recordings=None, replies=None):
+        """
+        Args:
+            recordings: Dict of user prompt -> reply
+            replies: Fallback replies, chosen by a hash of the prompt
+        """
+        self.recordings = recordings or {}
+        self.replies = list(replies or self.recordings.values() or DEFAULT_REPLIES)
+
+    def reply(self, messages):
+        prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        if prompt in self.recordings:
+            return self.recordings[prompt]
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        return self.replies[int.from_bytes(digest[:4], "big") % len(self.replies)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse connections as they would upstream
+
+    def log_message(self, format, *args):
+        logging.debug("local LLM: " + format % args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "local-replay", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+        server = self.server
+        server.record_request()
+        reply = server.model.reply(request.get("messages") or [])
+        model = request.get("model") or "local-replay"
+        tokens = _TOKEN.findall(reply)
+        time.sleep(server.ttft)
+        if request.get("stream"):
+            self._stream(model, tokens, server.token_delay)
+            return
+        time.sleep(server.token_delay * max(len(tokens) - 1, 0))
+        self._send_json(200, {
+            "id": "chatcmpl-local",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": {"completion_tokens": len(tokens)},
+        })
+
+    def _stream(self, model, tokens, token_delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(token_delay)
+            chunk = {"id": "chatcmpl-local", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self._write_chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class LocalLLMServer(ThreadingHTTPServer):
+    """In-process OpenAI-compatible server on a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, model=None, ttft_ms=None, token_ms=None):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            model: ReplayModel; defaults to LOCAL_LLM_RECORDINGS or the built-in replies
+            ttft_ms: Delay before the first token
+            token_ms: Delay between tokens
+        """
+        super().__init__((host, port), _Handler)
+        if model is None:
+            model = ReplayModel(load_recordings(LOCAL_LLM_RECORDINGS) if LOCAL_LLM_RECORDINGS else None)
+        self.model = model
+        self.ttft = (ttft_ms if ttft_ms is not None else LOCAL_LLM_TTFT_MS) / 1000.0
+        self.token_delay = (token_ms if token_ms is not None else LOCAL_LLM_TOKEN_MS) / 1000.0
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is routine under load tests
+        logging.debug(f"Local LLM connection from {client_address} ended with an error", exc_info=True)
+
+    def record_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="local-llm", daemon=True)
+        self._thread.start()
+        logging.info(f"Local LLM stand-in listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible replay server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--recordings", help="JSON/JSONL of prompt/response pairs, or an app.log")
+    parser.add_argument("--ttft-ms", type=float, default=LOCAL_LLM_TTFT_MS)
+    parser.add_argument("--token-ms", type=float, default=LOCAL_LLM_TOKEN_MS)
+    args = parser.parse_args(argv)
+
+    model = ReplayModel(load_recordings(args.recordings)) if args.recordings else None
+    server = LocalLLMServer(args.host, args.port, model, args.ttft_ms, args.token_ms)
+    print(f"Serving {len(server.model.replies)} replies at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
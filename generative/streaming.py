@@ -0,0 +1,180 @@
+import json
+import time
+import logging
+
+
+class SSEParser:
+    """Incremental server-sent-events parser working on raw bytes
+
+    Network chunks can end anywhere, even inside a line or a UTF-8 sequence, so
+    the unfinished tail is held back until its line is complete. Lines stay
+    bytes; only each data payload is decoded, once, for json.loads. Only the
+    data field matters for chat completions; comment, event and id lines are
+    skipped.
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self._data = []
+
+    def feed(self, chunk):
+        """Add a chunk of the response body; returns the data payloads (bytes) it completed"""
+        lines = (self._pending + chunk if self._pending else chunk).split(b"\n")
+        # The last piece is an unfinished line (or b"" when the chunk ended on a newline)
+        self._pending = lines.pop()
+        events = []
+        data = self._data
+        for line in lines:
+            if line.startswith(b"data:"):
+                data.append(line[6:].rstrip(b"\r") if line[5:6] == b" " else line[5:].rstrip(b"\r"))
+            elif not line or line == b"\r":
+                if data:
+                    events.append(data[0] if len(data) == 1 else b"\n".join(data))
+                    data.clear()
+        return events
+
+    def close(self):
+        """Flush whatever is left once the body ends (an unterminated last line or event)"""
+        return self.feed(b"\n\n")
+
+
+class CompletionStream:
+    """Tokens of a streaming chat completion, with timing
+
+    Iterate it (or async-iterate it) to get content deltas as they arrive; the
+    deltas are kept in a list so text() is one join at the end. Timing hooks are
+    called with the stream itself.
+
+    Args:
+        chunks: Iterable (or async iterable) of response body bytes
+        started: perf_counter() time the request was sent; defaults to now, and a source that
+            sends its request lazily calls mark_sent() when it does
+        on_first_token: Called once when the first token arrives
+        on_complete: Called once when the stream ends
+    """
+
+    def __init__(self, chunks, started=None, on_first_token=None, on_complete=None):
+        self._chunks = chunks
+        self._parser = SSEParser()
+        self.started = started if started is not None else time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.tokens = []
+        self.malformed = 0
+        self.done = False
+        self.on_first_token = on_first_token
+        self.on_complete = on_complete
+
+    def mark_sent(self):
+        """Restart the clock: the request has just gone out"""
+        self.started = time.perf_counter()
+
+    def _tokens(self, payloads):
+        tokens = []
+        for payload in payloads:
+            if payload == b"[DONE]":
+                self.done = True
+                break
+            try:
+                # Decode first: json.loads(bytes) sniffs the encoding in pure Python, and SSE is always UTF-8
+                choices = json.loads(payload.decode("utf-8")).get("choices")
+                token = choices and (choices[0].get("delta") or {}).get("content")
+            except (ValueError, AttributeError):
+                self.malformed += 1
+                continue
+            if token:
+                tokens.append(token)
+        if tokens:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+                if self.on_first_token:
+                    self.on_first_token(self)
+            self.tokens.extend(tokens)
+        return tokens
+
+    def _finish(self):
+        if self.finished_at is not None:
+            return
+        self.finished_at = time.perf_counter()
+        if self.malformed:
+            logging.warning(f"Skipped {self.malformed} malformed completion chunks")
+        if self.on_complete:
+            self.on_complete(self)
+
+    def batches(self):
+        """Yield the (non-empty) list of tokens completed by each network read"""
+        try:
+            chunks = iter(self._chunks)
+            for chunk in chunks:
+                tokens = self._tokens(self._parser.feed(chunk))
+                if tokens:
+                    yield tokens
+                if self.done:
+                    # Read the end of the body as well so a keep-alive connection can be reused
+                    for _ in chunks:
+                        pass
+                    break
+            if not self.done:
+                tokens = self._tokens(self._parser.close())
+                if tokens:
+                    yield tokens
+        finally:
+            self._finish()
+
+    def __iter__(self):
+        for tokens in self.batches():
+            yield from tokens
+
+    async def __aiter__(self):
+        try:
+            chunks = self._chunks.__aiter__()
+            async for chunk in chunks:
+                for token in self._tokens(self._parser.feed(chunk)):
+                    yield token
+                if self.done:
+                    async for _ in chunks:
+                        pass
+                    break
+            if not self.done:
+                for token in self._tokens(self._parser.close()):
+                    yield token
+        finally:
+            self._finish()
+
+    def close(self):
+        """Stop reading early and release the underlying response"""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        self._finish()
+
+    def text(self):
+        """Everything received so far as one string"""
+        return "".join(self.tokens)
+
+    def collect(self):
+        """Drain the stream and return the full text"""
+        for _ in self.batches():
+            pass
+        return self.text()
+
+    @property
+    def ttft(self):
+        """Seconds from request to first token"""
+        return self.first_token_at - self.started if self.first_token_at is not None else None
+
+    @property
+    def tokens_per_second(self):
+        """Delta rate after the first token (each delta is roughly one token)"""
+        if self.first_token_at is None or len(self.tokens) < 2:
+            return None
+        elapsed = (self.finished_at or time.perf_counter()) - self.first_token_at
+        return (len(self.tokens) - 1) / elapsed if elapsed > 0 else None
+
+    def metrics(self):
+        return {
+            "ttft": self.ttft,
+            "tokens": len(self.tokens),
+            "tokens_per_second": self.tokens_per_second,
+            "total": (self.finished_at - self.started) if self.finished_at is not None else None,
+        }
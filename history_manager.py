@@ -0,0 +1,161 @@
+import os
+import re
+import math
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+# Overhead the chat API adds per message for role/formatting tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_END = re.compile(r'(?<=[.!?꯫])\s')
+_WHITESPACE = re.compile(r'\s+')
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate: ~4 ASCII chars per token, non-ASCII scripts cost more"""
+    if not text:
+        return 0
+    # Each extra UTF-8 byte (e.g. 2 for Meitei Mayek) adds roughly half a token
+    extra_bytes = len(text.encode("utf-8")) - len(text)
+    return math.ceil(len(text) / 4 + extra_bytes / 2)
+
+
+def estimate_message_tokens(message):
+    """Estimate the tokens a single chat message costs in the prompt"""
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def extractive_summary(previous_summary, messages, max_chars=240):
+    """Default summarizer: keep the first sentence of each folded turn"""
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        content = _WHITESPACE.sub(" ", message.get("content") or "").strip()
+        if not content:
+            continue
+        first = _SENTENCE_END.split(content, 1)[0]
+        if len(first) > max_chars:
+            first = first[:max_chars].rstrip() + "…"
+        lines.append(f"{message.get('role', 'user')}: {first}")
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """Keeps the prompt within a token budget by folding old turns into a rolling summary"""
+
+    def __init__(self, token_budget=None, summary_token_budget=None, summarizer=None, cache_size=1024):
+        """
+        Initialize the history manager
+
+        Args:
+            token_budget: Maximum estimated prompt tokens sent per request
+            summary_token_budget: Maximum estimated tokens for the folded summary
+            summarizer: Callable(previous_summary, messages) -> summary text
+            cache_size: Number of rolling summaries kept in memory
+        """
+        self.token_budget = token_budget or int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+        self.summary_token_budget = summary_token_budget or int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+        self.summarizer = summarizer or extractive_summary
+        self.cache_size = cache_size
+
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Shared by every session using this manager; only touched under _lock
+        self.total_requests = 0
+        self.total_saved_tokens = 0
+
+    def build(self, messages):
+        """Return the messages to send for this request, windowed to the token budget"""
+        return self.build_with_stats(messages)[0]
+
+    def build_with_stats(self, messages):
+        """Like build(), but returns (window, stats) with this call's token accounting"""
+        head = 0
+        while head < len(messages) and messages[head].get("role") == "system":
+            head += 1
+        system, turns = messages[:head], messages[head:]
+
+        costs = [estimate_message_tokens(m) for m in turns]
+        system_tokens = sum(estimate_message_tokens(m) for m in system)
+        full_tokens = system_tokens + sum(costs)
+
+        # Walk back from the newest turn; the current turn is always kept
+        available = self.token_budget - system_tokens
+        if full_tokens > self.token_budget:
+            available -= self.summary_token_budget + estimate_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+        start = len(turns)
+        used = 0
+        while start > 0 and (start == len(turns) or used + costs[start - 1] <= available):
+            start -= 1
+            used += costs[start]
+
+        window = list(system)
+        if start > 0:
+            summary = self._rolling_summary(turns[:start])
+            window.append({"role": "system", "content": SUMMARY_HEADER + summary})
+        window.extend(turns[start:])
+
+        sent_tokens = sum(estimate_message_tokens(m) for m in window)
+        saved = max(full_tokens - sent_tokens, 0)
+        stats = {
+            "full_tokens": full_tokens,
+            "sent_tokens": sent_tokens,
+            "saved_tokens": saved,
+            "folded_messages": start,
+        }
+        with self._lock:
+            self.total_requests += 1
+            self.total_saved_tokens += saved
+        if start:
+            logging.info(f"History window: sent ~{sent_tokens} of ~{full_tokens} tokens "
+                         f"({start} turns folded, ~{saved} saved)")
+        return window, stats
+
+    def stats(self):
+        """Totals across every build() call"""
+        with self._lock:
+            return {
+                "requests": self.total_requests,
+                "saved_tokens": self.total_saved_tokens,
+                "cached_summaries": len(self._summaries),
+            }
+
+    def _rolling_summary(self, folded):
+        """Summarize folded turns, reusing the longest previously summarized prefix"""
+        digests = []
+        digest = hashlib.sha1()
+        for message in folded:
+            digest.update((message.get("role") or "").encode("utf-8") + b"\0")
+            digest.update((message.get("content") or "").encode("utf-8") + b"\0")
+            digests.append(digest.copy().hexdigest())
+
+        with self._lock:
+            cached = self._summaries.get(digests[-1])
+            if cached is not None:
+                self._summaries.move_to_end(digests[-1])
+                return cached
+            previous, done = "", 0
+            for i in range(len(digests) - 1, -1, -1):
+                if digests[i] in self._summaries:
+                    previous, done = self._summaries[digests[i]], i + 1
+                    break
+
+        summary = self._fit(self.summarizer(previous, folded[done:]))
+
+        with self._lock:
+            self._summaries[digests[-1]] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _fit(self, summary):
+        """Trim a summary to its token budget, keeping the most recent lines"""
+        lines = summary.split("\n")
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_token_budget:
+            lines.pop(0)
+        summary = "\n".join(lines)
+        max_chars = self.summary_token_budget * 4
+        return summary[-max_chars:] if estimate_tokens(summary) > self.summary_token_budget else summary
@@ -0,0 +1,132 @@
+import time
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per-host policies: (connect, read) timeouts and retry/backoff on transient failures.
+# The Meitei TTS host is not retried: a single synthesis already takes ~10s.
+DEFAULT_POLICY = {"timeout": (3.05, 15), "retries": 2, "backoff": 0.3, "pool_maxsize": 10}
+HOST_POLICIES = {
+    "api.groq.com": {"timeout": (3.05, 30), "retries": 3, "backoff": 0.5, "pool_maxsize": 32},
+    "translate.googleapis.com": {"timeout": (3.05, 10), "retries": 2, "backoff": 0.2, "pool_maxsize": 32},
+    "translate.argosopentech.com": {"timeout": (3.05, 15), "retries": 1, "backoff": 0.5, "pool_maxsize": 8},
+    "enabling-golden-muskox.ngrok-free.app": {"timeout": (3.05, 60), "retries": 0, "backoff": 0, "pool_maxsize": 8},
+}
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+class HttpClient:
+    """Keep-alive connection pools per upstream host with retry policies and statistics
+
+    Note: requests/urllib3 speak HTTP/1.1 only; reusing pooled connections is what
+    removes the per-call TCP+TLS handshake.
+    """
+
+    def __init__(self, policies=None):
+        """
+        Args:
+            policies: Optional per-host overrides merged over HOST_POLICIES
+        """
+        self.policies = dict(HOST_POLICIES)
+        self.policies.update(policies or {})
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def policy_for(self, host):
+        return {**DEFAULT_POLICY, **self.policies.get(host, {})}
+
+    def session_for(self, url):
+        """Return the pooled session for the URL's host, creating it on first use"""
+        host = urlsplit(url).hostname or ""
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                policy = self.policy_for(host)
+                retry_strategy = Retry(
+                    total=policy["retries"],
+                    backoff_factor=policy["backoff"],
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=["GET", "POST"],
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=1,
+                                      pool_maxsize=policy["pool_maxsize"])
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._stats[host] = {"requests": 0, "errors": 0, "total_latency": 0.0}
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the host's pool, applying its default timeout"""
+        host = urlsplit(url).hostname or ""
+        session = self.session_for(url)
+        kwargs.setdefault("timeout", self.policy_for(host)["timeout"])
+        start = time.perf_counter()
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._stats[host]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                stats = self._stats[host]
+                stats["requests"] += 1
+                stats["total_latency"] += time.perf_counter() - start
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Return per-host request counts, latency and connection-pool usage"""
+        result = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                stats = dict(self._stats[host])
+                stats["avg_latency"] = stats["total_latency"] / stats["requests"] if stats["requests"] else 0.0
+                connections = 0
+                idle = 0
+                adapter = session.get_adapter(f"https://{host}")
+                for key in list(adapter.poolmanager.pools.keys()):
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        # The pool queue is pre-filled with None placeholders
+                        if pool.pool is not None:
+                            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                stats["connections_opened"] = connections
+                stats["idle_connections"] = idle
+                result[host] = stats
+        return result
+
+
+def get_http_client():
+    """Return the process-wide client shared by the chat, translator and TTS modules"""
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = HttpClient()
+    return _default_client
+
+
+def get(url, **kwargs):
+    return get_http_client().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_http_client().post(url, **kwargs)
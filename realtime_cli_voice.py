@@ -1,12 +1,13 @@
 
 import time
-import re
 import requests
+import http_client
 import base64
 import numpy as np
 import sounddevice as sd
 from N7Speech.manipur_asr.realtime_speech import RealTimeSpeech
 from meitei_chat_system import MeiteiChatSystem
+from TTS.text_normalizer import normalize_for_meitei_tts
 
 # --- TTS Configuration ---
 TTS_API_URL = "https://enabling-golden-muskox.ngrok-free.app/tts"
@@ -22,12 +23,12 @@ def play_tts_from_text(prompt: str, description: str = "male voice, clear tone")
         return
 
     # Remove symbols and markdown, keeping only English, Meitei Mayek, and basic punctuation.
-    prompt = re.sub(r'[^a-zA-Z0-9\s\uABC0-\uABFF.,?!]', '', prompt)
+    prompt = normalize_for_meitei_tts(prompt)
 
     print("AI is speaking...")
     try:
         data = {"prompt": prompt, "description": description}
-        response = requests.post(TTS_API_URL, json=data)
+        response = http_client.post(TTS_API_URL, json=data)
         response.raise_for_status()
 
         audio_base64 = response.json()["audio"]
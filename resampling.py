@@ -0,0 +1,137 @@
+import os
+from math import gcd
+from functools import lru_cache
+import numpy as np
+from scipy import signal
+
+# Kaiser beta and half-length (in taps per max(up, down)) of the anti-aliasing filter,
+# the same design scipy.signal.resample_poly uses by default
+KAISER_BETA = float(os.getenv("RESAMPLE_KAISER_BETA", "5.0"))
+HALF_LEN_FACTOR = int(os.getenv("RESAMPLE_HALF_LEN_FACTOR", "10"))
+
+
+def rational_ratio(src_rate, dst_rate):
+    """Reduce dst/src to the smallest (up, down) pair, e.g. 48000 -> 16000 is (1, 3)"""
+    divisor = gcd(int(src_rate), int(dst_rate))
+    return int(dst_rate) // divisor, int(src_rate) // divisor
+
+
+def output_length(num_samples, src_rate, dst_rate):
+    """Number of samples a clip of num_samples has after resampling"""
+    return int(num_samples * dst_rate / src_rate)
+
+
+@lru_cache(maxsize=32)
+def filter_bank(up, down):
+    """Design the low-pass FIR for an (up, down) pair once and cache it
+
+    Returns (taps, skip, phases, half_len): the filter scaled by up and front-padded
+    so whole-clip upfirdn output starts `skip` samples early, and the same taps split
+    into `up` polyphase rows for streaming.
+    """
+    max_rate = max(up, down)
+    half_len = HALF_LEN_FACTOR * max_rate
+    taps = signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", KAISER_BETA)) * up
+    taps_per_phase = -(-taps.size // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:taps.size] = taps
+    # phases[p, m] = taps[p + m * up]
+    phases = np.ascontiguousarray(padded.reshape(taps_per_phase, up).T, dtype=np.float32)
+    # Pad the front so the filter delay (half_len) falls on a multiple of down
+    pre_pad = -half_len % down
+    taps = np.concatenate((np.zeros(pre_pad), taps)).astype(np.float32)
+    skip = (half_len + pre_pad) // down
+    taps.setflags(write=False)
+    phases.setflags(write=False)
+    return taps, skip, phases, half_len
+
+
+def resample(samples, src_rate, dst_rate):
+    """Resample a mono buffer with a cached polyphase filter, returning float32
+
+    Output length matches the previous FFT path (floor of len * dst / src).
+    """
+    if src_rate == dst_rate:
+        return samples
+    up, down = rational_ratio(src_rate, dst_rate)
+    taps, skip, _, _ = filter_bank(up, down)
+    num_out = output_length(len(samples), src_rate, dst_rate)
+    if num_out == 0:
+        return np.zeros(0, dtype=np.float32)
+    filtered = signal.upfirdn(taps, np.asarray(samples, dtype=np.float32), up, down)
+    return filtered[skip:skip + num_out].astype(np.float32, copy=False)
+
+
+class StreamingResampler:
+    """Chunk-wise polyphase resampler for audio that arrives in pieces
+
+    Keeps just enough input history between chunks that the concatenated output
+    equals resample() of the whole stream. Each chunk's output lags its input by
+    the filter's half length (about 10 output samples).
+    """
+
+    def __init__(self, src_rate, dst_rate):
+        """
+        Args:
+            src_rate: Sample rate of the incoming chunks
+            dst_rate: Sample rate to produce
+        """
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.up, self.down = rational_ratio(src_rate, dst_rate)
+        if self.up == self.down:
+            # Same rate: chunks pass through, no filter to design
+            self.phases, self.half_len, self.taps_per_phase = None, 0, 0
+        else:
+            _, _, self.phases, self.half_len = filter_bank(self.up, self.down)
+            self.taps_per_phase = self.phases.shape[1]
+        self._history = np.zeros(0, dtype=np.float32)
+        self._history_start = 0  # absolute index of _history[0]
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def _produce(self, num_out):
+        """Compute the next num_out samples from the buffered input"""
+        n = self._samples_out + np.arange(num_out)
+        position = n * self.down + self.half_len
+        phase = position % self.up
+        newest = position // self.up  # newest input sample that contributes
+        # Gather inputs newest, newest-1, ... for each output; indices before the stream are zero
+        indices = newest[:, None] - np.arange(self.taps_per_phase)[None, :] - self._history_start
+        valid = (indices >= 0) & (indices < self._history.size)
+        window = np.where(valid, self._history[np.clip(indices, 0, max(self._history.size - 1, 0))], np.float32(0))
+        out = np.einsum("ij,ij->i", window, self.phases[phase])
+        self._samples_out += num_out
+        # Drop input no future output needs
+        oldest_needed = ((self._samples_out * self.down + self.half_len) // self.up) - self.taps_per_phase + 1
+        drop = min(max(oldest_needed - self._history_start, 0), self._history.size)
+        if drop:
+            self._history = self._history[drop:]
+            self._history_start += drop
+        return out
+
+    def process(self, chunk):
+        """Feed a chunk of mono samples and return the resampled samples now available"""
+        if self.up == self.down:
+            return np.asarray(chunk, dtype=np.float32)
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self._history = np.concatenate((self._history, chunk))
+        self._samples_in += chunk.size
+        # Output n can be computed once input (n * down + half_len) // up has arrived
+        ready = (self._samples_in * self.up - self.half_len - 1) // self.down + 1
+        ready = min(ready, output_length(self._samples_in, self.src_rate, self.dst_rate))
+        return self._produce(max(ready - self._samples_out, 0))
+
+    def flush(self):
+        """Return the remaining samples at end of stream (future input treated as silence)"""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        total = output_length(self._samples_in, self.src_rate, self.dst_rate)
+        return self._produce(max(total - self._samples_out, 0))
+
+    def reset(self):
+        """Forget all state so the resampler can start a new stream"""
+        self._history = np.zeros(0, dtype=np.float32)
+        self._history_start = 0
+        self._samples_in = 0
+        self._samples_out = 0
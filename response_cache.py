@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict, Counter
+
+# Off by default: a cached reply ignores the rest of the conversation
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "0") == "1"
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+# Meitei vowel signs are combining marks, which \w does not cover
+_NOT_WORD = re.compile("[^\\w\uABC0-\uABFF\uAAE0-\uAAFF]+|_+")
+_DIGITS = re.compile(r"\d+")
+_REPEATS = re.compile(r"(.)\1{2,}")
+# Words whose presence or absence never changes what is asked; negations and
+# question words are deliberately not here
+_FILLER = frozenset("a an the is are was were am be s please pls plz kindly just".split())
+
+
+def normalize_query(text):
+    """Normalize a user message for matching
+
+    NFC, case-folded, punctuation and emoji dropped, and letters repeated 3+
+    times squeezed to two ("yooooo" -> "yoo").
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = _REPEATS.sub(r"\1\1", text)
+    return " ".join(_NOT_WORD.sub(" ", text).split())
+
+
+def content_words(query):
+    """The words of a normalized query that carry meaning, in order"""
+    return tuple(word for word in query.split() if word not in _FILLER)
+
+
+def char_ngrams(text, n):
+    """Character n-grams of a normalized query, padded so short words still get some"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class CachedReply:
+    """One cached chat turn
+
+    Args:
+        user_turn: The user message as it went into history (e.g. with its English translation)
+        response: The English reply added to history
+        reply: What chat() returned (the Meitei translation for Meitei input)
+    """
+
+    __slots__ = ("user_turn", "response", "reply", "query", "words", "grams", "created")
+
+    def __init__(self, user_turn, response, reply, query, words, grams, created):
+        self.user_turn = user_turn
+        self.response = response
+        self.reply = reply
+        self.query = query
+        self.words = words
+        self.grams = grams
+        self.created = created
+
+
+class ResponseCache:
+    """Chat replies keyed by normalized user text, model and system prompt
+
+    An exact match on the normalized text is a dict lookup, and by default
+    the only kind of hit. With min_similarity below 1.0, a question that
+    differs only in filler words ("what's the capital" / "what is capital")
+    can also hit: candidates sharing character n-grams come from an inverted
+    index, must have the same content words in the same order (so negations,
+    word order and "india"/"indiana" never match), and the best Dice
+    similarity at or above min_similarity wins. Numbers must match
+    exactly, so "what is 2+2" never answers "what is 2+3". Entries expire after
+    ttl_seconds, and the least recently used go once max_entries is reached.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None, min_similarity=None, ngram=None):
+        """
+        Args:
+            max_entries: Most replies kept
+            ttl_seconds: Age after which a reply is no longer served
+            min_similarity: Dice similarity of n-gram sets needed for a fuzzy hit; 1.0 (the default) means exact only
+            ngram: Character n-gram length
+        """
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+        self.min_similarity = min_similarity if min_similarity is not None else float(
+            os.getenv("RESPONSE_CACHE_SIMILARITY", "1.0"))
+        self.ngram = ngram or int(os.getenv("RESPONSE_CACHE_NGRAM", "3"))
+
+        self._entries = OrderedDict()  # key -> CachedReply
+        self._index = {}  # (context, gram) -> set of keys
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _context(query, model, system_prompt):
+        # Everything that must match exactly: model, system prompt and the numbers in the question
+        numbers = " ".join(_DIGITS.findall(query))
+        return hashlib.sha1(f"{model}|{system_prompt}|{numbers}".encode("utf-8")).hexdigest()
+
+    def get(self, text, model, system_prompt):
+        """Return a CachedReply for a matching earlier question, or None"""
+        query = normalize_query(text)
+        if not query:
+            return None
+        context = self._context(query, model, system_prompt)
+        key = (context, query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.min_similarity < 1.0:
+                key, entry = self._most_similar(context, content_words(query), char_ngrams(query, self.ngram))
+            if entry is not None and now - entry.created > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if entry.query != query:
+                self.similar_hits += 1
+            return entry
+
+    def _most_similar(self, context, words, grams):
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._index.get((context, gram), ()))
+        best_key, best_entry, best_score = None, None, self.min_similarity
+        for key, count in shared.items():
+            entry = self._entries[key]
+            if entry.words != words:
+                continue
+            score = 2 * count / (len(grams) + len(entry.grams))
+            if score >= best_score:
+                best_key, best_entry, best_score = key, entry, score
+        return best_key, best_entry
+
+    def put(self, text, model, system_prompt, user_turn, response, reply):
+        """Remember a finished turn"""
+        query = normalize_query(text)
+        if not query:
+            return
+        context = self._context(query, model, system_prompt)
+        key = (context, query)
+        grams = char_ngrams(query, self.ngram)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedReply(user_turn, response, reply, query, content_words(query),
+                                              grams, time.time())
+            for gram in grams:
+                self._index.setdefault((context, gram), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for gram in entry.grams:
+            keys = self._index.get((key[0], gram))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[(key[0], gram)]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_default_cache():
+    """Return the process-wide response cache (None unless RESPONSE_CACHE=1)"""
+    global _default_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
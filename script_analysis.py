@@ -0,0 +1,127 @@
+import re
+
+MEITEI_MAYEK = (0xABC0, 0xABFF)
+MEITEI_EXTENSIONS = (0xAAE0, 0xAAFF)
+# Input with at least this many Meitei characters is Meitei even when Latin dominates
+MIN_MEITEI_CHARS = 3
+
+_MEITEI = "[\uABC0-\uABFF\uAAE0-\uAAFF]"
+_LATIN = "[A-Za-z\u00C0-\u024F]"
+_OTHER = "[^\\W\\d_A-Za-z\u00C0-\u024F\uABC0-\uABFF\uAAE0-\uAAFF]"
+# Spaces, digits and punctuation between two letters of the same script
+_JOIN = "[\\W\\d_]+"
+# One compiled alternation matches each whole run of a script, so the Python loop
+# below only sees script changes, not words or characters
+_SCRIPT_RUNS = re.compile(
+    f"(?P<meitei>{_MEITEI}+(?:{_JOIN}{_MEITEI}+)*)"
+    f"|(?P<latin>{_LATIN}+(?:{_JOIN}{_LATIN}+)*)"
+    f"|(?P<other>{_OTHER}+(?:{_JOIN}{_OTHER}+)*)"
+)
+
+
+def is_meitei_char(char):
+    code = ord(char)
+    return MEITEI_MAYEK[0] <= code <= MEITEI_MAYEK[1] or MEITEI_EXTENSIONS[0] <= code <= MEITEI_EXTENSIONS[1]
+
+
+class ScriptAnalysis:
+    """Script runs of one text: spans plus letter counts per script
+
+    Args:
+        text: The analysed text
+        spans: (script, start, end) runs covering the text, script being "meitei", "latin" or "other"
+        counts: Characters covered by runs of each script (letters plus the gaps inside a run)
+    """
+
+    __slots__ = ("text", "spans", "counts")
+
+    def __init__(self, text, spans, counts):
+        self.text = text
+        self.spans = spans
+        self.counts = counts
+
+    @property
+    def meitei_chars(self):
+        return self.counts["meitei"]
+
+    @property
+    def is_meitei(self):
+        """Whether the text should go through Meitei translation (and be answered in Meitei)"""
+        meitei = self.counts["meitei"]
+        return meitei >= MIN_MEITEI_CHARS or (meitei > 0 and meitei >= self.counts["latin"] + self.counts["other"])
+
+    @property
+    def is_mixed(self):
+        return self.counts["meitei"] > 0 and len(self.spans) > 1
+
+    def _meitei_ranges(self):
+        """(start, end) of each Meitei span with surrounding whitespace left outside"""
+        ranges = []
+        for script, start, end in self.spans:
+            if script != "meitei":
+                continue
+            piece = self.text[start:end]
+            lead = len(piece) - len(piece.lstrip())
+            ranges.append((start + lead, start + len(piece.rstrip())))
+        return ranges
+
+    def meitei_texts(self):
+        """The Meitei pieces of the text, in order"""
+        return [self.text[start:end] for start, end in self._meitei_ranges()]
+
+    def replace_meitei(self, replacements):
+        """Rebuild the text with each Meitei piece swapped for its replacement
+
+        Args:
+            replacements: One string per meitei_texts() entry; empty ones keep the original piece
+        """
+        parts = []
+        position = 0
+        for (start, end), replacement in zip(self._meitei_ranges(), replacements):
+            parts.append(self.text[position:start])
+            parts.append(replacement or self.text[start:end])
+            position = end
+        parts.append(self.text[position:])
+        return "".join(parts)
+
+
+def analyze_scripts(text):
+    """Split text into script runs in one regex pass and count characters per script
+
+    Whitespace, digits and punctuation join the run they follow, so "ꯑꯩ ꯀꯧꯏ" is one span.
+    """
+    spans = []
+    counts = {"meitei": 0, "latin": 0, "other": 0}
+    current = None
+    start = 0
+    for match in _SCRIPT_RUNS.finditer(text or ""):
+        script = match.lastgroup
+        counts[script] += match.end() - match.start()
+        if script != current:
+            if current is not None:
+                spans.append((current, start, match.start()))
+                start = match.start()
+            current = script
+    if current is not None:
+        spans.append((current, start, len(text)))
+    return ScriptAnalysis(text, spans, counts)
+
+
+def script_spans(text):
+    """(script, start, end) runs of text; see analyze_scripts"""
+    return analyze_scripts(text).spans
+
+
+def translate_meitei_spans(text, translate_batch, analysis=None):
+    """Translate only the Meitei pieces of mixed-script text, leaving the rest untouched
+
+    Args:
+        text: Mixed Meitei/English input
+        translate_batch: Callable(list of texts) returning one translation per text
+        analysis: A ScriptAnalysis of text, if already computed
+    """
+    analysis = analysis or analyze_scripts(text)
+    pieces = analysis.meitei_texts()
+    if not pieces:
+        return text
+    return analysis.replace_meitei(translate_batch(pieces))
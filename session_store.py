@@ -0,0 +1,146 @@
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Ids the server issues for HTTP chat sessions (sent only in an httponly cookie)
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def cookie_session_id(value):
+    """Return the session id from a cookie value, or a fresh one if it is missing or not one we issue
+
+    Returns (session_id, is_new). Session ids never come from the request body,
+    so a client cannot name another user's conversation.
+    """
+    if value and _SESSION_ID.fullmatch(value):
+        return value, False
+    return secrets.token_hex(16), True
+
+
+def http_session_key(session_id):
+    """Store key for an HTTP session, kept apart from socket sids used by voice sessions"""
+    return f"http:{session_id}"
+
+
+class ChatSession:
+    """Conversation state for a single user (cookie or socket sid)"""
+
+    def __init__(self, session_id, messages):
+        self.session_id = session_id
+        self.messages = messages
+        self.lock = threading.RLock()
+        self.async_lock = None  # created lazily by the asyncio serving mode
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.accounted_bytes = 0
+
+    def size_bytes(self):
+        """Approximate memory held by this session's history"""
+        return sum(len(m.get("content") or "") for m in self.messages) * 4
+
+
+class SessionStore:
+    """Thread-safe store of chat sessions with LRU/TTL eviction and a memory cap"""
+
+    def __init__(self, history_factory, max_sessions=None, ttl_seconds=None, max_bytes=None,
+                 max_session_bytes=None):
+        """
+        Initialize the session store
+
+        Args:
+            history_factory: Callable returning a fresh message list (e.g. with the system prompt)
+            max_sessions: Maximum number of live sessions before LRU eviction
+            ttl_seconds: Idle time after which a session is discarded
+            max_bytes: Approximate memory cap across all sessions
+            max_session_bytes: Approximate memory cap for a single session's history
+        """
+        self.history_factory = history_factory
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX_COUNT", "5000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+        self.max_bytes = max_bytes or int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+        self.max_session_bytes = max_session_bytes or int(os.getenv("SESSION_MAX_SESSION_BYTES", str(512 * 1024)))
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.evictions = 0
+
+    def get(self, session_id):
+        """Return the session for session_id, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_access > self.ttl_seconds:
+                self._remove_locked(session_id)
+                self.evictions += 1
+                session = None
+
+            if session is None:
+                session = ChatSession(session_id, self.history_factory())
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+
+            session.last_access = now
+            self._evict_locked(now)
+            return session
+
+    def discard(self, session_id):
+        """Drop a session (e.g. on socket disconnect)"""
+        with self._lock:
+            self._remove_locked(session_id)
+
+    def touch(self, session):
+        """Enforce the per-session and global memory caps after a turn completes"""
+        with session.lock:
+            self._trim_session(session)
+            size = session.size_bytes()
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._total_bytes += size - session.accounted_bytes
+                session.accounted_bytes = size
+            self._evict_locked(time.monotonic())
+
+    def _trim_session(self, session):
+        """Drop the oldest non-system turns until the session fits its cap"""
+        messages = session.messages
+        start = 1 if messages and messages[0].get("role") == "system" else 0
+        while session.size_bytes() > self.max_session_bytes and len(messages) > start + 1:
+            del messages[start]
+
+    def _remove_locked(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._total_bytes -= session.accounted_bytes
+        return session
+
+    def _evict_locked(self, now):
+        """Evict expired sessions, then least recently used ones over the caps"""
+        # The dict is kept in access order, so expired sessions sit at the front
+        while self._sessions:
+            sid, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_access <= self.ttl_seconds:
+                break
+            self._remove_locked(sid)
+            self.evictions += 1
+
+        while len(self._sessions) > self.max_sessions or (
+                self._total_bytes > self.max_bytes and len(self._sessions) > 1):
+            self._remove_locked(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def stats(self):
+        """Return session counts and approximate memory usage"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
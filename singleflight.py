@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future
+
+_groups = {}
+_registry_lock = threading.Lock()
+
+
+class SingleFlight:
+    """Deduplicate identical in-flight calls
+
+    While a call for a key is running, later callers with the same key wait for
+    it and get the same result (or exception) instead of repeating the work.
+    Nothing is kept once the call finishes; caching is a separate concern.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Return func(*args, **kwargs), sharing one execution among concurrent callers with the same key"""
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.executions += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            shared = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": shared,
+                "coalescing_ratio": shared / self.calls if self.calls else 0.0,
+                "in_flight": len(self._inflight),
+            }
+
+
+def get_group(name):
+    """Return the process-wide single-flight group for one kind of call"""
+    group = _groups.get(name)
+    if group is None:
+        with _registry_lock:
+            group = _groups.get(name)
+            if group is None:
+                group = SingleFlight(name)
+                _groups[name] = group
+    return group
+
+
+def all_stats():
+    """Stats of every group, by name"""
+    with _registry_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,270 @@
+import os
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from resampling import StreamingResampler
+from vad import frame_levels_db, spectral_features, MIN_BAND_RATIO, MAX_FLATNESS
+
+# Endpointing defaults (milliseconds / seconds), tunable per deployment
+ENDPOINT_SILENCE_MS = int(os.getenv("ASR_STREAM_ENDPOINT_MS", "700"))
+PAUSE_MS = int(os.getenv("ASR_STREAM_PAUSE_MS", "300"))
+MIN_SEGMENT_SECONDS = float(os.getenv("ASR_STREAM_MIN_SEGMENT_SECONDS", "2.0"))
+MAX_SEGMENT_SECONDS = float(os.getenv("ASR_STREAM_MAX_SEGMENT_SECONDS", "12.0"))
+PARTIAL_INTERVAL_SECONDS = float(os.getenv("ASR_STREAM_PARTIAL_SECONDS", "1.0"))
+# A partial re-transcribes at most this much trailing audio of the segment in progress
+PARTIAL_WINDOW_SECONDS = float(os.getenv("ASR_STREAM_PARTIAL_WINDOW_SECONDS", "4.0"))
+BUFFER_SECONDS = float(os.getenv("ASR_STREAM_BUFFER_SECONDS", "30"))
+
+# Concurrent streaming sessions to provision for. Each has at most a partial and a segment or two
+# waiting on the recognizer (with ASR_WORKERS those waits are micro-batched across sessions), so
+# one shared worker would queue every user behind the others.
+STREAM_SESSIONS = int(os.getenv("ASR_STREAM_SESSIONS", "16"))
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("ASR_STREAM_WORKERS", str(2 * STREAM_SESSIONS))),
+                               thread_name_prefix="asr-stream")
+
+
+def decode_pcm_frame(payload, encoding="s16le"):
+    """Turn a socket audio frame (raw bytes or base64 text) into float32 samples"""
+    if isinstance(payload, str):
+        payload = base64.b64decode(payload)
+    if encoding == "f32le":
+        return np.frombuffer(payload, dtype="<f4").astype(np.float32, copy=False)
+    return np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self.total = 0  # samples written since creation
+
+    def write(self, samples):
+        if samples.size > self.capacity:
+            # Only the newest `capacity` samples can be kept
+            self.total += samples.size - self.capacity
+            samples = samples[-self.capacity:]
+        pos = self.total % self.capacity
+        first = min(samples.size, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[:samples.size - first] = samples[first:]
+        self.total += samples.size
+
+    def read(self, start, end):
+        """Copy samples [start, end); anything already overwritten is skipped"""
+        start = max(start, self.total - self.capacity, 0)
+        end = min(end, self.total)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        return np.take(self._data, np.arange(start, end) % self.capacity)
+
+
+class EnergyEndpointer:
+    """Frame-level speech/silence decisions against an adaptive noise floor
+
+    Uses the same energy and spectral-shape features as vad.detect_speech, so
+    steady noise that is loud but flat does not open an utterance.
+    """
+
+    def __init__(self, sample_rate, margin_db=12.0, min_speech_db=-45.0):
+        """
+        Args:
+            sample_rate: Rate of the frames being classified
+            margin_db: How far above the noise floor a frame must be to count as speech
+            min_speech_db: Absolute level (dBFS) below which a frame is never speech
+        """
+        self.sample_rate = sample_rate
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.noise_floor = None
+
+    def classify(self, frames):
+        """Return a bool array, one per row of frames (n_frames, frame_len)"""
+        levels = frame_levels_db(frames)
+        band_ratio, flatness = spectral_features(frames, self.sample_rate)
+        voiced = (band_ratio >= MIN_BAND_RATIO) & (flatness <= MAX_FLATNESS)
+        decisions = np.empty(len(levels), dtype=bool)
+        for i, level in enumerate(levels):
+            if self.noise_floor is None or level < self.noise_floor:
+                self.noise_floor = level
+            decisions[i] = voiced[i] and level > max(self.noise_floor + self.margin_db, self.min_speech_db)
+            if not decisions[i]:
+                # Let the floor drift up slowly so it tracks background noise changes
+                self.noise_floor += (level - self.noise_floor) * 0.05
+        return decisions
+
+
+class StreamingTranscriber:
+    """Per-session streaming ASR with pause-based segmentation and endpointing
+
+    Audio frames are resampled into a ring buffer. While the user speaks, the
+    utterance so far is transcribed in the background for partial results, and
+    every short pause after MIN_SEGMENT_SECONDS of speech commits a segment whose
+    transcription starts right away. When the trailing silence reaches the endpoint,
+    only the last segment is still left to recognize before the final transcript.
+
+    A partial covers the committed segments plus at most PARTIAL_WINDOW_SECONDS of
+    the segment in progress (marked with a leading "..." when cut), so its cost
+    does not grow with the segment. Callbacks run on executor threads, never
+    while the transcriber's lock is held.
+    """
+
+    def __init__(self, transcribe, sample_rate, on_partial, on_final, input_rate=None,
+                 frame_ms=20, executor=None):
+        """
+        Args:
+            transcribe: Callable(float32 samples at sample_rate) -> text
+            sample_rate: Rate the recognizer expects
+            on_partial: Callable(text) for interim transcripts
+            on_final: Callable(text) once an utterance is complete
+            input_rate: Rate of incoming frames (defaults to sample_rate)
+            frame_ms: Endpointing frame length
+            executor: Executor running transcription jobs (defaults to the shared one)
+        """
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.input_rate = input_rate or sample_rate
+        self.executor = executor or _executor
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.resampler = StreamingResampler(self.input_rate, sample_rate)
+        self.buffer = AudioRingBuffer(sample_rate * BUFFER_SECONDS)
+        self.endpointer = EnergyEndpointer(sample_rate)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._processed = 0  # absolute index of the next frame to classify
+        self._lock = threading.Lock()
+        self._utterance_id = 0
+        self._finished = []  # segment futures of utterances endpointed under the lock
+        self._reset_utterance()
+
+    def _reset_utterance(self):
+        self.in_speech = False
+        self._speech_frames = 0
+        self._silence = 0
+        self._segment_start = 0
+        self._last_partial = 0
+        self._partial_in_flight = False
+        self._segments = []  # futures for committed segments, in order
+        self._utterance_id += 1
+
+    def feed(self, samples):
+        """Add input-rate float32 samples and advance endpointing"""
+        with self._lock:
+            resampled = self.resampler.process(samples)
+            self.buffer.write(resampled)
+            self._pending = np.concatenate((self._pending, resampled))
+            n_frames = len(self._pending) // self.frame_len
+            if n_frames:
+                frames = self._pending[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+                self._pending = self._pending[n_frames * self.frame_len:]
+                for is_speech in self.endpointer.classify(frames):
+                    self._processed += self.frame_len
+                    self._step(is_speech, self._processed)
+            finished, self._finished = self._finished, []
+        self._watch_finals(finished)
+
+    def finish(self):
+        """End of stream: finalize whatever utterance is in progress"""
+        with self._lock:
+            tail = self.resampler.flush()
+            self.buffer.write(tail)
+            self._pending = np.zeros(0, dtype=np.float32)
+            if self.in_speech:
+                self._finalize(self.buffer.total)
+            finished, self._finished = self._finished, []
+        self._watch_finals(finished)
+
+    def _step(self, is_speech, end):
+        onset_frames = 2
+        if not self.in_speech:
+            self._speech_frames = self._speech_frames + 1 if is_speech else 0
+            if self._speech_frames >= onset_frames:
+                self.in_speech = True
+                self._silence = 0
+                # Keep a little pre-roll so the first phoneme is not clipped
+                preroll = (onset_frames + 10) * self.frame_len
+                self._segment_start = max(end - preroll, 0)
+                self._last_partial = end
+            return
+
+        self._silence = 0 if is_speech else self._silence + self.frame_len
+        speech_end = end - self._silence
+        segment_length = speech_end - self._segment_start
+        if self._silence >= self.sample_rate * ENDPOINT_SILENCE_MS // 1000:
+            self._finalize(speech_end + self.sample_rate * PAUSE_MS // 2000)
+        elif (self._silence >= self.sample_rate * PAUSE_MS // 1000
+              and segment_length >= self.sample_rate * MIN_SEGMENT_SECONDS) \
+                or segment_length >= self.sample_rate * MAX_SEGMENT_SECONDS:
+            self._commit_segment(speech_end + self._silence // 2)
+        elif end - self._last_partial >= self.sample_rate * PARTIAL_INTERVAL_SECONDS \
+                and not self._partial_in_flight:
+            self._last_partial = end
+            self._submit_partial(end)
+
+    def _commit_segment(self, cut):
+        audio = self.buffer.read(self._segment_start, cut)
+        self._segment_start = cut
+        self._segments.append(self.executor.submit(self._safe_transcribe, audio))
+
+    def _submit_partial(self, end):
+        start = max(self._segment_start, end - int(self.sample_rate * PARTIAL_WINDOW_SECONDS))
+        cut = start > self._segment_start
+        audio = self.buffer.read(start, end)
+        segments = list(self._segments)
+        utterance_id = self._utterance_id
+        self._partial_in_flight = True
+
+        def run():
+            try:
+                tail = self._safe_transcribe(audio)
+                # Completed segments first, then the in-progress tail
+                done = [f.result() for f in segments if f.done()]
+                with self._lock:
+                    stale = utterance_id != self._utterance_id
+                    self._partial_in_flight = False
+                if not stale:
+                    text = " ".join(t for t in done + ["..." + tail if cut and tail else tail] if t)
+                    if text:
+                        self.on_partial(text)
+            except Exception as e:
+                print(f"Error in partial transcription: {e}")
+
+        self.executor.submit(run)
+
+    def _finalize(self, cut):
+        self._commit_segment(cut)
+        # on_final is hooked up by feed()/finish() once the lock is released: a segment
+        # that is already done runs its callback at once, on the calling thread
+        self._finished.append(self._segments)
+        self._reset_utterance()
+
+    def _watch_finals(self, finished):
+        """Call on_final for each finished utterance once all its segments are transcribed"""
+        for segments in finished:
+            fired = threading.Event()
+            fired_lock = threading.Lock()
+
+            def maybe_fire(_future, segments=segments, fired=fired, fired_lock=fired_lock):
+                if not all(f.done() for f in segments):
+                    return
+                with fired_lock:
+                    if fired.is_set():
+                        return
+                    fired.set()
+                text = " ".join(t for t in (f.result() for f in segments) if t)
+                self.on_final(text)
+
+            for future in segments:
+                future.add_done_callback(maybe_fire)
+
+    def _safe_transcribe(self, audio):
+        if audio.size == 0:
+            return ""
+        try:
+            return (self.transcribe(audio) or "").strip()
+        except Exception as e:
+            print(f"Error transcribing stream segment: {e}")
+            return ""
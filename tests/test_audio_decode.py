@@ -0,0 +1,45 @@
+import sys
+import numpy as np
+import audio_decode
+from resampling import resample, StreamingResampler
+
+# Stands in for ffmpeg: records its arguments and writes one second of a 48 kHz tone as float32 AU
+FAKE_FFMPEG = """#!{python}
+import sys, struct
+import numpy as np
+sys.stdin.buffer.read()
+open({args_path!r}, "w").write(" ".join(sys.argv[1:]))
+samples = np.sin(2 * np.pi * 440 * np.arange(48000) / 48000).astype(">f4")
+annotation = b"\\0" * 8
+header = struct.pack(">6I", 0x2E736E64, 24 + len(annotation), 0xFFFFFFFF, 6, 48000, 1)
+sys.stdout.buffer.write(header + annotation + samples.tobytes())
+"""
+
+
+def fake_ffmpeg(tmp_path, monkeypatch):
+    args_path = tmp_path / "args.txt"
+    script = tmp_path / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, args_path=str(args_path)))
+    script.chmod(0o755)
+    monkeypatch.setattr(audio_decode, "_ffmpeg_path", str(script))
+    return args_path
+
+
+def test_ffmpeg_decodes_at_native_rate_and_resamples_here(tmp_path, monkeypatch):
+    args_path = fake_ffmpeg(tmp_path, monkeypatch)
+
+    samples = audio_decode.decode_audio(b"\x1aE\xdf\xa3 webm bytes", 16000)
+
+    assert "-ar" not in args_path.read_text().split()
+    tone = np.sin(2 * np.pi * 440 * np.arange(48000) / 48000).astype(np.float32)
+    np.testing.assert_allclose(samples, resample(tone, 48000, 16000), atol=1e-6)
+    assert samples.dtype == np.float32
+    assert len(samples) == 16000
+
+
+def test_streaming_resampler_passes_same_rate_through():
+    resampler = StreamingResampler(16000, 16000)
+    chunk = np.linspace(-1, 1, 320, dtype=np.float32)
+
+    np.testing.assert_array_equal(resampler.process(chunk), chunk)
+    assert resampler.flush().size == 0
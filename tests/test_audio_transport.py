@@ -0,0 +1,28 @@
+import base64
+
+import pytest
+
+import audio_transport
+from audio_transport import tts_audio_fields
+
+WAV_BASE64 = base64.b64encode(b"RIFF\x24\x00\x00\x00WAVEfmt ").decode("ascii")
+
+
+@pytest.mark.parametrize("audio_format", [None, "base64", "mp3"])
+def test_base64_branch_names_its_format(monkeypatch, audio_format):
+    monkeypatch.setattr(audio_transport, "DEFAULT_AUDIO_FORMAT", "base64")
+    assert tts_audio_fields(WAV_BASE64, audio_format) == {'audio_data': WAV_BASE64, 'format': 'base64'}
+
+
+def test_missing_audio_still_names_a_format():
+    assert tts_audio_fields(None, "wav") == {'audio_data': None, 'format': 'base64'}
+
+
+def test_wav_sends_bytes():
+    fields = tts_audio_fields(WAV_BASE64, "wav")
+    assert fields == {'audio_data': base64.b64decode(WAV_BASE64), 'format': 'wav'}
+
+
+def test_opus_without_ffmpeg_falls_back_to_wav(monkeypatch):
+    monkeypatch.setattr(audio_transport, "ffmpeg_path", lambda: None)
+    assert tts_audio_fields(WAV_BASE64, "opus")['format'] == 'wav'
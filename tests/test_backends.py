@@ -0,0 +1,68 @@
+import gc
+import time
+import threading
+
+import pytest
+import requests
+
+from generative.backends import ChatBackend
+from generative.local_server import LocalLLMServer, ReplayModel
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def server():
+    server = LocalLLMServer(model=ReplayModel(replies=["One two three four."]), ttft_ms=0, token_ms=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def backend(server):
+    return ChatBackend(f"test_{time.monotonic_ns()}", server.url, "key", timeout=1, max_concurrency=1)
+
+
+def test_stream_and_complete_return_the_reply(backend):
+    assert backend.stream(MESSAGES, "m").collect() == "One two three four."
+    assert backend.complete(MESSAGES, "m") == "One two three four."
+
+
+def test_unread_stream_holds_no_slot(backend, server):
+    backend.stream(MESSAGES, "m")
+    gc.collect()
+    # With one slot, a leaked one would make this wait for the timeout and raise
+    assert backend.complete(MESSAGES, "m") == "One two three four."
+    assert server.requests == 1
+
+
+def test_partly_read_stream_releases_its_slot_on_close(backend):
+    stream = backend.stream(MESSAGES, "m")
+    next(iter(stream))
+    stream.close()
+    assert backend.complete(MESSAGES, "m") == "One two three four."
+
+
+def test_busy_slots_time_out(backend):
+    stream = backend.stream(MESSAGES, "m")
+    tokens = iter(stream)
+    next(tokens)
+    with pytest.raises(requests.Timeout):
+        backend.complete([{"role": "user", "content": "other"}], "m")
+    stream.close()
+
+
+def test_stream_timing_starts_when_the_request_is_sent(backend):
+    holder = backend.stream(MESSAGES, "m")
+    next(iter(holder))  # takes the only slot
+    threading.Timer(0.5, holder.close).start()
+    stream = backend.stream(MESSAGES, "m")
+    time.sleep(0.2)
+
+    waited = time.perf_counter()
+    assert stream.collect() == "One two three four."
+    assert time.perf_counter() - waited >= 0.2
+    # Neither the time before the first read nor the wait for the slot counts
+    metrics = stream.metrics()
+    assert metrics["ttft"] < 0.2
+    assert metrics["total"] < 0.2
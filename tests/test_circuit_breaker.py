@@ -0,0 +1,157 @@
+import threading
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs):
+    options = dict(window=4, min_calls=4, error_threshold=0.5, slow_call_seconds=5,
+                   slow_threshold=0.9, open_seconds=30)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def trip(breaker):
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def test_trips_on_error_rate_and_rejects_while_open(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_trips_on_slow_calls(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True, 6, breaker.allow())
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+    trial = breaker.allow()
+    assert trial and trial.trial
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, 0.1, trial)
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def test_call_started_before_the_trip_cannot_close_the_breaker(clock):
+    breaker = make_breaker()
+    slow = breaker.allow()
+    trip(breaker)
+    clock.now += 31
+    trial = breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # The old call finishes successfully while the breaker is half-open
+    breaker.record(True, 0.1, slow)
+    assert breaker.state == HALF_OPEN
+    breaker.record(False, 0.1, trial)
+    assert breaker.state == OPEN
+
+
+def test_only_the_probe_decides_while_half_open(clock):
+    probed = threading.Event()
+    release = threading.Event()
+
+    def probe():
+        probed.set()
+        release.wait(5)
+        return True
+
+    breaker = make_breaker(probe=probe)
+    trip(breaker)
+    clock.now += 31
+    assert not breaker.allow()  # the probe is the trial; real calls are held back
+    assert probed.wait(5)
+    breaker.record(True, 0.1)
+    assert breaker.state == HALF_OPEN
+    release.set()
+    for _ in range(100):
+        if breaker.state == CLOSED:
+            break
+        threading.Event().wait(0.01)
+    assert breaker.state == CLOSED
+
+
+def test_outcomes_from_an_earlier_closed_period_are_ignored(clock):
+    breaker = make_breaker()
+    stale = [breaker.allow() for _ in range(4)]
+    trip(breaker)
+    clock.now += 31
+    breaker.record(True, 0.1, breaker.allow())
+    assert breaker.state == CLOSED
+    for ticket in stale:
+        breaker.record(False, 0.1, ticket)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["calls"] == 0
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, GeneratorExit])
+def test_base_exception_in_trial_releases_it_as_a_failure(clock, error):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+
+    def interrupted():
+        raise error()
+
+    with pytest.raises(error):
+        breaker.call(interrupted)
+    assert breaker.state == OPEN
+    # Not wedged in HALF_OPEN: after the next cool-down a new trial goes through
+    clock.now += 31
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_guarded_request_releases_an_interrupted_trial(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+
+    def send():
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        circuit_breaker.guarded_request(breaker, send)
+    assert breaker.state == OPEN
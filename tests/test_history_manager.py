@@ -0,0 +1,51 @@
+import threading
+
+from history_manager import HistoryManager, estimate_message_tokens
+
+
+def conversation(turns, words=40):
+    messages = [{"role": "system", "content": "You are helpful."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}. " + "word " * words})
+        messages.append({"role": "assistant", "content": f"Answer {i}. " + "word " * words})
+    return messages
+
+
+def test_short_history_is_sent_unchanged():
+    manager = HistoryManager(token_budget=3000, summary_token_budget=100)
+    messages = conversation(2)
+    window, stats = manager.build_with_stats(messages)
+    assert window == messages
+    assert stats["saved_tokens"] == 0 and stats["folded_messages"] == 0
+
+
+def test_long_history_is_folded_into_a_summary_within_budget():
+    manager = HistoryManager(token_budget=400, summary_token_budget=100)
+    messages = conversation(20)
+    window, stats = manager.build_with_stats(messages)
+    assert window[0] == messages[0]
+    assert window[1]["content"].startswith("Summary of the earlier conversation:")
+    assert window[-1] == messages[-1]
+    assert sum(estimate_message_tokens(m) for m in window) <= 400
+    assert stats["folded_messages"] > 0
+    assert stats["sent_tokens"] + stats["saved_tokens"] == stats["full_tokens"]
+
+
+def test_totals_are_exact_under_concurrent_builds():
+    manager = HistoryManager(token_budget=400, summary_token_budget=100)
+    histories = [conversation(10 + i) for i in range(8)]
+    expected = sum(manager.build_with_stats(h)[1]["saved_tokens"] for h in histories)
+    manager = HistoryManager(token_budget=400, summary_token_budget=100)
+
+    def worker():
+        for history in histories * 25:
+            manager.build(history)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = manager.stats()
+    assert stats["requests"] == 8 * 25 * 8
+    assert stats["saved_tokens"] == expected * 25 * 8
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+import pytest
+import requests
+
+pytest.importorskip("torch")
+pytest.importorskip("N7Speech")
+
+import meitei_chat_system
+from meitei_chat_system import MeiteiChatSystem
+from generative.streaming import CompletionStream
+from history_manager import HistoryManager
+
+
+def fake_system(monkeypatch, tokens):
+    """A MeiteiChatSystem that streams `tokens` as the reply and tags translations"""
+    system = MeiteiChatSystem.__new__(MeiteiChatSystem)
+    system.messages = []
+    monkeypatch.setattr(system, "_iter_stream_tokens", lambda messages, metrics=None: iter(tokens))
+    monkeypatch.setattr(meitei_chat_system, "en_to_mni", lambda text: f"<{text}>")
+    return system
+
+
+def test_meitei_reply_keeps_table_and_paragraph_lines(monkeypatch):
+    reply = "Here are the prices.\n\n| Item | Cost |\n|---|---|\n| Tea | 10 |\n| Rice | 40 |\n\nEnjoy your meal!"
+    system = fake_system(monkeypatch, [reply[i:i + 5] for i in range(0, len(reply), 5)])
+    messages = [{"role": "user", "content": "prices?"}]
+
+    translated, completed = system._meitei_reply(messages)
+
+    assert completed
+    assert translated == ("<Here are the prices.>\n\n<| Item | Cost |>\n|---|---|\n<| Tea | 10 |>\n"
+                          "<| Rice | 40 |>\n\n<Enjoy your meal!>")
+    assert messages[-1] == {"role": "assistant", "content": reply}
+
+
+def test_stream_chat_with_errors_keeps_the_apology_out_of_history(monkeypatch):
+    def broken(messages, metrics=None):
+        raise requests.ConnectionError("groq unreachable")
+        yield
+
+    system = fake_system(monkeypatch, [])
+    monkeypatch.setattr(system, "_iter_stream_tokens", broken)
+    messages = []
+    errors = []
+
+    spoken = "".join(system.stream_chat("hello there", messages, errors))
+
+    assert spoken.startswith("I'm sorry")
+    assert [str(e) for e in errors] == ["groq unreachable"]
+    assert messages == [{"role": "user", "content": "hello there"}]
+
+
+def test_meitei_reply_returns_its_timeline_per_call(monkeypatch):
+    system = fake_system(monkeypatch, ["Hello there, friend. ", "Bye now."])
+    metrics = {}
+
+    system._meitei_reply([{"role": "user", "content": "hi"}], metrics)
+
+    stages = [entry["stage"] for entry in metrics["timeline"]]
+    assert stages[0] == "english" and "translate" in stages
+    assert not hasattr(system, "last_turn_timeline")
+
+
+class FakeBackend:
+    """Streams a fixed SSE body through the real CompletionStream"""
+
+    def stream(self, messages, model, on_complete=None):
+        content = json.dumps({"choices": [{"delta": {"content": "Hi"}}]})
+        return CompletionStream([f"data: {content}\n\ndata: [DONE]\n\n".encode()], on_complete=on_complete)
+
+
+def test_stream_metrics_are_returned_per_call():
+    system = MeiteiChatSystem.__new__(MeiteiChatSystem)
+    system.backend = FakeBackend()
+    system.history = HistoryManager()
+    system.model = "test"
+    first, second = {}, {}
+
+    "".join(system._stream_turn([{"role": "user", "content": "a"}], metrics=first))
+    "".join(system._stream_turn([{"role": "user", "content": "b"}], metrics=second))
+
+    assert first["stream"]["tokens"] == 1 and second["stream"]["tokens"] == 1
+    assert first["stream"] is not second["stream"]
+    assert not hasattr(system, "last_stream_metrics")
+
+
+def test_vad_metrics_are_returned_per_call(monkeypatch):
+    system = MeiteiChatSystem.__new__(MeiteiChatSystem)
+    system.asr_sample_rate = 16000
+    monkeypatch.setattr(meitei_chat_system, "VAD_ENABLED", True)
+    monkeypatch.setattr(meitei_chat_system, "decode_audio", lambda data, rate: np.zeros(16000, dtype=np.float32))
+    metrics = {}
+
+    assert system.transcribe_audio_data(b"RIFF silence", metrics) == ""
+    assert metrics["vad"]["has_speech"] is False
+    assert not hasattr(system, "last_vad")
@@ -0,0 +1,75 @@
+import pytest
+
+from response_cache import ResponseCache, normalize_query
+
+MODEL = "model"
+PROMPT = "system prompt"
+
+NEAR_MISSES = [
+    "what is the capital of indiana",
+    "what is not the capital of india",
+    "is the capital of India what",
+    "what was the capital of india before",
+]
+
+
+def cache_with(question, reply, **kwargs):
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, **kwargs)
+    cache.put(question, MODEL, PROMPT, question, reply, reply)
+    return cache
+
+
+def test_exact_match_ignores_case_punctuation_and_repeats():
+    cache = cache_with("What is the capital of India?", "New Delhi")
+    assert cache.get("what is the capital of india", MODEL, PROMPT).reply == "New Delhi"
+    assert cache.get("WHAT is the capital of Indiaaaa!!", MODEL, PROMPT) is None
+    assert normalize_query("Yooooo!!") == "yoo"
+
+
+@pytest.mark.parametrize("similarity", [None, 0.85, 0.5])
+@pytest.mark.parametrize("question", NEAR_MISSES)
+def test_near_miss_questions_never_hit(question, similarity):
+    cache = cache_with("What is the capital of India?", "New Delhi", min_similarity=similarity)
+    assert cache.get(question, MODEL, PROMPT) is None
+
+
+def test_exact_only_by_default():
+    cache = cache_with("What is the capital of India?", "New Delhi")
+    assert cache.min_similarity == 1.0
+    assert cache.get("what's the capital of india", MODEL, PROMPT) is None
+
+
+def test_fuzzy_hit_on_filler_words_only():
+    cache = cache_with("What is the capital of India?", "New Delhi", min_similarity=0.7)
+    hit = cache.get("What's the capital of India", MODEL, PROMPT)
+    assert hit is not None and hit.reply == "New Delhi"
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_numbers_model_and_prompt_must_match():
+    cache = cache_with("what is 2+2", "4", min_similarity=0.5)
+    assert cache.get("what is 2+3", MODEL, PROMPT) is None
+    assert cache.get("what is 2+2", "other-model", PROMPT) is None
+    assert cache.get("what is 2+2", MODEL, "other prompt") is None
+    assert cache.get("what is 2+2", MODEL, PROMPT).reply == "4"
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    import response_cache
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = cache_with("hello", "hi")
+    now[0] += 61
+    assert cache.get("hello", MODEL, PROMPT) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    for question in ("one", "two"):
+        cache.put(question, MODEL, PROMPT, question, question, question)
+    cache.get("one", MODEL, PROMPT)
+    cache.put("three", MODEL, PROMPT, "three", "three", "three")
+    assert cache.get("two", MODEL, PROMPT) is None
+    assert cache.get("one", MODEL, PROMPT) is not None
+    assert cache.get("three", MODEL, PROMPT) is not None
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+import session_store
+from session_store import SessionStore, cookie_session_id, http_session_key
+
+
+def new_history():
+    return [{"role": "system", "content": "prompt"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_sessions_are_isolated_and_reused():
+    store = SessionStore(new_history, max_sessions=10)
+    alice, bob = store.get("alice"), store.get("bob")
+    alice.messages.append({"role": "user", "content": "hi"})
+    assert store.get("alice") is alice
+    assert bob.messages == new_history()
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(new_history, max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert store.get("a") is first
+    assert store.stats()["evictions"] >= 1
+    assert len(store) == 2
+
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(new_history, ttl_seconds=60)
+    old = store.get("a")
+    clock[0] += 61
+    assert store.get("a") is not old
+
+
+def test_session_history_is_trimmed_to_its_cap_keeping_the_system_prompt():
+    store = SessionStore(new_history, max_session_bytes=400)
+    session = store.get("a")
+    for i in range(20):
+        session.messages.append({"role": "user", "content": f"message {i} " + "x" * 20})
+    store.touch(session)
+    assert session.messages[0]["role"] == "system"
+    assert session.size_bytes() <= 400
+    assert session.messages[-1]["content"].startswith("message 19")
+
+
+def test_memory_cap_evicts_other_sessions():
+    store = SessionStore(new_history, max_bytes=1000, max_session_bytes=10 ** 6)
+    for name in ("a", "b", "c"):
+        session = store.get(name)
+        session.messages.append({"role": "user", "content": "x" * 100})
+        store.touch(session)
+    assert store.stats()["bytes"] <= 1000
+    assert len(store) < 3
+
+
+def test_concurrent_gets_create_one_session_per_id():
+    store = SessionStore(new_history, max_sessions=1000)
+    seen = []
+
+    def worker():
+        for i in range(200):
+            seen.append((i % 20, store.get(f"user{i % 20}")))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    by_id = {}
+    for key, session in seen:
+        by_id.setdefault(key, set()).add(id(session))
+    assert all(len(ids) == 1 for ids in by_id.values())
+    assert len(store) == 20
+
+
+def test_cookie_session_id_only_accepts_ids_the_server_issues():
+    issued, new = cookie_session_id(None)
+    assert new and len(issued) == 32
+    assert cookie_session_id(issued) == (issued, False)
+    for forged in ("", "alice", "../etc", issued.upper(), issued + "0"):
+        session_id, new = cookie_session_id(forged)
+        assert new and session_id != forged
+    assert http_session_key(issued) != issued
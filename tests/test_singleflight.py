@@ -0,0 +1,91 @@
+import time
+import threading
+
+import pytest
+
+from singleflight import SingleFlight, get_group, all_stats
+
+
+def run_concurrently(group, key, func, callers):
+    """Start `callers` threads calling group.do(key, func); returns (threads, results, errors)"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(group.do(key, func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for_followers(group, count):
+    """Block until `count` callers beyond the leader have joined the in-flight call"""
+    while group.stats()["calls"] < count + 1:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    group = SingleFlight("test")
+    release = threading.Event()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        release.wait(5)
+        return "audio"
+
+    threads, results, errors = run_concurrently(group, "key", slow, 5)
+    wait_for_followers(group, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["audio"] * 5
+    assert errors == []
+    assert len(executions) == 1
+    stats = group.stats()
+    assert stats["executions"] == 1
+    assert stats["shared"] == 4
+    assert stats["coalescing_ratio"] == pytest.approx(0.8)
+    assert stats["in_flight"] == 0
+
+
+def test_failure_reaches_every_waiter_and_is_not_kept():
+    group = SingleFlight("test")
+    release = threading.Event()
+
+    def broken():
+        release.wait(5)
+        raise RuntimeError("synthesis failed")
+
+    threads, results, errors = run_concurrently(group, "key", broken, 3)
+    wait_for_followers(group, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert [str(e) for e in errors] == ["synthesis failed"] * 3
+    # The failed call is forgotten: the next caller runs the work again
+    assert group.do("key", lambda: "retried") == "retried"
+    assert group.stats()["executions"] == 2
+
+
+def test_different_keys_and_sequential_calls_are_not_shared():
+    group = SingleFlight("test")
+    assert group.do("a", lambda: 1) == 1
+    assert group.do("b", lambda: 2) == 2
+    assert group.do("a", lambda: 3) == 3
+    assert group.stats()["shared"] == 0
+
+
+def test_get_group_returns_one_group_per_name():
+    group = get_group("test_singleflight")
+    assert get_group("test_singleflight") is group
+    assert get_group("test_singleflight_other") is not group
+    group.do("key", lambda: None)
+    assert all_stats()["test_singleflight"]["calls"] >= 1
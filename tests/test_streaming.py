@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+from generative.streaming import SSEParser, CompletionStream
+
+
+def delta(content):
+    return f"data: {json.dumps({'choices': [{'delta': {'content': content}}]}, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def body(*contents, done=True):
+    data = b"".join(delta(content) for content in contents)
+    return data + (b"data: [DONE]\n\n" if done else b"")
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_parser_joins_lines_split_across_chunks():
+    parser = SSEParser()
+    payloads = []
+    for chunk in split_every(body("Hello", " world"), 3):
+        payloads.extend(parser.feed(chunk))
+    assert [json.loads(p)["choices"][0]["delta"]["content"] for p in payloads[:2]] == ["Hello", " world"]
+    assert payloads[2] == b"[DONE]"
+
+
+def test_parser_handles_crlf_multiline_data_and_skips_other_fields():
+    parser = SSEParser()
+    events = parser.feed(b": keep-alive\r\nevent: message\r\nid: 7\r\ndata: first\r\ndata:second\r\n\r\n")
+    assert events == [b"first\nsecond"]
+
+
+def test_parser_close_flushes_unterminated_event():
+    parser = SSEParser()
+    assert parser.feed(b"data: tail") == []
+    assert parser.close() == [b"tail"]
+
+
+def test_stream_survives_chunks_split_inside_utf8_sequences():
+    text = "ꯃꯤꯇꯩ ꯂꯣꯟ"
+    # One-byte chunks cut every multi-byte Meitei Mayek character apart
+    stream = CompletionStream(split_every(body(*text.split(" ")), 1))
+    assert stream.collect() == "ꯃꯤꯇꯩꯂꯣꯟ"
+
+
+def test_malformed_payloads_are_counted_and_skipped():
+    data = delta("ok") + b"data: {not json\n\n" + b"data: [1, 2]\n\n" + delta("!") + b"data: [DONE]\n\n"
+    stream = CompletionStream([data])
+    assert list(stream) == ["ok", "!"]
+    assert stream.malformed == 2
+
+
+def test_done_drains_the_rest_of_the_body():
+    read = []
+
+    def chunks():
+        for chunk in (body("a"), b"data: ignored\n\n", b": trailer\n\n"):
+            read.append(chunk)
+            yield chunk
+
+    stream = CompletionStream(chunks())
+    assert list(stream) == ["a"]
+    assert stream.done
+    assert len(read) == 3
+
+
+def test_metrics_and_hooks():
+    events = []
+    stream = CompletionStream([body("a", "b", "c")], started=0.0,
+                              on_first_token=lambda s: events.append("first"),
+                              on_complete=lambda s: events.append("complete"))
+    assert stream.collect() == "abc"
+    assert events == ["first", "complete"]
+    metrics = stream.metrics()
+    assert metrics["tokens"] == 3
+    assert metrics["ttft"] > 0
+    assert metrics["total"] >= metrics["ttft"]
+
+
+def test_close_releases_the_body_and_finishes_once():
+    closed = []
+    completed = []
+
+    def chunks():
+        try:
+            yield body("a", done=False)
+            yield body("b")
+        finally:
+            closed.append(True)
+
+    stream = CompletionStream(chunks(), on_complete=completed.append)
+    tokens = iter(stream)
+    assert next(tokens) == "a"
+    tokens.close()
+    stream.close()
+    assert closed == [True]
+    assert completed == [stream]
+
+
+def test_async_iteration():
+    async def chunks():
+        for chunk in split_every(body("x", "y"), 5):
+            yield chunk
+
+    async def collect():
+        stream = CompletionStream(chunks())
+        return [token async for token in stream], stream
+
+    tokens, stream = asyncio.run(collect())
+    assert tokens == ["x", "y"]
+    assert stream.done
+    assert stream.finished_at is not None
@@ -0,0 +1,81 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+import streaming_asr
+from streaming_asr import StreamingTranscriber
+
+SR = 16000
+
+
+class InlineExecutor:
+    """Runs jobs on submit, so their futures are already done when callbacks are added
+
+    (Partial jobs take the transcriber's lock, so tests using it turn partials off.)
+    """
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+def tone(seconds, level_db=-20):
+    t = np.arange(int(seconds * SR)) / SR
+    signal = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 15))
+    return (signal * 10 ** (level_db / 20) / np.sqrt(np.mean(signal ** 2))).astype(np.float32)
+
+
+def silence(seconds):
+    return (np.random.default_rng(0).standard_normal(int(seconds * SR)) * 1e-4).astype(np.float32)
+
+
+def feed_in_frames(transcriber, audio, frame=320):
+    for i in range(0, len(audio), frame):
+        transcriber.feed(audio[i:i + frame])
+
+
+def test_on_final_runs_outside_the_lock(monkeypatch):
+    monkeypatch.setattr(streaming_asr, "PARTIAL_INTERVAL_SECONDS", 100.0)
+    held = []
+    transcriber = StreamingTranscriber(lambda audio: "hello", SR, lambda text: None,
+                                       lambda text: held.append(transcriber._lock.locked()),
+                                       executor=InlineExecutor())
+    feed_in_frames(transcriber, np.concatenate([silence(0.5), tone(1.0), silence(1.0)]))
+    assert held == [False]
+
+
+def test_partials_cover_a_bounded_window(monkeypatch):
+    monkeypatch.setattr(streaming_asr, "PARTIAL_WINDOW_SECONDS", 2.0)
+    lengths = []
+    partials = []
+    finals = []
+    done = threading.Event()
+
+    def transcribe(audio):
+        lengths.append(len(audio))
+        return "word"
+
+    def on_final(text):
+        finals.append(text)
+        done.set()
+
+    transcriber = StreamingTranscriber(transcribe, SR, partials.append, on_final,
+                                       executor=ThreadPoolExecutor(2))
+    # 8 s of speech without a pause: one segment, re-read by a partial every second
+    audio = np.concatenate([silence(0.5), tone(8.0), silence(1.0)])
+    for i in range(0, len(audio), 320):
+        transcriber.feed(audio[i:i + 320])
+        if i % (SR // 2) == 0:
+            time.sleep(0.02)  # let in-flight partials finish, as real-time input would
+    assert done.wait(5)
+
+    *partial_lengths, final_length = sorted(lengths)
+    assert len(partial_lengths) >= 3
+    assert max(partial_lengths) <= 2.0 * SR
+    assert any(text.startswith("...") for text in partials)
+    # The final transcript still covers the whole segment
+    assert final_length > 8.0 * SR
+    assert finals == ["word"]
@@ -0,0 +1,45 @@
+import pytest
+
+from TTS.text_normalizer import normalize_for_piper, normalize_for_meitei_tts, number_to_words, segment_scripts
+
+
+@pytest.mark.parametrize("text, spoken", [
+    ("1,2,3", "one,two,three"),
+    ("1,234,567 people", "one million two hundred thirty-four thousand five hundred sixty-seven people"),
+    ("3.14 and 50%", "three point one four and fifty percent"),
+    ("in 2024, 5 left", "in two thousand twenty-four, five left"),
+    ("v2.0.1 is out", "v2.0.1 is out"),
+    ("use v2 today", "use v2 today"),
+    ("upgrade to 2.0.1.", "upgrade to 2.0.1."),
+    ("ping 192.168.0.1", "ping 192.168.0.1"),
+])
+def test_piper_numbers(text, spoken):
+    assert normalize_for_piper(text) == spoken
+
+
+def test_piper_strips_markup_and_emoji():
+    text = "**Hi** 😀 see [the docs](https://example.com) <b>now</b> ```code```"
+    assert normalize_for_piper(text) == "Hi  see the docs now"
+
+
+def test_link_text_is_cleaned_like_the_rest_of_the_reply():
+    assert normalize_for_piper("(see **[the *docs*](https://example.com)**)") == "(see the docs)"
+    assert normalize_for_meitei_tts("(see <b>x</b>) [a *b*](u) `c`") == "see x a b c"
+
+
+def test_segments_split_meitei_and_english_runs():
+    text = "ꯑꯩ **ꯀꯧꯏ** hello 2 ꯃꯇꯝ 10 ꯗꯥ!"
+    assert segment_scripts(text) == [("meitei", "ꯑꯩ ꯀꯧꯏ"), ("latin", " hello two "), ("meitei", "ꯃꯇꯝ 10 ꯗꯥ!")]
+    # Digits inside a Meitei run are not read out in English
+    assert normalize_for_piper(text) == "ꯑꯩ ꯀꯧꯏ hello two ꯃꯇꯝ 10 ꯗꯥ!"
+    assert segment_scripts("plain **English** 3") == [("latin", "plain English three")]
+    assert segment_scripts("") == []
+
+
+def test_meitei_keeps_meitei_mayek_and_basic_punctuation():
+    assert normalize_for_meitei_tts("ꯍꯥꯏ! **hello** 😀 #1") == "ꯍꯥꯏ! hello  1"
+
+
+def test_number_to_words():
+    assert number_to_words(0) == "zero"
+    assert number_to_words(1205) == "one thousand two hundred five"
@@ -0,0 +1,60 @@
+import time
+import threading
+
+from translator.batch import batch_translate
+from translator.cache import TranslationCache
+
+PAIR = ("en", "mni-Mtei")
+
+
+def test_unmappable_batch_is_translated_unit_by_unit_in_parallel_and_cached():
+    cache = TranslationCache(path="")
+    calls = []
+    threads = set()
+
+    def translate_one(unit):
+        calls.append(unit)
+        threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        return f"<{unit}>"
+
+    texts = [f"line number {i}" for i in range(5)]
+    start = time.perf_counter()
+    # The upstream merged lines, so its reply can't be mapped back to the units
+    results = batch_translate(texts, lambda joined: "one merged line", translate_one, cache=cache, lang_pair=PAIR)
+
+    assert results == [f"<line number {i}>" for i in range(5)]
+    assert time.perf_counter() - start < 0.35
+    assert len(threads) > 1
+    assert all(cache.get(text, *PAIR) == f"<{text}>" for text in texts)
+
+
+def test_cached_units_are_not_sent_again():
+    cache = TranslationCache(path="")
+    cache.put("first line", *PAIR, "<first cached>")
+    calls = []
+
+    def translate_one(unit):
+        calls.append(unit)
+        return f"<{unit}>"
+
+    # Only the whole text misses the cache; its first line was translated on its own before
+    results = batch_translate(["first line\nsecond line"], lambda joined: "", translate_one,
+                              cache=cache, lang_pair=PAIR)
+
+    assert results == ["<first cached>\n<second line>"]
+    assert calls == ["second line"]
+    assert cache.get("second line", *PAIR) == "<second line>"
+
+
+def test_mapped_batch_makes_one_request():
+    sent = []
+
+    def send(joined):
+        sent.append(joined)
+        return joined.upper()
+
+    results = batch_translate(["hello there", "good morning\nsee you"], send, lambda unit: None)
+
+    assert sent == ["hello there\ngood morning\nsee you"]
+    assert results == ["HELLO THERE", "GOOD MORNING\nSEE YOU"]
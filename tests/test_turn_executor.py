@@ -0,0 +1,101 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from turn_executor import Turn
+
+
+def test_independent_stages_run_in_parallel():
+    turn = Turn("test", executor=ThreadPoolExecutor(4))
+    for i in range(4):
+        turn.stage(f"sleep{i}", time.sleep, 0.2)
+    start = time.perf_counter()
+    turn.run()
+    assert time.perf_counter() - start < 0.6
+    assert len(turn.timeline()) == 4
+
+
+def test_dependencies_run_in_order():
+    order = []
+    turn = Turn("test")
+    turn.stage("a", order.append, "a")
+    turn.stage("b", lambda: order.append("b") or turn.result("a"), after=("a",))
+    turn.stage("c", order.append, "c", after=("b",))
+    turn.run()
+    assert order == ["a", "b", "c"]
+    timeline = turn.timeline()
+    assert [entry["stage"] for entry in timeline] == ["a", "b", "c"]
+    assert timeline[0]["end"] <= timeline[1]["start"]
+
+
+def test_failed_dependency_skips_dependents():
+    ran = []
+    turn = Turn("test")
+    turn.stage("boom", lambda: 1 / 0)
+    turn.stage("after", ran.append, "after", after=("boom",))
+    turn.run()
+    assert ran == []
+    assert set(turn.errors()) == {"boom", "after"}
+    with pytest.raises(ZeroDivisionError):
+        turn.result("after")
+
+
+def test_always_stage_runs_after_failed_dependency():
+    seen = []
+
+    def report():
+        try:
+            turn.result("boom")
+        except ZeroDivisionError:
+            seen.append("error")
+
+    turn = Turn("test")
+    turn.stage("boom", lambda: 1 / 0)
+    turn.stage("report", report, after=("boom",), always=True)
+    turn.run()
+    assert seen == ["error"]
+    assert set(turn.errors()) == {"boom"}
+
+
+def test_waiting_stages_do_not_starve_a_one_worker_pool():
+    turn = Turn("test", executor=ThreadPoolExecutor(1))
+
+    def fan_out():
+        parts = [turn.submit(f"part{i}", lambda i=i: i * 2) for i in range(5)]
+        return sum(part.result() for part in parts)
+
+    turn.stage("fan_out", fan_out)
+    turn.stage("total", lambda: turn.result("fan_out") + 1, after=("fan_out",))
+    done = threading.Event()
+    threading.Thread(target=lambda: (turn.run(), done.set()), daemon=True).start()
+    assert done.wait(5)
+    assert turn.result("total") == 21
+
+
+def test_stage_runs_once_when_several_threads_wait():
+    calls = []
+    turn = Turn("test", executor=ThreadPoolExecutor(1))
+    blocker = threading.Event()
+    turn.submit("blocker", blocker.wait, 5)
+    shared = turn.submit("shared", lambda: calls.append(1) or "value")
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(shared.result())) for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    for waiter in waiters:
+        waiter.join(5)
+    blocker.set()
+    turn.run()
+    assert calls == [1]
+    assert results == ["value"] * 4
+
+
+def test_duplicate_and_unknown_stage_names_are_rejected():
+    turn = Turn("test")
+    turn.stage("a", int)
+    with pytest.raises(ValueError):
+        turn.stage("a", int)
+    with pytest.raises(ValueError):
+        turn.stage("b", int, after=("missing",))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from vad import detect_speech
+
+SR = 16000
+
+
+def voiced(seconds, level_db):
+    """Harmonic 'voice' with a syllable-rate envelope that never falls to silence, at level_db RMS"""
+    t = np.arange(int(seconds * SR)) / SR
+    phase = 2 * np.pi * np.cumsum(140 + 20 * np.sin(2 * np.pi * 0.7 * t)) / SR
+    signal = sum(np.sin(k * phase) / k for k in range(1, 20)) * (0.35 + 0.65 * np.abs(np.sin(2 * np.pi * 2.5 * t)))
+    return (signal * 10 ** (level_db / 20) / np.sqrt(np.mean(signal ** 2))).astype(np.float32)
+
+
+def noise(seconds, level_db, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * SR)) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+@pytest.mark.parametrize("level_db", [-20, -40, -45])
+def test_speech_from_start_to_end_passes_at_any_level(level_db):
+    # The clip's floor is the speech itself; a quiet mic must not be mistaken for silence
+    result = detect_speech(voiced(2, level_db), SR)
+    assert result.has_speech
+    assert result.trimmed_seconds < 0.05
+
+
+def test_far_field_speech_over_room_noise_passes():
+    assert detect_speech(voiced(2, -38) + noise(2, -55), SR).has_speech
+
+
+@pytest.mark.parametrize("level_db", [-30, -45, -70])
+def test_noise_only_clips_are_rejected(level_db):
+    result = detect_speech(noise(2, level_db), SR)
+    assert not result.has_speech
+    assert result.audio.size == 0
+
+
+def test_speech_ratio_is_measured_before_the_hangover():
+    clip = np.concatenate([noise(1, -60), voiced(1, -22), noise(1, -60, seed=1)])
+    result = detect_speech(clip, SR)
+    assert result.speech_ratio == pytest.approx(1 / 3, abs=0.03)
+    # The trimmed audio still covers the speech plus hangover and padding
+    assert 1.0 < len(result.audio) / SR < 2.0
+
+
+def test_short_and_empty_clips():
+    assert not detect_speech(np.zeros(5, dtype=np.float32), SR).has_speech
+    assert not detect_speech(voiced(0.1, -20), SR).has_speech
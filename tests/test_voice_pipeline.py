@@ -0,0 +1,78 @@
+import time
+import threading
+
+import pytest
+
+from voice_pipeline import SentenceSegmenter, StreamingVoicePipeline
+
+
+def test_segmenter_cuts_sentences_and_keeps_decimals():
+    segmenter = SentenceSegmenter(min_chars=5)
+    sentences = []
+    for token in ["Pi is about 3.", "14 today. ", "Second one! Tail"]:
+        sentences += segmenter.feed(token)
+    assert sentences == ["Pi is about 3.14 today.", "Second one!"]
+    assert segmenter.flush() == "Tail"
+
+
+class Stream:
+    """Token generator that records how far it was read and whether it was closed"""
+
+    def __init__(self, count):
+        self.count = count
+        self.read = 0
+        self.closed = threading.Event()
+        self.gen = self._tokens()
+
+    def _tokens(self):
+        try:
+            for i in range(self.count):
+                self.read += 1
+                time.sleep(0.001)
+                yield f"Sentence number {i}. "
+        finally:
+            self.closed.set()
+
+
+def test_results_come_back_in_order():
+    stream = Stream(5)
+    pipeline = StreamingVoicePipeline(str.upper, max_workers=3)
+    results = [(seq, result) for seq, _, result in pipeline.run(stream.gen)]
+    assert results == [(i, f"SENTENCE NUMBER {i}.") for i in range(5)]
+    assert stream.closed.is_set()
+
+
+def test_failed_sentence_stops_and_closes_the_stream():
+    stream = Stream(1000)
+
+    def process(sentence):
+        if sentence.endswith("2."):
+            raise RuntimeError("tts down")
+        return sentence
+
+    with pytest.raises(RuntimeError):
+        for _ in StreamingVoicePipeline(process).run(stream.gen):
+            pass
+    # The stream's own cleanup (history update in stream_chat) has already run
+    assert stream.closed.is_set()
+    assert stream.read < 1000
+
+
+def test_consumer_closing_early_stops_the_producer():
+    stream = Stream(1000)
+    chunks = StreamingVoicePipeline(str.upper).run(stream.gen)
+    next(chunks)
+    chunks.close()
+    assert stream.closed.is_set()
+    assert stream.read < 1000
+
+
+def test_segmenter_reports_line_breaks_and_can_keep_short_lines_apart():
+    reply = "Prices:\n\n| Item | Cost |\n|---|---|\n| Tea | 10 |\nThat is all. Bye"
+    segmenter = SentenceSegmenter(split_lines=True)
+    pieces = []
+    for i in range(0, len(reply), 4):
+        pieces += segmenter.feed_with_breaks(reply[i:i + 4])
+    assert pieces == [("Prices:", "\n\n"), ("| Item | Cost |", "\n"), ("|---|---|", "\n"),
+                      ("| Tea | 10 |", "\n"), ("That is all.", " ")]
+    assert segmenter.flush() == "Bye"
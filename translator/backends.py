@@ -0,0 +1,99 @@
+import time
+import http_client
+
+GOOGLE_TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single?client=gtx&dt=t"
+ARGOS_TRANSLATE_URL = "https://translate.argosopentech.com/translate"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+def log_translation_error(message):
+    """Append a line to the translation log shared by both directions"""
+    with open("translation_log.txt", "a", encoding="utf-8") as log:
+        log.write(message + "\n")
+
+
+def parse_google_response(json_data):
+    """Extract the translated text from a translate_a/single response"""
+    if json_data and len(json_data) > 0 and json_data[0] and len(json_data[0]) > 0:
+        # Concatenate all translated segments
+        return "".join(segment[0] for segment in json_data[0] if segment and segment[0])
+    return ""
+
+
+class TranslationBackend:
+    """A translation upstream; translate() returns text or raises on failure"""
+
+    name = "backend"
+
+    def translate(self, text, source_lang, target_lang):
+        raise NotImplementedError
+
+    def probe(self):
+        """Health check used by the backend's circuit breaker while half-open"""
+        return bool(self.translate("hello", "en", "mni-Mtei"))
+
+
+class GoogleBackend(TranslationBackend):
+    """translate.googleapis.com (gtx client)"""
+
+    name = "google_translate"
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def translate(self, text, source_lang, target_lang, post=False):
+        params = {"sl": source_lang, "tl": target_lang}
+        headers = {"User-Agent": USER_AGENT}
+        if post:
+            # Batches go in the form body, which allows far more text than the query string
+            res = http_client.post(GOOGLE_TRANSLATE_URL, params=params, data={"q": text},
+                                   headers=headers, timeout=self.timeout)
+        else:
+            params["q"] = text
+            res = http_client.get(GOOGLE_TRANSLATE_URL, params=params, headers=headers, timeout=self.timeout)
+
+        if res.status_code != 200:
+            raise Exception(f"HTTP error {res.status_code}")
+        return parse_google_response(res.json())
+
+
+class ArgosBackend(TranslationBackend):
+    """LibreTranslate-compatible endpoint (Argos Translate)"""
+
+    name = "argos"
+
+    def __init__(self, timeout=15):
+        self.timeout = timeout
+
+    def translate(self, text, source_lang, target_lang):
+        # LibreTranslate uses bare language codes ("mni", not "mni-Mtei")
+        params = {"source": source_lang.split("-")[0], "target": target_lang.split("-")[0], "q": text}
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+        res = http_client.post(ARGOS_TRANSLATE_URL, json=params, headers=headers, timeout=self.timeout)
+        if res.status_code != 200:
+            raise Exception(f"HTTP error {res.status_code}")
+        return res.json().get("translatedText", "")
+
+
+class LocalBackend(TranslationBackend):
+    """In-process stand-in for tests and offline runs, with configurable latency and failures"""
+
+    def __init__(self, translations=None, delay=0.0, fail=False, name="local"):
+        """
+        Args:
+            translations: Dict of source text -> translation; other text is echoed with a marker
+            delay: Seconds to sleep before answering
+            fail: Raise instead of answering
+            name: Backend name used in logs and latency stats
+        """
+        self.translations = translations or {}
+        self.delay = delay
+        self.fail = fail
+        self.name = name
+
+    def translate(self, text, source_lang, target_lang):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise Exception(f"{self.name} backend unavailable")
+        return self.translations.get(text, f"[{target_lang}] {text}")
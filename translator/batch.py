@@ -0,0 +1,151 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Google's translate_a endpoint rejects bodies much beyond 5000 characters
+MAX_REQUEST_CHARS = 4500
+
+# Units of a batch that could not be mapped back are translated one by one, in parallel.
+# Its own pool: translate_one (the hedged translator) waits on the hedging pool.
+_fallback_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TRANSLATION_BATCH_FALLBACK_WORKERS", "8")),
+                                        thread_name_prefix="translate-batch")
+
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?꯫])\s+')
+
+
+def split_long_text(text, max_chars=MAX_REQUEST_CHARS):
+    """Split a single line into pieces of at most max_chars, preferring sentence then word boundaries"""
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_BREAK.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def plan_batches(texts, max_chars=MAX_REQUEST_CHARS):
+    """Break texts into line/piece units and pack them into newline-joined request batches
+
+    Returns (layout, batches): layout[i] is a list of lines for texts[i], each line a list
+    of unit indices (empty for blank lines); batches is a list of lists of (unit_index, unit_text).
+    """
+    layout = []
+    units = []
+    for text in texts:
+        lines = []
+        for line in text.split("\n"):
+            if not line.strip():
+                lines.append([])
+                continue
+            indices = []
+            for piece in split_long_text(line.strip(), max_chars):
+                indices.append(len(units))
+                units.append(piece)
+            lines.append(indices)
+        layout.append(lines)
+
+    batches = []
+    current, size = [], 0
+    for index, unit in enumerate(units):
+        if current and size + 1 + len(unit) > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append((index, unit))
+        size += len(unit) + 1
+    if current:
+        batches.append(current)
+    return layout, batches
+
+
+def assemble(layout, translated_units):
+    """Rebuild one translation per input text from the translated units"""
+    results = []
+    for lines in layout:
+        results.append("\n".join(" ".join(translated_units[i] for i in indices) for indices in lines).strip())
+    return results
+
+
+def batch_translate(texts, send, translate_one, max_chars=MAX_REQUEST_CHARS, cache=None, lang_pair=None):
+    """Translate many texts with as few upstream requests as the size limit allows
+
+    Args:
+        texts: Source strings
+        send: Callable(joined_text) -> translated text, one upstream request
+        translate_one: Callable(text) -> translated text, used (in parallel) for the units
+            of a batch that can't be mapped back
+        max_chars: Request size budget
+        cache: Optional TranslationCache consulted before and filled after the requests
+            (per text, and per unit for units translated one by one)
+        lang_pair: (source_lang, target_lang) used for cache keys
+    """
+    results = [""] * len(texts)
+    pending = {}
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        cached = cache.get(text, *lang_pair) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            # Identical inputs are sent once
+            pending.setdefault(text, []).append(i)
+
+    if pending:
+        sources = list(pending)
+        translations = _translate_uncached(sources, send, translate_one, max_chars, cache, lang_pair)
+        for text, translated in zip(sources, translations):
+            if cache is not None and translated and len(translated.strip()) >= 3:
+                cache.put(text, *lang_pair, translated)
+            for i in pending[text]:
+                results[i] = translated
+    return results
+
+
+def _translate_uncached(texts, send, translate_one, max_chars, cache=None, lang_pair=None):
+    layout, batches = plan_batches(texts, max_chars)
+    translated_units = {}
+    unmapped = []
+    for batch in batches:
+        result = send("\n".join(unit for _, unit in batch))
+        lines = result.split("\n") if result else []
+        if len(lines) == len(batch):
+            for (index, _), line in zip(batch, lines):
+                translated_units[index] = line.strip()
+        else:
+            # Segment count changed upstream (or the request failed); these go unit by unit
+            unmapped.extend(batch)
+
+    if unmapped:
+        units = [unit for _, unit in unmapped]
+        results = _fallback_executor.map(lambda unit: _translate_unit(unit, translate_one, cache, lang_pair), units)
+        for (index, _), translated in zip(unmapped, results):
+            translated_units[index] = translated
+    return assemble(layout, translated_units)
+
+
+def _translate_unit(unit, translate_one, cache, lang_pair):
+    """translate_one through the cache, so a unit that needed its own request is not re-sent next time"""
+    if cache is not None:
+        cached = cache.get(unit, *lang_pair)
+        if cached is not None:
+            return cached
+    translated = translate_one(unit) or ""
+    if cache is not None and len(translated.strip()) >= 3:
+        cache.put(unit, *lang_pair, translated)
+    return translated
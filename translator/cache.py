@@ -0,0 +1,158 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """Normalize source text for cache keys (Unicode NFC, trimmed, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    """Two-tier translation cache: in-process LRU in front of a persistent SQLite store"""
+
+    def __init__(self, path=None, max_entries=None, max_disk_entries=None, ttl_seconds=None):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file for the persistent tier; empty string disables it
+            max_entries: Maximum entries kept in memory
+            max_disk_entries: Maximum entries kept on disk
+            ttl_seconds: Age after which an entry is treated as a miss
+        """
+        self.path = os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.sqlite3") if path is None else path
+        self.max_entries = max_entries or int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+        self.max_disk_entries = max_disk_entries or int(os.getenv("TRANSLATION_CACHE_DISK_SIZE", "200000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes_since_prune = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.path:
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "key TEXT PRIMARY KEY, translation TEXT NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations(accessed)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache disk tier disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(text, source_lang, target_lang):
+        normalized = normalize_text(text)
+        return hashlib.sha1(f"{source_lang}|{target_lang}|{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text, source_lang, target_lang):
+        """Return the cached translation, or None on a miss"""
+        key = self.make_key(text, source_lang, target_lang)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return translation
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT translation, created FROM translations WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and now - row[1] <= self.ttl_seconds:
+                        self._db.execute("UPDATE translations SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, row[0], row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    print(f"Translation cache read error: {e}")
+
+            self.misses += 1
+            return None
+
+    def put(self, text, source_lang, target_lang, translation):
+        """Store a successful translation in both tiers"""
+        if not translation:
+            return
+        key = self.make_key(text, source_lang, target_lang)
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, translation, now, now),
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 1000:
+                    self._prune_disk(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Translation cache write error: {e}")
+
+    def _remember(self, key, translation, created):
+        self._memory[key] = (translation, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self, now):
+        """Drop expired rows, then the least recently used rows over the size cap"""
+        self._writes_since_prune = 0
+        self._db.execute("DELETE FROM translations WHERE created < ?", (now - self.ttl_seconds,))
+        count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY accessed LIMIT ?)",
+                (count - self.max_disk_entries,),
+            )
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+def get_default_cache():
+    """Return the process-wide cache shared by both translation directions"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = TranslationCache()
+    return _default_cache
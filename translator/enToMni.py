@@ -1,109 +1,63 @@
-import requests
-import time
-import random
+from translator.cache import get_default_cache, normalize_text
+from translator.batch import batch_translate
+from translator.backends import (
+    GOOGLE_TRANSLATE_URL, GoogleBackend, ArgosBackend, log_translation_error, parse_google_response
+)
+from translator.hedging import HedgedTranslator
+from circuit_breaker import get_breaker
+from singleflight import get_group
+
+SOURCE_LANG = "en"
+TARGET_LANG = "mni-Mtei"
+
+_google = GoogleBackend()
+# Google first; Argos is raced in if Google is slower than usual or fails
+_translator = HedgedTranslator([_google, ArgosBackend()])
+_flights = get_group(f"translate_{SOURCE_LANG}_{TARGET_LANG}")
 
 def translate(text):
     """Translate English text to Meitei Mayek with robust error handling"""
     if not text or len(text.strip()) == 0:
         return ""
     
-    # Try Google Translate API first
-    result = _google_translate(text)
+    cache = get_default_cache()
+    cached = cache.get(text, SOURCE_LANG, TARGET_LANG)
+    if cached is not None:
+        return cached
+    
+    # Google first, hedged with the fallback endpoint instead of sleeping and retrying;
+    # concurrent callers with the same text share one upstream call
+    result = _flights.do(normalize_text(text), _translator.translate, text, SOURCE_LANG, TARGET_LANG)
+    
+    if not result:
+        log_translation_error(f"All translation backends failed for: {text[:100]}...")
+        return ""  # Return empty string to trigger the fallback in the chat system
     
-    # If Google Translate fails or returns empty result, try a fallback
-    if not result or len(result.strip()) < 3:
-        # Log the failure
-        with open("translation_log.txt", "a", encoding="utf-8") as log:
-            log.write(f"Google Translate (EN->MNI) failed for: {text[:100]}...\n")
-        
-        # Try a different translation endpoint as fallback
-        result = _fallback_translate(text)
+    cache.put(text, SOURCE_LANG, TARGET_LANG, result)
     
     return result
 
-def _google_translate(text):
+def translate_batch(texts):
+    """Translate many English texts to Meitei Mayek, packing them into as few requests as possible
+
+    Returns one translation per input, in order ("" where translation failed).
+    """
+    return batch_translate(
+        texts,
+        lambda joined: _google_translate(joined, post=True),
+        lambda unit: _translator.translate(unit, SOURCE_LANG, TARGET_LANG),
+        cache=get_default_cache(),
+        lang_pair=(SOURCE_LANG, TARGET_LANG),
+    )
+
+def _google_translate(text, post=False):
     """Use Google Translate API to translate English to Meitei"""
-    params = {
-        "sl": "en",
-        "tl": "mni-Mtei",
-        "q": text
-    }
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
     try:
-        # Add a timeout to prevent hanging indefinitely
-        res = requests.get(
-            "https://translate.googleapis.com/translate_a/single?client=gtx&dt=t", 
-            params=params, 
-            headers=headers,
-            timeout=10
-        )
-        
-        # Check if the response is valid
-        if res.status_code != 200:
-            raise Exception(f"HTTP error {res.status_code}")
-            
-        # Parse the response
-        json_data = res.json()
-        
-        # Extract the translation
-        if json_data and len(json_data) > 0 and json_data[0] and len(json_data[0]) > 0:
-            translated_text = ""
-            # Concatenate all translated segments
-            for segment in json_data[0]:
-                if segment and len(segment) > 0:
-                    translated_text += segment[0]
-            return translated_text
-        else:
-            return ""
-            
+        return get_breaker(_google.name).call(_google.translate, text, SOURCE_LANG, TARGET_LANG, post=post)
     except Exception as e:
-        with open("translation_log.txt", "a", encoding="utf-8") as log:
-            log.write(f"Google Translate (EN->MNI) error: {e}\n")
+        log_translation_error(f"Google Translate (EN->MNI) error: {e}")
         return ""
 
-def _fallback_translate(text):
-    """Fallback translation method when Google Translate fails"""
-    # Try a different translation API or method here
-    try:
-        # Add a small delay to avoid rate limiting if we're retrying
-        time.sleep(random.uniform(0.5, 1.5))
-        
-        # Try with a different endpoint
-        params = {
-            "source": "en",
-            "target": "mni",
-            "q": text
-        }
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "application/json"
-        }
-        
-        # Try a different endpoint (LibreTranslate-compatible API if available)
-        res = requests.post(
-            "https://translate.argosopentech.com/translate",
-            json=params,
-            headers=headers,
-            timeout=15
-        )
-        
-        if res.status_code == 200:
-            json_data = res.json()
-            if 'translatedText' in json_data:
-                return json_data['translatedText']
-    
-    except Exception as e:
-        with open("translation_log.txt", "a", encoding="utf-8") as log:
-            log.write(f"Fallback translation (EN->MNI) error: {e}\n")
-    
-    # If all else fails, return a placeholder that indicates translation failed
-    return ""  # Return empty string to trigger the fallback in the chat system
-
 # Test the translation function
 if __name__ == "__main__":
     while True:
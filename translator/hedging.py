@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from translator.backends import log_translation_error
+from circuit_breaker import get_breaker, CircuitOpenError
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TRANSLATION_HEDGE_WORKERS", "16")),
+                               thread_name_prefix="translate")
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one backend"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p, default):
+        """Latency at percentile p (0-100), or default until enough samples exist"""
+        with self._lock:
+            if len(self._samples) < 10:
+                return default
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class HedgedTranslator:
+    """Sends a backup request when the primary backend is slower than its usual latency
+
+    The first backend is asked first. If it has not answered within its p-th percentile
+    latency (or fails), the next backend is fired in parallel and the first good result wins.
+    """
+
+    def __init__(self, backends, hedge_percentile=None, default_hedge_delay=None, min_chars=3):
+        """
+        Args:
+            backends: TranslationBackend instances in preference order
+            hedge_percentile: Primary latency percentile after which to hedge
+            default_hedge_delay: Hedge delay (seconds) before enough latency samples exist
+            min_chars: Results shorter than this count as failures
+        """
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile or float(os.getenv("TRANSLATION_HEDGE_PERCENTILE", "95"))
+        self.default_hedge_delay = default_hedge_delay or float(os.getenv("TRANSLATION_HEDGE_DELAY", "1.5"))
+        self.min_chars = min_chars
+        self.latency = {backend.name: LatencyTracker() for backend in self.backends}
+        self.breakers = {backend.name: get_breaker(backend.name, probe=backend.probe) for backend in self.backends}
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _call(self, backend, text, source_lang, target_lang):
+        start = time.perf_counter()
+        try:
+            result = self.breakers[backend.name].call(backend.translate, text, source_lang, target_lang)
+        except CircuitOpenError:
+            return ""
+        except Exception as e:
+            log_translation_error(f"{backend.name} ({source_lang}->{target_lang}) error: {e}")
+            return ""
+        if result and len(result.strip()) >= self.min_chars:
+            self.latency[backend.name].record(time.perf_counter() - start)
+            return result
+        log_translation_error(f"{backend.name} ({source_lang}->{target_lang}) returned no usable result for: {text[:100]}")
+        return ""
+
+    def translate(self, text, source_lang, target_lang, timeout=None):
+        """Return the first good translation, or "" if every backend failed"""
+        pending = {}
+        # Route around backends whose circuit is open
+        remaining = [backend for backend in self.backends if self.breakers[backend.name].is_available()]
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while remaining or pending:
+            if remaining:
+                backend = remaining.pop(0)
+                if pending:
+                    self.hedges += 1
+                pending[_executor.submit(self._call, backend, text, source_lang, target_lang)] = backend
+
+            # Wait for the newest request's usual latency before hedging to the next backend
+            if remaining:
+                wait_for = self.latency[backend.name].percentile(self.hedge_percentile, self.default_hedge_delay)
+            else:
+                wait_for = None
+            if deadline is not None:
+                left = max(deadline - time.monotonic(), 0)
+                wait_for = left if wait_for is None else min(wait_for, left)
+
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = pending.pop(future)
+                result = future.result()
+                if result:
+                    if winner is not self.backends[0]:
+                        self.hedge_wins += 1
+                    return result
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return ""
+
+    def stats(self):
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50": {name: tracker.percentile(50, None) for name, tracker in self.latency.items()},
+        }
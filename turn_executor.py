@@ -0,0 +1,192 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+TURN_WORKERS = int(os.getenv("TURN_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool shared by every turn's stages"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TURN_WORKERS, thread_name_prefix="turn")
+    return _executor
+
+
+class _Stage:
+    """One unit of work in a turn; runs at most once, on whichever thread claims it first"""
+
+    def __init__(self, turn, name, func, args, kwargs, after, always=False):
+        self.turn = turn
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.after = tuple(after)
+        self.always = always
+        self.started = False
+        self.claimed = False
+        self.done = False
+        self.value = None
+        self.error = None
+        self.start = None
+        self.end = None
+        self.thread = None
+
+    def _claim(self):
+        with self.turn._changed:
+            if self.claimed:
+                return False
+            self.claimed = True
+            return True
+
+    def execute(self):
+        """Run the stage on this thread unless another thread already has"""
+        if not self._claim():
+            return
+        self.start = time.perf_counter()
+        self.thread = threading.current_thread().name
+        try:
+            self.value = self.func(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.error = e
+        self.end = time.perf_counter()
+        self.turn._finish(self)
+
+    def fail(self, error):
+        """Finish without running (a dependency failed)"""
+        if self._claim():
+            self.error = error
+            self.turn._finish(self)
+
+    def result(self):
+        # Not picked up by the pool yet: run it here rather than wait for a free worker
+        self.execute()
+        with self.turn._changed:
+            self.turn._changed.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class Turn:
+    """Stages of one chat turn, run on the shared pool as their dependencies finish
+
+    Stages added with stage() start when run() is called and every stage named
+    in `after` has finished; a stage whose dependency failed is not run and
+    fails with the same error, unless it was added with always=True (it then
+    sees the failure through result()). submit() starts a stage right away
+    (for work found while another stage runs, like translating each sentence
+    of a reply as it streams in). Waiting threads run stages no worker has
+    picked up yet, so stages can wait on each other without starving the pool.
+
+    Every stage's start and end, relative to the turn's creation, are kept in
+    timeline().
+    """
+
+    def __init__(self, name="turn", executor=None):
+        """
+        Args:
+            name: Label for logs
+            executor: Thread pool to use (defaults to the shared one)
+        """
+        self.name = name
+        self.executor = executor or get_executor()
+        self.created = time.perf_counter()
+        self._stages = {}
+        self._changed = threading.Condition()
+
+    def _add(self, name, func, args, kwargs, after, always=False):
+        with self._changed:
+            if name in self._stages:
+                raise ValueError(f"Duplicate stage name: {name}")
+            unknown = [dep for dep in after if dep not in self._stages]
+            if unknown:
+                raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+            stage = self._stages[name] = _Stage(self, name, func, args, kwargs, after, always)
+        return stage
+
+    def stage(self, name, func, *args, after=(), always=False, **kwargs):
+        """Add a stage calling func(*args, **kwargs) once the stages in `after` have finished
+
+        With always=True it runs even if one of them failed.
+        """
+        self._add(name, func, args, kwargs, after, always)
+        return self
+
+    def submit(self, name, func, *args, **kwargs):
+        """Start func(*args, **kwargs) on the pool now; returns the stage (call .result() to wait)"""
+        stage = self._add(name, func, args, kwargs, ())
+        self._start(stage)
+        return stage
+
+    def _start(self, stage):
+        stage.started = True
+        self.executor.submit(stage.execute)
+
+    def _finish(self, stage):
+        with self._changed:
+            stage.done = True
+            self._changed.notify_all()
+
+    def run(self):
+        """Run every added stage to completion; returns the turn
+
+        Errors are not raised here; see result() and errors().
+        """
+        while True:
+            with self._changed:
+                stages = list(self._stages.values())
+            for stage in stages:
+                if stage.started:
+                    continue
+                deps = [self._stages[dep] for dep in stage.after]
+                failed = None if stage.always else next(
+                    (dep for dep in deps if dep.done and dep.error is not None), None)
+                if failed is not None:
+                    stage.started = True
+                    stage.fail(failed.error)
+                elif all(dep.done for dep in deps):
+                    self._start(stage)
+            remaining = [stage for stage in stages if not stage.done]
+            if not remaining:
+                return self
+            # Help out instead of idling: take a started stage no worker has claimed yet
+            idle = next((stage for stage in remaining if stage.started and not stage.claimed), None)
+            if idle is not None:
+                idle.execute()
+                continue
+            with self._changed:
+                self._changed.wait_for(lambda: any(stage.done for stage in remaining))
+
+    def result(self, name):
+        """Wait for a stage and return its value, raising its error if it failed"""
+        stage = self._stages[name]
+        if not stage.started:
+            raise RuntimeError(f"Stage {name} has not been started")
+        return stage.result()
+
+    def errors(self):
+        """Stages that failed, by name"""
+        return {name: stage.error for name, stage in self._stages.items() if stage.error is not None}
+
+    def timeline(self):
+        """Executed stages in start order: name, start/end seconds from the turn's creation, and thread"""
+        ran = sorted((stage for stage in self._stages.values() if stage.end is not None), key=lambda s: s.start)
+        return [{
+            "stage": stage.name,
+            "start": stage.start - self.created,
+            "end": stage.end - self.created,
+            "thread": stage.thread,
+        } for stage in ran]
+
+    def summary(self):
+        """One-line timeline for logs, e.g. "tts 0-412ms, emit_transcript 1-2ms" """
+        return ", ".join(f"{entry['stage']} {entry['start'] * 1000:.0f}-{entry['end'] * 1000:.0f}ms"
+                         for entry in self.timeline())
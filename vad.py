@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+FRAME_MS = 20
+MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))
+MIN_SPEECH_DB = float(os.getenv("VAD_MIN_SPEECH_DB", "-50"))
+# The margin above the floor is at most this fraction of the clip's level spread (90th - 10th
+# percentile), so a clip that is speech from start to end (its floor is speech) still passes
+SPREAD_FRACTION = float(os.getenv("VAD_SPREAD_FRACTION", "0.5"))
+MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "200"))
+PADDING_MS = int(os.getenv("VAD_PADDING_MS", "150"))
+# Speech concentrates its energy in this band and has a peaky (non-flat) spectrum
+SPEECH_BAND_HZ = (80, 4000)
+MIN_BAND_RATIO = 0.5
+MAX_FLATNESS = 0.4
+
+
+class VadResult:
+    """Outcome of voice activity detection on one clip
+
+    Args:
+        audio: The clip trimmed to the speech region (plus padding), or empty if no speech
+        sample_rate: Sample rate of audio
+        segments: (start_seconds, end_seconds) of each detected speech run
+        speech_ratio: Fraction of frames classified as speech (before the hangover bridges gaps)
+        total_seconds: Length of the input clip
+    """
+
+    def __init__(self, audio, sample_rate, segments, speech_ratio, total_seconds):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.segments = segments
+        self.speech_ratio = speech_ratio
+        self.total_seconds = total_seconds
+
+    @property
+    def has_speech(self):
+        return bool(self.segments)
+
+    @property
+    def speech_seconds(self):
+        return sum(end - start for start, end in self.segments)
+
+    @property
+    def trimmed_seconds(self):
+        return self.total_seconds - len(self.audio) / self.sample_rate
+
+    def metrics(self):
+        return {
+            "has_speech": self.has_speech,
+            "speech_ratio": round(self.speech_ratio, 3),
+            "speech_seconds": round(self.speech_seconds, 3),
+            "total_seconds": round(self.total_seconds, 3),
+            "trimmed_seconds": round(self.trimmed_seconds, 3),
+            "segments": len(self.segments),
+        }
+
+
+def frame_signal(samples, frame_len):
+    """View a mono buffer as (n_frames, frame_len), dropping the incomplete last frame"""
+    n_frames = len(samples) // frame_len
+    return samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+
+def frame_levels_db(frames):
+    """Mean power of each frame in dBFS"""
+    return 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+
+def spectral_features(frames, sample_rate):
+    """Per-frame speech-band energy ratio and spectral flatness"""
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frames.shape[1]), axis=1)) ** 2 + 1e-12
+    freqs = np.fft.rfftfreq(frames.shape[1], 1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    band_ratio = spectrum[:, band].sum(axis=1) / spectrum.sum(axis=1)
+    flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+    return band_ratio, flatness
+
+
+def _runs(mask):
+    """(start, end) frame indices of each run of True values"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_mask(samples, sample_rate, frame_ms=FRAME_MS):
+    """Classify each frame as speech using energy relative to the clip's level spread plus spectral shape"""
+    frame_len = sample_rate * frame_ms // 1000
+    frames = frame_signal(np.asarray(samples, dtype=np.float32), frame_len)
+    if len(frames) == 0:
+        return np.zeros(0, dtype=bool), frame_len
+    levels = frame_levels_db(frames)
+    noise_floor, peak = np.percentile(levels, (10, 90))
+    margin = min(MARGIN_DB, (peak - noise_floor) * SPREAD_FRACTION)
+    loud = levels > max(noise_floor + margin, MIN_SPEECH_DB)
+    band_ratio, flatness = spectral_features(frames, sample_rate)
+    return loud & (band_ratio >= MIN_BAND_RATIO) & (flatness <= MAX_FLATNESS), frame_len
+
+
+def speech_runs(mask, frame_ms=FRAME_MS):
+    """(start, end) frames of each speech region: runs bridged by HANGOVER_MS on each side,
+    keeping those that hold at least MIN_SPEECH_MS of speech frames"""
+    hangover = HANGOVER_MS // frame_ms
+    bridged = mask
+    if hangover and mask.any():
+        # Centered slice of the full convolution ("same" mode is wrong for clips shorter than the kernel)
+        bridged = np.convolve(mask, np.ones(2 * hangover + 1))[hangover:hangover + len(mask)] > 0
+    starts, ends = _runs(bridged)
+    keep = np.array([mask[start:end].sum() for start, end in zip(starts, ends)], dtype=int) \
+        >= max(MIN_SPEECH_MS // frame_ms, 1)
+    return starts[keep], ends[keep]
+
+
+def detect_speech(samples, sample_rate, frame_ms=FRAME_MS):
+    """Find speech in a mono clip and trim leading/trailing silence
+
+    Returns a VadResult; its audio is empty when the clip holds no speech.
+    """
+    total_seconds = len(samples) / sample_rate
+    mask, frame_len = speech_mask(samples, sample_rate, frame_ms)
+    starts, ends = speech_runs(mask, frame_ms)
+    if len(starts) == 0:
+        return VadResult(samples[:0], sample_rate, [], 0.0, total_seconds)
+
+    # Speech ratio from the classified frames, not the hangover-widened regions
+    speech_frames = sum(int(mask[start:end].sum()) for start, end in zip(starts, ends))
+    segments = [(float(start * frame_len / sample_rate), float(end * frame_len / sample_rate))
+                for start, end in zip(starts, ends)]
+    padding = sample_rate * PADDING_MS // 1000
+    first = max(starts[0] * frame_len - padding, 0)
+    last = min(ends[-1] * frame_len + padding, len(samples))
+    return VadResult(samples[first:last], sample_rate, segments, speech_frames / len(mask), total_seconds)
@@ -0,0 +1,126 @@
+import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# A sentence ends at terminal punctuation (incl. the Meitei Mayek cheikhei) followed by
+# whitespace, or at a line break. Decimals like "3.5" and "e.g.x" are not cut.
+_BOUNDARY = re.compile(r'[.!?꯫]+["\')\]]*\s+|\n+')
+
+_DONE = object()
+
+
+class SentenceSegmenter:
+    """Incrementally cuts a stream of LLM tokens into sentences"""
+
+    def __init__(self, min_chars=12, split_lines=False):
+        """
+        Args:
+            min_chars: Shorter fragments are merged with the following sentence
+            split_lines: Always cut at line breaks, so short lines (list items,
+                table rows) are not merged with the next one
+        """
+        self.min_chars = min_chars
+        self.split_lines = split_lines
+        self._buffer = ""
+
+    def feed(self, token):
+        """Add a token and return any sentences it completed"""
+        return [sentence for sentence, _ in self.feed_with_breaks(token)]
+
+    def feed_with_breaks(self, token):
+        """Like feed(), but as (sentence, separator) pairs
+
+        The separator is the line breaks that ended the sentence ("\n", "\n\n", ...)
+        or a single space, so joining sentence + separator keeps lists, tables
+        and paragraphs on their own lines.
+        """
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            breaks = match.group().count("\n")
+            if breaks and match.end() == len(self._buffer):
+                break  # more line breaks may follow in the next token
+            if len(candidate) >= self.min_chars or (self.split_lines and breaks and candidate):
+                sentences.append((candidate, "\n" * breaks or " "))
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever text is left once the stream ends"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+class StreamingVoicePipeline:
+    """Overlaps sentence processing (translate + TTS) with the LLM token stream"""
+
+    def __init__(self, process_sentence, max_workers=2, min_chars=12):
+        """
+        Args:
+            process_sentence: Callable(sentence) -> result, run on a worker thread per sentence
+            max_workers: Sentences processed concurrently
+            min_chars: Minimum sentence length handed to process_sentence
+        """
+        self.process_sentence = process_sentence
+        self.max_workers = max_workers
+        self.min_chars = min_chars
+
+    def run(self, tokens):
+        """Consume a token iterator; yield (seq, sentence, result) in order as each is ready
+
+        If processing a sentence raises, or the caller stops early (close(), or
+        dropping out of its loop), the token stream is abandoned: the producer
+        stops at the next token, is joined, and the iterator is closed before
+        this generator finishes, so nothing touches the stream's state afterwards.
+        """
+        segmenter = SentenceSegmenter(self.min_chars)
+        pending = queue.Queue()
+        stop = threading.Event()
+        tokens = iter(tokens)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def produce():
+                try:
+                    for token in tokens:
+                        if stop.is_set():
+                            return
+                        for sentence in segmenter.feed(token):
+                            pending.put((sentence, executor.submit(self.process_sentence, sentence)))
+                    rest = segmenter.flush()
+                    if rest and not stop.is_set():
+                        pending.put((rest, executor.submit(self.process_sentence, rest)))
+                except Exception as e:
+                    pending.put(e)
+                finally:
+                    pending.put(_DONE)
+
+            producer = threading.Thread(target=produce, daemon=True)
+            producer.start()
+
+            try:
+                seq = 0
+                while True:
+                    item = pending.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    sentence, future = item
+                    yield seq, sentence, future.result()
+                    seq += 1
+            finally:
+                stop.set()
+                producer.join()
+                close = getattr(tokens, "close", None)
+                if close is not None:
+                    close()
+                # Sentences queued but not started yet are no longer wanted
+                while not pending.empty():
+                    item = pending.get_nowait()
+                    if isinstance(item, tuple):
+                        item[1].cancel()